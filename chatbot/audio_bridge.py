@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from audio_codec import CODECS, ClientAudioCodec
+
+# Largest client message accepted (1 s of 48 kHz int16 mono)
+MAX_MESSAGE_BYTES = 96000
+
+# Servers already started, by (host, port)
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+class AudioDownlink:
+    """
+    Bounded queue of model audio waiting to be sent to a remote client.
+
+    Same interface as AudioRingBuffer on the producer side (`write`, `reset`,
+    `stats`), so the Live receive loop does not care where audio goes. When
+    the client reads slower than the model speaks, the oldest chunks are shed
+    instead of letting latency grow without bound.
+    """
+
+    def __init__(self, maxsize=200):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.sent_samples = 0
+        self.dropped_chunks = 0
+
+    def write(self, samples):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped_chunks += 1
+        self.queue.put_nowait(samples)
+        return len(samples)
+
+    async def frames(self):
+        while True:
+            chunk = await self.queue.get()
+            self.sent_samples += len(chunk)
+            yield chunk
+
+    def reset(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def stats(self):
+        return {
+            "queued_chunks": self.queue.qsize(),
+            "sent_samples": self.sent_samples,
+            "dropped_chunks": self.dropped_chunks,
+        }
+
+
+# ------------------------------
+# WebSocket bridge
+# ------------------------------
+async def _client_to_uplink(websocket, interview, codec):
+    """Binary messages are audio in the client's rate/codec; text messages are JSON control."""
+    async for message in websocket:
+        if isinstance(message, bytes):
+            interview.uplink.put(codec.decode(message))
+            continue
+        try:
+            control = json.loads(message)
+        except ValueError:
+            continue
+        if control.get("type") == "stop":
+            interview.request_stop()
+            return
+
+
+async def _downlink_to_client(websocket, interview, codec):
+    # `send` waits while the socket's write buffer is full, so a slow client
+    # pushes back into the bounded downlink queue rather than into memory.
+    # Encoded chunks go out as memoryviews, without a tobytes() copy.
+    async for chunk in interview.playback.frames():
+        await websocket.send(codec.encode(chunk))
+
+
+async def handle_audio_socket(websocket, sessions):
+    """
+    Bridge one client connection at /interview/<session_id>/audio to that
+    session's uplink and downlink until either side finishes.
+
+    Query parameters pick the client leg format: `rate` (default: the
+    session's input rate) and `codec` ("pcm16" or "mulaw").
+    """
+    url = urlsplit(websocket.request.path)
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    parts = url.path.strip("/").split("/")
+    interview = None
+    if len(parts) == 3 and parts[0] == "interview" and parts[2] == "audio":
+        interview = sessions.get(parts[1])
+    if interview is None or interview.transport != "websocket":
+        await websocket.close(4404, "No such interview")
+        return
+    if interview.client_connected:
+        await websocket.close(4409, "Interview already has an audio client")
+        return
+
+    try:
+        rate = int(query.get("rate", interview.input_rate))
+        codec_name = query.get("codec", "pcm16")
+        if not 8000 <= rate <= 96000 or codec_name not in CODECS:
+            raise ValueError
+    except ValueError:
+        await websocket.close(4400, "Unsupported rate or codec")
+        return
+    codec = ClientAudioCodec(rate, interview.input_rate, interview.output_rate, codec_name)
+
+    interview.attach_client()
+    await websocket.send(json.dumps({
+        "type": "ready",
+        "session_id": interview.id,
+        "rate": rate,
+        "codec": codec_name,
+    }))
+    tasks = [
+        asyncio.create_task(_client_to_uplink(websocket, interview, codec)),
+        asyncio.create_task(_downlink_to_client(websocket, interview, codec)),
+        asyncio.create_task(interview.stop_event.wait()),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Starts the reconnect grace period unless the session is already stopping
+        interview.detach_client()
+        await websocket.close()
+
+
+def serve_audio_sockets(sessions, host="0.0.0.0", port=5001):
+    """
+    Start the WebSocket audio server on the session manager's event loop.
+    Idempotent: a second call for the same host and port returns the
+    running server.
+    """
+    try:
+        from websockets.asyncio.server import serve
+    except ImportError:
+        raise SystemExit("❌ ERROR: Browser audio needs websockets (pip install websockets)")
+
+    with _servers_lock:
+        if (host, port) in _servers:
+            return _servers[host, port]
+        sessions.start()
+
+        async def start_server():
+            return await serve(lambda ws: handle_audio_socket(ws, sessions), host, port,
+                               max_size=MAX_MESSAGE_BYTES, max_queue=16)
+
+        server = asyncio.run_coroutine_threadsafe(start_server(), sessions.loop).result()
+        _servers[host, port] = server
+    print(f"🔌 Audio WebSocket listening on ws://{host}:{port}/interview/<session_id>/audio")
+    return server
@@ -0,0 +1,183 @@
+"""
+Sample-rate conversion and wire encodings for the client audio leg.
+
+    python audio_codec.py            # CPU cost per stream-second
+
+Clients talk to the WebSocket bridge at whatever rate their device runs
+(48 kHz, 44.1 kHz, ...) and in either 16-bit PCM or 8-bit mu-law; the
+bridge converts to and from the model's fixed 16 kHz in / 24 kHz out.
+"""
+import argparse
+import math
+import time
+from fractions import Fraction
+
+import numpy as np
+
+CODECS = ("pcm16", "mulaw")
+
+
+# ------------------------------
+# Resampling
+# ------------------------------
+def design_lowpass(up, down, taps_per_phase=24, beta=8.0):
+    """Kaiser-windowed sinc prototype for an up/down polyphase filter, shape (up, taps)."""
+    length = up * taps_per_phase
+    cutoff = 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    n = np.arange(length) - (length - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta)
+    h *= up / h.sum()
+    # Row p holds the taps that produce output phase p: h[p], h[p + up], ...
+    return h.reshape(taps_per_phase, up).T.astype(np.float32).copy()
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (src_rate * up / down) for int16 mono audio.
+
+    Each call converts one chunk and carries filter history and output phase
+    over to the next, so a stream can be fed in arbitrary block sizes. All
+    outputs of a chunk are computed at once as a gather + row-wise dot
+    product, never one sample at a time in Python.
+    """
+
+    def __init__(self, src_rate, dst_rate, taps_per_phase=24):
+        ratio = Fraction(dst_rate, src_rate)
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+        self.passthrough = self.up == self.down
+        self.taps = taps_per_phase
+        self.filters = design_lowpass(self.up, self.down, taps_per_phase)
+        # Last taps-1 input samples; global index of history[0] is `_start`
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._start = -(taps_per_phase - 1)
+        self._next_out = 0
+
+    def process(self, samples):
+        if self.passthrough:
+            return samples
+        x = np.concatenate((self._history, samples.astype(np.float32)))
+        last = self._start + len(x) - 1
+
+        # Outputs whose newest input sample has arrived: floor(k * down / up) <= last
+        end = ((last + 1) * self.up - 1) // self.down + 1
+        k = np.arange(self._next_out, end, dtype=np.int64)
+        newest = k * self.down // self.up - self._start
+        phase = (k * self.down) % self.up
+
+        windows = newest[:, None] - np.arange(self.taps)[None, :]
+        out = np.einsum("ij,ij->i", x[windows], self.filters[phase])
+
+        self._next_out = end
+        self._history = x[len(x) - (self.taps - 1):]
+        self._start = last - (self.taps - 2)
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+# ------------------------------
+# Encodings
+# ------------------------------
+MULAW_BIAS = 0x84
+MULAW_CLIP = 8159  # 14-bit magnitude limit
+
+
+def mulaw_encode(samples):
+    """G.711 mu-law: int16 -> uint8, halving bandwidth for speech."""
+    # Same 14-bit formulation as the reference g711.c (and audioop)
+    x = samples.astype(np.int32) >> 2
+    sign = (x < 0).astype(np.int32) << 7
+    # Top segment saturates at 0x1FFF
+    magnitude = np.minimum(np.minimum(np.abs(x), MULAW_CLIP) + (MULAW_BIAS >> 2), 0x1FFF)
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    mantissa = (magnitude >> (exponent + 1)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+_MULAW_TABLE = None
+
+
+def mulaw_decode(data):
+    """uint8 mu-law (any buffer) -> int16 via a 256-entry lookup table."""
+    global _MULAW_TABLE
+    if _MULAW_TABLE is None:
+        u = ~np.arange(256, dtype=np.int32) & 0xFF
+        magnitude = (((u & 0x0F) << 3) + MULAW_BIAS) << ((u >> 4) & 0x07)
+        _MULAW_TABLE = np.where(u & 0x80, MULAW_BIAS - magnitude,
+                                magnitude - MULAW_BIAS).astype(np.int16)
+    return _MULAW_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def as_buffer(samples):
+    """Zero-copy byte view of a contiguous numpy array (for socket sends)."""
+    return memoryview(np.ascontiguousarray(samples)).cast("B")
+
+
+class ClientAudioCodec:
+    """
+    Per-connection conversion between a client's rate/encoding and the
+    model's rates. `decode` takes a received message buffer without copying
+    it; `encode` returns a buffer that can be handed straight to `send`.
+    """
+
+    def __init__(self, client_rate, model_input_rate, model_output_rate, codec="pcm16"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec {codec!r}")
+        self.codec = codec
+        self.client_rate = client_rate
+        self.uplink = PolyphaseResampler(client_rate, model_input_rate)
+        self.downlink = PolyphaseResampler(model_output_rate, client_rate)
+
+    def decode(self, message):
+        if self.codec == "mulaw":
+            samples = mulaw_decode(message)
+        else:
+            samples = np.frombuffer(message, dtype=np.int16, count=len(message) // 2)
+        return self.uplink.process(samples)
+
+    def encode(self, samples):
+        samples = self.downlink.process(samples)
+        if self.codec == "mulaw":
+            return as_buffer(mulaw_encode(samples))
+        return as_buffer(samples)
+
+
+# ------------------------------
+# Benchmark
+# ------------------------------
+def _cpu_per_stream_second(fn, rate, block_ms, seconds):
+    block = rate * block_ms // 1000
+    rng = np.random.default_rng(0)
+    t = np.arange(rate * seconds) / rate
+    audio = (8000 * np.sin(2 * math.pi * 440 * t) + rng.normal(0, 300, len(t))).astype(np.int16)
+    blocks = [audio[i:i + block] for i in range(0, len(audio) - block + 1, block)]
+    start = time.process_time()
+    for b in blocks:
+        fn(b)
+    return (time.process_time() - start) / seconds
+
+
+def benchmark(seconds=30, block_ms=20):
+    print(f"CPU per stream-second ({block_ms} ms blocks, {seconds} s of audio):")
+    cases = [
+        ("resample 48000 -> 16000", 48000, PolyphaseResampler(48000, 16000).process),
+        ("resample 44100 -> 16000", 44100, PolyphaseResampler(44100, 16000).process),
+        ("resample 24000 -> 48000", 24000, PolyphaseResampler(24000, 48000).process),
+        ("resample 24000 -> 44100", 24000, PolyphaseResampler(24000, 44100).process),
+        ("mu-law encode 24000", 24000, mulaw_encode),
+        ("mu-law decode 16000", 16000, lambda b: mulaw_decode(mulaw_encode(b))),
+        ("tobytes() 24000", 24000, lambda b: b.tobytes()),
+        ("memoryview 24000", 24000, as_buffer),
+    ]
+    for name, rate, fn in cases:
+        cost = _cpu_per_stream_second(fn, rate, block_ms, seconds)
+        print(f"  {name:<26} {cost * 1000:8.3f} ms  ({1 / cost if cost else float('inf'):,.0f} streams/core)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark audio resampling and encoding.")
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--block-ms", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.seconds, args.block_ms)
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity int16 ring buffer between one producer and one consumer.
+
+    The producer (the Live receive loop) only ever advances the write counter
+    and the consumer (the sounddevice output callback) only ever advances the
+    read counter, so neither side takes a lock and the audio thread never
+    allocates or copies more than the block it plays.
+
+    Playback starts only once `target_depth` samples are buffered, and goes
+    back to buffering after an underrun, which absorbs network jitter at the
+    cost of `target_depth` samples of latency.
+    """
+
+    def __init__(self, capacity, target_depth=0, dtype=np.int16):
+        self.capacity = capacity
+        self.target_depth = min(target_depth, capacity)
+        self._data = np.zeros(capacity, dtype=dtype)
+        # Monotonic sample counters; positions are taken modulo capacity
+        self._write = 0
+        self._read = 0
+        self._playing = False
+
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_samples = 0
+
+    def __len__(self):
+        return self._write - self._read
+
+    def write(self, samples):
+        """Producer side: append samples, dropping what does not fit. Returns samples written."""
+        samples = np.asarray(samples).reshape(-1)
+        free = self.capacity - (self._write - self._read)
+        if len(samples) > free:
+            self.overruns += 1
+            self.dropped_samples += len(samples) - free
+            samples = samples[:free]
+
+        n = len(samples)
+        if n:
+            start = self._write % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            # Publish only after the samples are in place
+            self._write += n
+        return n
+
+    def read_into(self, out):
+        """Consumer side: fill `out` completely, padding with silence. Returns real samples copied."""
+        frames = len(out)
+        available = self._write - self._read
+
+        if not self._playing:
+            if available == 0 or available < self.target_depth:
+                out[:] = 0
+                return 0
+            self._playing = True
+
+        n = min(frames, available)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:n] = self._data[:n - first]
+        self._read += n
+
+        if n < frames:
+            # Ran dry mid-playback: pad with silence and rebuild the jitter cushion
+            out[n:] = 0
+            self.underruns += 1
+            self._playing = False
+        return n
+
+    def reset(self):
+        """Discard buffered audio. Only call while the consumer is idle (e.g. on stop)."""
+        self._read = self._write
+        self._playing = False
+
+    def stats(self):
+        return {
+            "buffered": len(self),
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "dropped_samples": self.dropped_samples,
+        }
@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+
+
+class AudioUplink:
+    """
+    Hands microphone blocks from the sounddevice callback thread to the
+    asyncio loop that talks to Gemini Live.
+
+    The callback schedules each block onto the loop with
+    `call_soon_threadsafe`, so the sender simply awaits the next block: no
+    polling interval, no blocking `Queue.get` inside the event loop, and no
+    CPU used while the candidate is quiet.
+
+    With `frame_ms` set, small device blocks are coalesced (and large ones
+    split) into fixed-size frames before they are sent.
+    """
+
+    def __init__(self, loop, sample_rate=16000, frame_ms=0, maxsize=100):
+        self.loop = loop
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.closed = False
+
+    # Runs on the PortAudio thread
+    def callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"Input status: {status}")
+        if self.closed:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.put, indata[:, 0].copy())
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+
+    # Runs on the event loop (also fed directly by the WebSocket bridge)
+    def put(self, chunk):
+        if self.queue.full():
+            # Keep the newest audio; latency matters more than completeness
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(chunk)
+
+    def close(self):
+        self.closed = True
+
+    async def frames(self):
+        """Yield int16 chunks as they arrive (fixed `frame_ms` frames if configured)."""
+        if not self.frame_samples:
+            while True:
+                yield await self.queue.get()
+
+        pending = np.empty(0, dtype=np.int16)
+        while True:
+            chunk = await self.queue.get()
+            pending = np.concatenate((pending, chunk)) if len(pending) else chunk
+            while len(pending) >= self.frame_samples:
+                yield pending[:self.frame_samples]
+                pending = pending[self.frame_samples:]
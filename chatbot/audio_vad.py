@@ -0,0 +1,154 @@
+import collections
+
+import numpy as np
+
+VAD_MODES = ("off", "energy", "webrtc")
+
+
+class VoiceActivityGate:
+    """
+    Drops silent mic audio before it is sent to the model.
+
+    Incoming chunks are cut into `frame_ms` analysis frames and classified
+    in one vectorized pass: a frame is speech when its energy is `margin_db`
+    above the adaptive noise floor and either its zero-crossing rate looks
+    voiced or it is loud enough to be a fricative (hiss-like noise has high
+    ZCR but little energy). With mode="webrtc" and `webrtcvad` installed,
+    that library classifies the frames instead.
+
+    Speech always has dips between syllables and words. When every frame of
+    the last `floor_window_ms` was speech, the noise floor is raised slowly
+    toward the quietest of them, so a steady hum or fan that starts above
+    the floor is learned as noise instead of holding the gate open.
+
+    `hangover_ms` of audio keeps flowing after speech stops, so the model's
+    own turn detection still hears the trailing silence. The last
+    `preroll_ms` of silence is held back and sent ahead of each onset, so the
+    first syllable is never clipped. `keepalive_every` > 0 lets one in every
+    N silent frames through instead of gating silence completely.
+    """
+
+    def __init__(self, sample_rate=16000, mode="energy", frame_ms=20, margin_db=10.0,
+                 min_db=-55.0, zcr_max=0.25, loud_db=6.0, hangover_ms=300, preroll_ms=200,
+                 keepalive_every=0, aggressiveness=2, floor_window_ms=3000):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.zcr_max = zcr_max
+        self.loud_db = loud_db
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.keepalive_every = keepalive_every
+        self.noise_db = min_db
+        self._recent_db = collections.deque(maxlen=max(1, floor_window_ms // frame_ms))
+        self._speech_run = 0
+
+        self.webrtc = None
+        if mode == "webrtc":
+            try:
+                import webrtcvad
+                self.webrtc = webrtcvad.Vad(aggressiveness)
+            except ImportError:
+                print("⚠  webrtcvad not installed, falling back to the energy VAD")
+
+        self._pending = np.empty(0, dtype=np.int16)
+        self._preroll = collections.deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._hang = 0
+        self._silent_run = 0
+        self.in_speech = False
+
+        self.frames_in = 0
+        self.frames_sent = 0
+        self.segments = 0
+
+    def _classify(self, frames):
+        """Boolean speech decision for each row of an (n, frame_samples) int16 array."""
+        if self.webrtc is not None:
+            return np.array([self.webrtc.is_speech(f.tobytes(), self.sample_rate) for f in frames])
+
+        x = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(x * x, axis=1))
+        db = 20.0 * np.log10(rms + 1e-9)
+        zcr = np.mean(np.signbit(x[:, 1:]) != np.signbit(x[:, :-1]), axis=1)
+
+        threshold = max(self.noise_db + self.margin_db, self.min_db)
+        speech = (db > threshold) & ((zcr < self.zcr_max) | (db > threshold + self.loud_db))
+
+        # Track the noise floor on non-speech frames only (rises slowly, falls fast)
+        quiet = db[~speech]
+        if len(quiet):
+            level = float(np.median(quiet))
+            rate = 0.05 if level > self.noise_db else 0.5
+            self.noise_db += rate * (level - self.noise_db)
+
+        # Frames in a row classified as speech; a steady sound never breaks the run
+        self._recent_db.extend(db.tolist())
+        if speech.all():
+            self._speech_run += len(speech)
+        else:
+            self._speech_run = len(speech) - 1 - int(np.flatnonzero(~speech)[-1])
+        if self._speech_run >= self._recent_db.maxlen:
+            level = min(self._recent_db)
+            if level > self.noise_db:
+                # About a 1 s time constant at 20 ms frames, whatever the chunk size
+                self.noise_db += (1.0 - 0.98 ** len(db)) * (level - self.noise_db)
+        return speech
+
+    def process(self, chunk):
+        """
+        Feed one int16 chunk; returns (audio_to_send or None, segment_ended).
+
+        `segment_ended` is True when a speech segment (including hangover)
+        finished during this chunk.
+        """
+        if len(self._pending):
+            chunk = np.concatenate((self._pending, chunk))
+        n = len(chunk) // self.frame_samples
+        self._pending = chunk[n * self.frame_samples:]
+        if not n:
+            return None, False
+
+        frames = chunk[:n * self.frame_samples].reshape(n, self.frame_samples)
+        speech = self._classify(frames)
+        self.frames_in += n
+
+        out = []
+        segment_ended = False
+        for frame, is_speech in zip(frames, speech):
+            if is_speech:
+                if not self.in_speech:
+                    self.in_speech = True
+                    self.segments += 1
+                    out.extend(self._preroll)
+                    self._preroll.clear()
+                self._hang = self.hangover_frames
+                out.append(frame)
+            elif self.in_speech:
+                out.append(frame)
+                self._hang -= 1
+                if self._hang <= 0:
+                    self.in_speech = False
+                    self._silent_run = 0
+                    segment_ended = True
+            else:
+                self._silent_run += 1
+                if self.keepalive_every and self._silent_run % self.keepalive_every == 0:
+                    out.append(frame)
+                else:
+                    self._preroll.append(frame)
+
+        self.frames_sent += len(out)
+        # Send one contiguous block per chunk rather than one message per frame
+        return (np.concatenate(out) if out else None), segment_ended
+
+    def stats(self):
+        suppressed = self.frames_in - self.frames_sent
+        return {
+            "frames_in": self.frames_in,
+            "frames_sent": self.frames_sent,
+            "suppressed_frames": suppressed,
+            "suppressed_bytes": suppressed * self.frame_samples * 2,
+            "suppressed_ratio": round(suppressed / self.frames_in, 3) if self.frames_in else 0.0,
+            "speech_segments": self.segments,
+            "noise_floor_db": round(self.noise_db, 1),
+        }
@@ -1,39 +1,60 @@
 # chatbot.py
 import asyncio
 import logging
-import sounddevice as sd
 import numpy as np
 from google import genai
 from google.genai import types
 import os
-from queue import Queue
-import threading
 from dotenv import load_dotenv
-import requests
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import time
 import math
 import tempfile
-import pdfplumber
-import json
 from datetime import datetime, timezone, timedelta
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired
 
+from audio_bridge import serve_audio_sockets
+from interview_sessions import SessionManager
+from jd_compact import JdCompactor
+from live_pool import LivePool
+from pdf_extract import PdfExtractor
+from question_batch import QuestionBatch, normalize_spec
+from question_gen import (QUESTION_MODEL, detailed_question_prompt, question_cache_from_env,
+                          question_key, upstream_from_env)
+from streaming import (batch_events, iter_json_array, parse_json_array, pdf_upload_response,
+                       question_events, sse_response, wants_stream)
+from upstream import UpstreamError
+
 # Flask app
-app = Flask(_name_)
+app = Flask(__name__)
 CORS(app)
 
 # Load .env
 load_dotenv()
 
-# REQUIRED env var
+# FAKE_LIVE=1 replaces Gemini Live with a local echo stand-in (see fake_live.py)
+FAKE_LIVE = os.getenv("FAKE_LIVE") == "1"
+
+# REQUIRED env var (unless running against the fake Live session)
 API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
+if not API_KEY and not FAKE_LIVE:
     raise ValueError("GEMINI_API_KEY not found in environment variables")
 
 # Initialize GenAI client
-client = genai.Client(api_key=API_KEY)
+client = genai.Client(api_key=API_KEY) if API_KEY else None
+
+# Shared pooled client for REST text generation: keep-alive connections,
+# bounded concurrency, jittered retries and a per-request deadline
+upstream = upstream_from_env(API_KEY)
+
+# Client used for Live audio sessions
+if FAKE_LIVE:
+    from fake_live import FakeLiveClient
+    # FAKE_LIVE_CONNECT_MS simulates the Live connection handshake
+    live_client = FakeLiveClient(connect_delay=float(os.getenv("FAKE_LIVE_CONNECT_MS", "0")) / 1000)
+else:
+    live_client = client
 
 # Default live model + config for Gemini Live audio responses
 model = "gemini-live-2.5-flash-preview"
@@ -54,79 +75,88 @@ config = {
 }
 BASE_SYSTEM_INSTRUCTION = config.get("system_instruction", "")
 
-# Audio buffer + thread-safety
-audio_buffer = np.array([], dtype=np.int16)
-buffer_lock = threading.Lock()
+# Mic sample rate sent to Gemini Live, and playback sample rate of its audio
+INPUT_RATE = 16000
+OUTPUT_RATE = 24000
+
+# Coalesce mic blocks into fixed frames of this many ms before sending (0 = send as captured)
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "0"))
+
+# Playback jitter buffer (one per session): playback starts once AUDIO_JITTER_MS are queued
+AUDIO_JITTER_MS = int(os.getenv("AUDIO_JITTER_MS", "120"))
+
+# Maximum number of concurrent interview sessions on this node
+MAX_INTERVIEW_SESSIONS = int(os.getenv("MAX_INTERVIEW_SESSIONS", "50"))
+
+# Mic silence suppression before sending: "energy", "webrtc" (needs webrtcvad) or "off"
+AUDIO_VAD = os.getenv("AUDIO_VAD", "energy")
 
-# Audio queues (larger max sizes to avoid drop)
-audio_input_queue = Queue(maxsize=100)
-audio_output_queue = Queue(maxsize=200)
+# Default audio transport: "websocket" streams PCM to/from the browser,
+# "local" uses the sound card of the machine running Flask
+AUDIO_TRANSPORT = os.getenv("AUDIO_TRANSPORT", "websocket")
+AUDIO_WS_PORT = int(os.getenv("AUDIO_WS_PORT", "5001"))
+
+# Reaping of abandoned browser sessions: stop an interview if no audio client
+# connects within AUDIO_CLIENT_TIMEOUT seconds, or if its client disconnects
+# and does not reconnect within AUDIO_RECONNECT_GRACE seconds
+AUDIO_CLIENT_TIMEOUT = float(os.getenv("AUDIO_CLIENT_TIMEOUT", "60"))
+AUDIO_RECONNECT_GRACE = float(os.getenv("AUDIO_RECONNECT_GRACE", "15"))
+
+# Warm pool: Live sessions connected ahead of time so an interview starts without
+# waiting for the handshake (0, the default, = connect on demand). Idle ones are
+# recycled after LIVE_WARM_MAX_IDLE seconds. Opt-in, since every warm session is
+# an open, billed Live connection even when nobody is interviewing.
+LIVE_WARM_SESSIONS = int(os.getenv("LIVE_WARM_SESSIONS", "0"))
+LIVE_WARM_MAX_IDLE = float(os.getenv("LIVE_WARM_MAX_IDLE", "240"))
+
+# Upper bound on interview teardown: after this many seconds a stopping session is cancelled
+INTERVIEW_STOP_DEADLINE = float(os.getenv("INTERVIEW_STOP_DEADLINE", "5"))
 
 # Audio output callback for sounddevice OutputStream
-def audio_output_callback(outdata, frames, time_info, status):
-    """Play audio data from the output buffer. Filled by receive_audio."""
-    global audio_buffer
-    if status:
-        print(f"Output status: {status}")
-    with buffer_lock:
-        # Fill buffer from queue if needed
-        while not audio_output_queue.empty() and len(audio_buffer) < frames * 4:
-            try:
-                chunk = audio_output_queue.get_nowait()
-                audio_buffer = np.append(audio_buffer, chunk)
-            except Exception:
-                break
-        # If enough frames, output; else pad with silence
-        if len(audio_buffer) >= frames:
-            outdata[:, 0] = audio_buffer[:frames]
-            audio_buffer = audio_buffer[frames:]
-        else:
-            if len(audio_buffer) > 0:
-                available = len(audio_buffer)
-                outdata[:available, 0] = audio_buffer
-                outdata[available:, 0] = 0
-                audio_buffer = np.array([], dtype=np.int16)
-            else:
-                outdata.fill(0)
-
-# Audio input callback for sounddevice InputStream
-def audio_input_callback(indata, frames, time_info, status):
-    if status:
-        print(f"Input status: {status}")
-    try:
-        audio_input_queue.put(indata.copy(), block=False)
-    except Exception:
-        # Queue full — drop this chunk
-        pass
+def make_output_callback(playback):
+    """Build a callback that plays a session's jitter buffer (lock-free, no allocation)."""
+    def audio_output_callback(outdata, frames, time_info, status):
+        if status:
+            print(f"Output status: {status}")
+        playback.read_into(outdata[:, 0])
+    return audio_output_callback
 
 # Async: Send captured audio chunks to Gemini Live session
-async def send_audio(session, stop_event):
+async def send_audio(session, uplink, stop_event, vad=None):
+    """
+    Forward mic audio as it arrives; the task sleeps until the input callback
+    delivers a chunk. With a VAD, silent frames are suppressed before sending.
+    """
     print("🎤 Listening... (Press stop to end)")
     try:
-        while not stop_event.is_set():
+        async for audio_chunk in uplink.frames():
+            if stop_event.is_set():
+                break
+            speech_ended = False
+            if vad is not None:
+                audio_chunk, speech_ended = vad.process(audio_chunk)
             try:
-                if not audio_input_queue.empty():
-                    audio_chunk = audio_input_queue.get(timeout=0.01)
-                    # send audio as raw PCM blob
+                # send audio as raw PCM blob
+                if audio_chunk is not None:
                     await session.send_realtime_input(
                         audio=types.Blob(
                             data=audio_chunk.tobytes(),
-                            mime_type="audio/pcm;rate=16000"
+                            mime_type=f"audio/pcm;rate={INPUT_RATE}"
                         )
                     )
-                else:
-                    await asyncio.sleep(0.01)
+                # Signal end of speech so Live can close the turn without more audio
+                if speech_ended:
+                    await session.send_realtime_input(audio_stream_end=True)
             except Exception as e:
                 if not stop_event.is_set():
                     print(f"Error in send loop: {e}")
-                    await asyncio.sleep(0.1)
     except asyncio.CancelledError:
         print("Send task cancelled")
     except Exception as e:
         print(f"Fatal error in send_audio: {e}")
 
 # Async: Receive continuous audio and server_content events from Gemini Live
-async def receive_audio(session, stop_event):
+async def receive_audio(session, playback, stop_event):
     """Receive audio chunks and server content from Gemini Live connection."""
     turn_count = 0
     try:
@@ -138,7 +168,7 @@ async def receive_audio(session, stop_event):
                 if response.data is not None:
                     # convert bytes -> int16 numpy array
                     audio_data = np.frombuffer(response.data, dtype=np.int16)
-                    audio_output_queue.put(audio_data)
+                    playback.write(audio_data)
                 # Handle server_content (turn complete & transcription available)
                 if response.server_content:
                     if getattr(response.server_content, "turn_complete", False):
@@ -152,11 +182,7 @@ async def receive_audio(session, stop_event):
                         print("🔄 Preparing next question...")
                         adjust_difficulty(turn_count, feedback)
                         print(f"✅ Turn {turn_count} complete - ready for next input!")
-            if stop_event.is_set():
-                break
-            # Loop ended unexpectedly — wait a bit and continue
-            print("⚠  Session receive loop ended, waiting...")
-            await asyncio.sleep(0.5)
+            # receive() ends after each turn_complete; go straight back for the next turn
     except asyncio.CancelledError:
         print("Receive task cancelled")
     except Exception as e:
@@ -167,6 +193,8 @@ async def receive_audio(session, stop_event):
 def get_job_description_cli():
     print("📄 Please provide the Job Description (JD) for the interview:")
     jd = input("Enter JD or path to JD file: ").strip()
+    if os.path.isfile(jd) and jd.lower().endswith(".pdf"):
+        return extract_pdf_text(jd)
     if os.path.isfile(jd):
         with open(jd, "r") as f:
             return f.read()
@@ -192,138 +220,203 @@ def adjust_difficulty(turn_count, feedback):
     else:
         print("➡ Keeping difficulty the same.")
 
-# Thread control globals
-interview_lock = threading.Lock()
-interview_thread_running = False
-interview_stop_event = None
+def open_local_audio(interview):
+    """Open this machine's mic and speaker for a "local" session; returns the started streams."""
+    # Imported here so headless servers without PortAudio never load it
+    import sounddevice as sd
+    input_stream = sd.InputStream(
+        channels=1,
+        samplerate=INPUT_RATE,
+        dtype=np.int16,
+        callback=interview.uplink.callback,
+        blocksize=1024
+    )
+    output_stream = sd.OutputStream(
+        channels=1,
+        samplerate=OUTPUT_RATE,
+        dtype=np.int16,
+        callback=make_output_callback(interview.playback),
+        blocksize=2048
+    )
+    input_stream.start()
+    output_stream.start()
+    print("🎙  Audio streams started\n")
+    return [input_stream, output_stream]
 
-def run_interview_session(job_description):
+async def run_interview(interview):
     """
-    Start a background thread that connects to Gemini Live and streams audio.
-    Returns an acknowledgement or None if a session is already running.
+    Connect one interview session to Gemini Live and stream audio until its
+    stop event is set. Runs as a task on the shared session loop.
     """
-    global interview_thread_running, interview_stop_event
-
+    # Cold connects carry the JD in the system instruction.
     # Avoid mutating global config in-place for each session
     session_config = dict(config)
     session_config["system_instruction"] = (
-        f"{BASE_SYSTEM_INSTRUCTION} Use the following Job Description (JD) as context:\n{job_description}"
+        f"{BASE_SYSTEM_INSTRUCTION} Use the following Job Description (JD) as context:\n"
+        f"{interview.job_description}"
     )
-
-    def interview_thread():
-        global interview_thread_running, interview_stop_event
-        interview_stop_event = asyncio.Event()
-        input_stream = None
-        output_stream = None
-
-        async def interview():
-            nonlocal input_stream, output_stream
-            try:
-                # Connect to Gemini Live via async context manager
-                async with client.aio.live.connect(model=model, config=session_config) as session:
-                    print("✅ Connected to Gemini Live API")
-                    # Input and output streams
-                    input_stream = sd.InputStream(
-                        channels=1,
-                        samplerate=16000,
-                        dtype=np.int16,
-                        callback=audio_input_callback,
-                        blocksize=1024
-                    )
-                    output_stream = sd.OutputStream(
-                        channels=1,
-                        samplerate=24000,
-                        dtype=np.int16,
-                        callback=audio_output_callback,
-                        blocksize=2048
-                    )
-                    input_stream.start()
-                    output_stream.start()
-                    print("🎙  Audio streams started\n")
-                    send_task = asyncio.create_task(send_audio(session, interview_stop_event))
-                    receive_task = asyncio.create_task(receive_audio(session, interview_stop_event))
-                    # Wait until stop_event is set
-                    while not interview_stop_event.is_set():
-                        await asyncio.sleep(0.05)
-                    # Stop streams
-                    if input_stream:
-                        input_stream.stop()
-                        input_stream.close()
-                    if output_stream:
-                        output_stream.stop()
-                        output_stream.close()
-                    # Cancel tasks and wait
-                    send_task.cancel()
-                    receive_task.cancel()
-                    await asyncio.gather(send_task, receive_task, return_exceptions=True)
-            except Exception as e:
-                print(f"\n❌ Error in interview session: {e}")
-            finally:
-                interview_stop_event.set()
-
-        # Run the async interview loop in this thread
-        asyncio.run(interview())
-        # cleanup flag
-        with interview_lock:
-            interview_thread_running = False
-            interview_stop_event = None
-
-    with interview_lock:
-        if interview_thread_running:
-            return None
-        interview_thread_running = True
-
-    thread = threading.Thread(target=interview_thread, daemon=True)
-    thread.start()
-    return "Interview session started in background."
+    streams = []
+    try:
+        # Lease a pre-connected Live session if the warm pool has one, else connect
+        # with the session config
+        connect_cold = lambda: live_client.aio.live.connect(model=model, config=session_config)
+        async with live_pool.session(connect_cold) as (session, warm):
+            if warm:
+                # Warm sessions were opened with the base config: add the JD as
+                # context without asking for a reply yet
+                await session.send_client_content(
+                    turns=types.Content(role="user", parts=[types.Part(
+                        text=f"Use the following Job Description (JD) as context:\n{interview.job_description}"
+                    )]),
+                    turn_complete=False
+                )
+            interview.mark_running(warm)
+            print(f"✅ Connected to Gemini Live API (session {interview.id}, "
+                  f"{'warm' if warm else 'cold'} start in {interview.start_seconds * 1000:.0f} ms)")
+            # WebSocket sessions get their audio from the browser via audio_bridge
+            if interview.transport == "local":
+                streams = open_local_audio(interview)
+            send_task = asyncio.create_task(
+                send_audio(session, interview.uplink, interview.stop_event, interview.vad))
+            receive_task = asyncio.create_task(
+                receive_audio(session, interview.playback, interview.stop_event))
+            # Wait until stop_event is set
+            await interview.stop_event.wait()
+            # Cancel tasks and wait
+            send_task.cancel()
+            receive_task.cancel()
+            await asyncio.gather(send_task, receive_task, return_exceptions=True)
+    except Exception as e:
+        print(f"\n❌ Error in interview session {interview.id}: {e}")
+    finally:
+        # Stop streams
+        interview.uplink.close()
+        for stream in streams:
+            stream.stop()
+            stream.close()
+
+# Pre-connected Live sessions, refilled as interviews take them (base config only)
+live_pool = LivePool(
+    lambda: live_client.aio.live.connect(model=model, config=config),
+    size=LIVE_WARM_SESSIONS,
+    max_idle=LIVE_WARM_MAX_IDLE
+)
+
+# All interview sessions run as tasks on one shared event loop thread; stopping
+# one waits for its teardown, bounded by INTERVIEW_STOP_DEADLINE
+sessions = SessionManager(
+    run_interview,
+    max_sessions=MAX_INTERVIEW_SESSIONS,
+    stop_deadline=INTERVIEW_STOP_DEADLINE,
+    warm_pool=live_pool,
+    input_rate=INPUT_RATE,
+    output_rate=OUTPUT_RATE,
+    frame_ms=AUDIO_FRAME_MS,
+    jitter_ms=AUDIO_JITTER_MS,
+    vad_mode=AUDIO_VAD,
+    client_timeout=AUDIO_CLIENT_TIMEOUT,
+    reconnect_grace=AUDIO_RECONNECT_GRACE
+)
+
+# PDF text extraction: pages of long documents are extracted in parallel worker
+# processes, and extracted text is cached by the SHA-256 of the file contents,
+# so the same resume or JD uploaded again is not re-parsed.
+pdf_extractor = PdfExtractor(
+    workers=int(os.getenv("PDF_WORKERS", "0")) or None,  # 0 = min(4, CPU count)
+    cache_chars=int(os.getenv("PDF_CACHE_CHARS", "32000000")),  # total cached text
+    range_timeout=float(os.getenv("PDF_RANGE_TIMEOUT", "30"))  # seconds per worker page range
+)
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_MB", "20")) * 1024 * 1024
 
 def extract_pdf_text(pdf_path):
-    """Extract text from a PDF file using pdfplumber (used if you feed PDFs)."""
-    text = ""
+    """Extract text from a PDF file (path, bytes or file object); "" if it cannot be read."""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        return pdf_extractor.extract_text(pdf_path)
     except Exception as e:
         logging.error(f"Error extracting PDF text: {e}")
-    return text.strip()
-
-# Endpoint: start interview session (POST { "jd": "<job description text>" })
+        return ""
+
+# Endpoint: extract text from an uploaded PDF (multipart field "file").
+# With stream=true (form field) or Accept: text/event-stream, pages are sent as
+# SSE "page" events in order while later pages are still being extracted.
+@app.route("/extract-pdf", methods=["POST"])
+def extract_pdf_route():
+    return pdf_upload_response(pdf_extractor, PDF_MAX_BYTES)
+
+# JD compaction for session instructions: cached by JD hash, trimmed to a token budget
+jd_compactor = JdCompactor(budget_tokens=int(os.getenv("JD_TOKEN_BUDGET", "1500")))
+
+# Endpoint: JD compaction before/after totals and cache counters
+@app.route("/jd-stats", methods=["GET"])
+def jd_stats_route():
+    return jsonify(jd_compactor.stats())
+
+# Endpoint: PDF extraction and cache counters
+@app.route("/pdf-stats", methods=["GET"])
+def pdf_stats_route():
+    return jsonify(pdf_extractor.stats())
+
+# Endpoint: start interview session
+# (POST { "jd": "<job description text>", "session_id": optional, "audio": "websocket" | "local" })
 @app.route("/interview", methods=["POST"])
 def interview_route():
     data = request.get_json() or {}
     job_description = data.get("jd")
     if not job_description:
         return jsonify({"error": "No JD provided."}), 400
-    result = run_interview_session(job_description)
-    if result is None:
-        return jsonify({"error": "Interview session already running. Please stop it first."}), 409
-    return jsonify({"result": result})
-
-# Endpoint: stop interview
+    session_id = data.get("session_id")
+    if session_id and sessions.get(session_id):
+        return jsonify({"error": f"Session {session_id} already running. Please stop it first."}), 409
+    # Normalized, de-duplicated and budgeted JD goes into the session instruction
+    compact, jd_cache_status = jd_compactor.compact(job_description)
+    if not compact["text"]:
+        # Whitespace only: never start an interview without a job description
+        return jsonify({"error": "No JD provided."}), 400
+    try:
+        interview = sessions.create(compact["text"], session_id=session_id,
+                                    transport=data.get("audio", AUDIO_TRANSPORT))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": f"{e}. Try again later."}), 503
+    result = {
+        "result": "Interview session started in background.",
+        "session_id": interview.id,
+        # Before/after size of the JD in the session instruction
+        "jd": {
+            "chars_before": compact["chars_before"],
+            "chars_after": compact["chars_after"],
+            "tokens_before": compact["tokens_before"],
+            "tokens_after": compact["tokens_after"],
+            "cache": jd_cache_status,
+        },
+    }
+    if interview.transport == "websocket":
+        # Browser streams mic audio here (?rate=<device rate>&codec=pcm16|mulaw) and gets replies back
+        host = request.host.split(":")[0]
+        result["audio_url"] = f"ws://{host}:{AUDIO_WS_PORT}/interview/{interview.id}/audio"
+    return jsonify(result)
+
+# Endpoint: stop interview (POST { "session_id": "<id returned by /interview>" })
 @app.route("/stop-interview", methods=["POST"])
 def stop_interview_route():
-    global interview_stop_event, interview_thread_running, audio_buffer
-    with interview_lock:
-        if interview_thread_running and interview_stop_event:
-            interview_stop_event.set()
-            # Clear queues and buffer
-            while not audio_input_queue.empty():
-                try:
-                    audio_input_queue.get_nowait()
-                except Exception:
-                    break
-            while not audio_output_queue.empty():
-                try:
-                    audio_output_queue.get_nowait()
-                except Exception:
-                    break
-            audio_buffer = np.array([], dtype=np.int16)
-            return jsonify({"result": "Interview stopped and state reset."})
-        else:
-            return jsonify({"error": "No interview session running."}), 409
+    data = request.get_json() or {}
+    session_id = data.get("session_id")
+    if not session_id:
+        return jsonify({"error": "No session_id provided."}), 400
+    stats = sessions.stop(session_id)
+    if stats is None:
+        return jsonify({"error": f"No interview session {session_id} running."}), 404
+    return jsonify({"result": "Interview stopped and state reset.", "session": stats})
+
+# Endpoint: list running interview sessions
+@app.route("/interviews", methods=["GET"])
+def list_interviews_route():
+    return jsonify(sessions.snapshot())
+
+# Cache for generated question sets, keyed on the normalized request parameters.
+# Concurrent identical requests wait for a single upstream call (single-flight).
+question_cache = question_cache_from_env()
 
 # Endpoint: generate structured interviewer questions using Gemini text generation
 @app.route("/generate-questions", methods=["POST"])
@@ -335,58 +428,34 @@ def generate_questions():
     experience = data.get("experience_level")
     qtype = data.get("question_type")
     difficulty = data.get("difficulty")
-    num_q = data.get("num_questions", 15)
 
     if not (company and role and domain and experience and qtype and difficulty):
         return jsonify({"error": "Missing required fields"}), 400
 
-    prompt = f"""
-You are an expert interviewer. Generate {num_q} unique interview questions.
-Company: {company}
-Role: {role}
-Domain: {domain}
-Experience Level: {experience}
-Question Type: {qtype}
-Difficulty: {difficulty}
-
-For each question, return a JSON object with:
-- id: a unique number
-- question: the actual question text
-- answer: a clear and concise correct answer
-- explanation: a short explanation or reasoning behind the answer
+    # Same normalized form question_batch and chatbot.py use (10 and "10" are one entry)
+    try:
+        params = normalize_spec(data, default_count=15)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-Return ONLY a valid JSON array.
-"""
+    # Keyed on the prompt style too: chatbot.py's brief sets must not be served here
+    key = question_key(params, "detailed")
 
-    # Use the REST text generation endpoint for Gemini (fallback)
-    model_name = "gemini-2.5-flash"
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    # Streaming: {"stream": true} or Accept: text/event-stream gets one SSE event per question
+    if wants_stream(data):
+        return sse_response(question_events(
+            question_cache, key,
+            lambda: iter_json_array(upstream.stream_text(QUESTION_MODEL,
+                                                         detailed_question_prompt(params)))))
 
     try:
-        resp = requests.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={API_KEY}",
-            json=payload,
-            timeout=60
-        )
-        resp.raise_for_status()
-        resp_json = resp.json()
-        candidates = resp_json.get("candidates", [])
-        if not candidates:
-            return jsonify({"error": "No candidates returned from Gemini", "raw": resp_json}), 500
-        text = candidates[0]["content"]["parts"][0]["text"].strip()
-
-        # Clean fences / control characters
-        import re
-        if text.startswith(""):
-            text = re.sub(r"^[a-zA-Z]*", "", text).replace("```", "").strip()
-        text = re.sub(r"[\x00-\x1F]+", "", text)
-
-        questions_list = json.loads(text)
-    except Exception as e:
-        # Return helpful debug info
-        return jsonify({"error": f"Failed to parse Gemini response: {e}", "raw": (resp.text if 'resp' in locals() else None)}), 500
+        questions_list, cache_status = question_cache.get_or_compute(
+            key, lambda: fetch_questions(**params))
+    except QuestionGenerationError as e:
+        # Return helpful debug info; an upstream deadline is a gateway timeout
+        return jsonify({"error": str(e), "raw": e.raw}), 504 if e.status == 504 else 500
 
-    return jsonify({
+    response = jsonify({
         "company": company,
         "role": role,
         "domain": domain,
@@ -395,7 +464,80 @@ Return ONLY a valid JSON array.
         "difficulty": difficulty,
         "questions": questions_list
     })
+    response.headers["X-Cache"] = cache_status.upper()
+    return response
+
+# Endpoint: pooled upstream client counters (requests, retries, in flight, queued)
+@app.route("/upstream-stats", methods=["GET"])
+def upstream_stats_route():
+    return jsonify(upstream.stats())
+
+# Endpoint: question cache hit/miss counters
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats_route():
+    return jsonify(question_cache.stats())
+
+class QuestionGenerationError(Exception):
+    """
+    Upstream call or parsing failed; `raw` keeps the response body for debugging
+    and `status` the upstream HTTP status (504 when the deadline ran out).
+    """
+    def __init__(self, message, raw=None, status=None):
+        super().__init__(message)
+        self.raw = raw
+        self.status = status
+
+def fetch_questions(**params):
+    """Ask Gemini for a fresh question list (called only on a cache miss)."""
+    text = None
+    try:
+        text = upstream.generate_text(QUESTION_MODEL, detailed_question_prompt(params))
+        # Skips code fences and tolerates raw control characters inside strings
+        return parse_json_array(text)
+    except UpstreamError as e:
+        raise QuestionGenerationError(f"Gemini request failed: {e}", raw=e.raw, status=e.status)
+    except Exception as e:
+        raise QuestionGenerationError(f"Failed to parse Gemini response: {e}", raw=text)
+
+# Batch generation: upper bound on specs in flight per batch, and on unique specs per call
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_SPECS = int(os.getenv("BATCH_MAX_SPECS", "200"))
+
+# Endpoint: generate many question sets in one call. Body: {"specs": [...], "concurrency": n}
+# where each spec is a /generate-questions body (list-valued fields expand to every
+# combination). Identical specs are generated once; results stream back as SSE.
+@app.route("/generate-questions/batch", methods=["POST"])
+def generate_questions_batch():
+    data = request.get_json() or {}
+    specs = data.get("specs")
+    if not isinstance(specs, list) or not specs:
+        return jsonify({"error": "specs must be a non-empty list"}), 400
+
+    try:
+        concurrency = min(int(data.get("concurrency", BATCH_CONCURRENCY)), BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be an integer"}), 400
+
+    batch = QuestionBatch(
+        upstream,
+        detailed_question_prompt,
+        style="detailed",
+        model=QUESTION_MODEL,
+        cache=question_cache,
+        concurrency=max(concurrency, 1),
+        default_count=15,
+    )
+    try:
+        jobs, invalid = batch.plan(specs, limit=BATCH_MAX_SPECS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return sse_response(batch_events(batch, jobs, invalid))
 
 # If run directly, start Flask dev server
-if _name_ == "_main_":
-    app.run(debug=True, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
\ No newline at end of file
+if __name__ == "__main__":
+    app.debug = os.getenv("FLASK_DEBUG", "1").lower() not in ("0", "false", "no")
+    # With the debug reloader, only the serving child process opens the audio socket
+    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        serve_audio_sockets(sessions, port=AUDIO_WS_PORT)
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
\ No newline at end of file
@@ -1,12 +1,9 @@
 import asyncio
 import logging
-import sounddevice as sd
 import numpy as np
 from google import genai
 from google.genai import types
 import os
-from queue import Queue
-import threading
 from dotenv import load_dotenv
 import requests
 from flask import Flask, request, jsonify
@@ -14,10 +11,20 @@ from flask_cors import CORS
 import time
 import math
 import tempfile
-import pdfplumber
-import json
 from datetime import datetime
 
+from audio_bridge import serve_audio_sockets
+from interview_sessions import SessionManager
+from jd_compact import JdCompactor
+from live_pool import LivePool
+from pdf_extract import PdfExtractor
+from question_batch import QuestionBatch, normalize_spec
+from question_gen import (QUESTION_MODEL, question_cache_from_env, question_key, question_prompt,
+                          upstream_from_env)
+from streaming import (batch_events, iter_json_array, parse_json_array, pdf_upload_response,
+                       question_events, sse_event, sse_response, wants_stream)
+from upstream import UpstreamError
+
 # ---------------------------------------------
 # FLASK APP
 # ---------------------------------------------
@@ -28,12 +35,24 @@ CORS(app)
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 load_dotenv(dotenv_path=env_path)
 
+# FAKE_LIVE=1 swaps Gemini Live for a local echo stand-in (see fake_live.py)
+FAKE_LIVE = os.getenv("FAKE_LIVE") == "1"
+
 API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
+if not API_KEY and not FAKE_LIVE:
     raise ValueError("❌ GEMINI_API_KEY missing in .env")
 
 # Gemini Client
-client = genai.Client(api_key=API_KEY)
+client = genai.Client(api_key=API_KEY) if API_KEY else None
+
+# Pooled keep-alive client for text generation, shared by all Flask threads
+upstream = upstream_from_env(API_KEY)
+
+if FAKE_LIVE:
+    from fake_live import FakeLiveClient
+    live_client = FakeLiveClient(connect_delay=float(os.getenv("FAKE_LIVE_CONNECT_MS", "0")) / 1000)
+else:
+    live_client = client
 
 # Default Gemini Live config
 model = "gemini-live-2.5-flash-preview"
@@ -54,150 +73,197 @@ BASE_SYSTEM_INSTRUCTION = config["system_instruction"]
 # ---------------------------------------------
 # AUDIO BUFFERS & STREAMING
 # ---------------------------------------------
-audio_buffer = np.array([], dtype=np.int16)
-buffer_lock = threading.Lock()
-
-audio_input_queue = Queue(maxsize=100)
-audio_output_queue = Queue(maxsize=200)
-
-def audio_output_callback(outdata, frames, time_info, status):
-    global audio_buffer
-    if status:
-        print(f"Output status: {status}")
-
-    with buffer_lock:
-        while not audio_output_queue.empty() and len(audio_buffer) < frames * 4:
-            try:
-                chunk = audio_output_queue.get_nowait()
-                audio_buffer = np.append(audio_buffer, chunk)
-            except:
-                break
-
-        if len(audio_buffer) >= frames:
-            outdata[:, 0] = audio_buffer[:frames]
-            audio_buffer = audio_buffer[frames:]
-        else:
-            if len(audio_buffer) > 0:
-                size = len(audio_buffer)
-                outdata[:size, 0] = audio_buffer
-                outdata[size:, 0] = 0
-                audio_buffer = np.array([], dtype=np.int16)
-            else:
-                outdata.fill(0)
-
-
-def audio_input_callback(indata, frames, time_info, status):
-    if status:
-        print(f"Input status: {status}")
-    try:
-        audio_input_queue.put(indata.copy(), block=False)
-    except:
-        pass
+INPUT_RATE = 16000
+OUTPUT_RATE = 24000
+
+# Coalesce mic blocks into fixed frames of this many ms before sending (0 = as captured)
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "0"))
+
+# Playback jitter buffer per session: starts playing once AUDIO_JITTER_MS are queued
+AUDIO_JITTER_MS = int(os.getenv("AUDIO_JITTER_MS", "120"))
+
+# Concurrent interviews hosted by this process
+MAX_INTERVIEW_SESSIONS = int(os.getenv("MAX_INTERVIEW_SESSIONS", "50"))
+
+# Mic silence suppression: "energy", "webrtc" (needs webrtcvad) or "off"
+AUDIO_VAD = os.getenv("AUDIO_VAD", "energy")
+
+# "websocket": audio streams to/from the browser; "local": this machine's sound card
+AUDIO_TRANSPORT = os.getenv("AUDIO_TRANSPORT", "websocket")
+AUDIO_WS_PORT = int(os.getenv("AUDIO_WS_PORT", "5001"))
+
+# Browser sessions with no audio client are stopped: if none connects in time,
+# or if one disconnects and does not come back within the grace period
+AUDIO_CLIENT_TIMEOUT = float(os.getenv("AUDIO_CLIENT_TIMEOUT", "60"))
+AUDIO_RECONNECT_GRACE = float(os.getenv("AUDIO_RECONNECT_GRACE", "15"))
+
+# Live sessions kept connected ahead of time (0 = connect when an interview starts).
+# Opt-in: each warm session is an open, billed Live connection even on an idle node
+LIVE_WARM_SESSIONS = int(os.getenv("LIVE_WARM_SESSIONS", "0"))
+LIVE_WARM_MAX_IDLE = float(os.getenv("LIVE_WARM_MAX_IDLE", "240"))
+
+# Seconds a stopping interview gets to close its streams and Live connection
+INTERVIEW_STOP_DEADLINE = float(os.getenv("INTERVIEW_STOP_DEADLINE", "5"))
+
+def make_output_callback(playback):
+    def audio_output_callback(outdata, frames, time_info, status):
+        if status:
+            print(f"Output status: {status}")
+
+        # Lock-free, allocation-free copy straight into the device buffer
+        playback.read_into(outdata[:, 0])
+    return audio_output_callback
 
 # ---------------------------------------------
 # STREAM SENDER
 # ---------------------------------------------
-async def send_audio(session, stop_event):
-    while not stop_event.is_set():
+async def send_audio(session, uplink, vad=None):
+    # Wakes up only when the mic callback delivers audio
+    async for chunk in uplink.frames():
+        ended = False
+        if vad is not None:
+            # Silent frames are dropped here and never leave the server
+            chunk, ended = vad.process(chunk)
         try:
-            if not audio_input_queue.empty():
-                chunk = audio_input_queue.get()
+            if chunk is not None:
                 await session.send_realtime_input(
                     audio=types.Blob(
                         data=chunk.tobytes(),
-                        mime_type="audio/pcm;rate=16000"
+                        mime_type=f"audio/pcm;rate={INPUT_RATE}"
                     )
                 )
-            else:
-                await asyncio.sleep(0.01)
-        except:
-            pass
+            if ended:
+                # Tell Live the mic went quiet so it can close the turn
+                await session.send_realtime_input(audio_stream_end=True)
+        except Exception as e:
+            print("❌ Send error:", e)
 
 # ---------------------------------------------
 # STREAM RECEIVER
 # ---------------------------------------------
-async def receive_audio(session, stop_event):
+async def receive_audio(session, playback, stop_event):
     while not stop_event.is_set():
         async for response in session.receive():
             if response.data:
                 arr = np.frombuffer(response.data, dtype=np.int16)
-                audio_output_queue.put(arr)
+                playback.write(arr)
 
 # ---------------------------------------------
-# START INTERVIEW THREAD
+# INTERVIEW SESSIONS
 # ---------------------------------------------
-interview_lock = threading.Lock()
-interview_thread_running = False
-interview_stop_event = None
+def open_local_audio(interview):
+    # Only local sessions need PortAudio; headless servers never import it
+    import sounddevice as sd
 
-def run_interview_session(job_description):
-    global interview_thread_running, interview_stop_event
+    input_stream = sd.InputStream(
+        channels=1, samplerate=INPUT_RATE, dtype=np.int16,
+        callback=interview.uplink.callback
+    )
+    output_stream = sd.OutputStream(
+        channels=1, samplerate=OUTPUT_RATE, dtype=np.int16,
+        callback=make_output_callback(interview.playback)
+    )
+    input_stream.start()
+    output_stream.start()
+    return [input_stream, output_stream]
 
+def session_config(job_description):
+    """Live config for a cold connect: the JD goes into the system instruction."""
     session_config = dict(config)
     session_config["system_instruction"] = (
         f"{BASE_SYSTEM_INSTRUCTION}\n\n"
         f"Job Description:\n{job_description}"
     )
+    return session_config
+
+async def run_interview(interview):
+    def connect_cold():
+        return live_client.aio.live.connect(
+            model=model, config=session_config(interview.job_description))
+
+    async with live_pool.session(connect_cold) as (session, warm):
+        if warm:
+            # Pooled sessions were opened with the base config; the JD follows as context
+            await session.send_client_content(
+                turns=types.Content(role="user", parts=[
+                    types.Part(text=f"Job Description:\n{interview.job_description}")
+                ]),
+                turn_complete=False
+            )
+        interview.mark_running(warm)
+        print(f"🎤 Connected to Gemini Live ({interview.id}, {'warm' if warm else 'cold'} "
+              f"start in {interview.start_seconds * 1000:.0f} ms)")
+
+        # WebSocket sessions are fed by the audio bridge once the browser connects
+        streams = open_local_audio(interview) if interview.transport == "local" else []
+
+        send_task = asyncio.create_task(send_audio(session, interview.uplink, interview.vad))
+        recv_task = asyncio.create_task(
+            receive_audio(session, interview.playback, interview.stop_event)
+        )
 
-    def interview_thread():
-        global interview_thread_running, interview_stop_event
-
-        interview_stop_event = asyncio.Event()
-
-        async def run():
-            try:
-                async with client.aio.live.connect(model=model, config=session_config) as session:
-                    print("🎤 Connected to Gemini Live")
-
-                    input_stream = sd.InputStream(
-                        channels=1, samplerate=16000, dtype=np.int16,
-                        callback=audio_input_callback
-                    )
-                    output_stream = sd.OutputStream(
-                        channels=1, samplerate=24000, dtype=np.int16,
-                        callback=audio_output_callback
-                    )
-
-                    input_stream.start()
-                    output_stream.start()
+        try:
+            await interview.stop_event.wait()
+        finally:
+            interview.uplink.close()
+            for stream in streams:
+                stream.stop(); stream.close()
+
+            send_task.cancel(); recv_task.cancel()
+            await asyncio.gather(send_task, recv_task, return_exceptions=True)
+
+live_pool = LivePool(
+    lambda: live_client.aio.live.connect(model=model, config=config),
+    size=LIVE_WARM_SESSIONS,
+    max_idle=LIVE_WARM_MAX_IDLE
+)
+
+# All interviews share one event loop thread
+sessions = SessionManager(
+    run_interview,
+    max_sessions=MAX_INTERVIEW_SESSIONS,
+    stop_deadline=INTERVIEW_STOP_DEADLINE,
+    warm_pool=live_pool,
+    input_rate=INPUT_RATE,
+    output_rate=OUTPUT_RATE,
+    frame_ms=AUDIO_FRAME_MS,
+    jitter_ms=AUDIO_JITTER_MS,
+    vad_mode=AUDIO_VAD,
+    client_timeout=AUDIO_CLIENT_TIMEOUT,
+    reconnect_grace=AUDIO_RECONNECT_GRACE
+)
 
-                    send_task = asyncio.create_task(send_audio(session, interview_stop_event))
-                    recv_task = asyncio.create_task(receive_audio(session, interview_stop_event))
+# ---------------------------------------------
+# PDF Extract
+# ---------------------------------------------
+# Long PDFs are split across worker processes; results are cached by file hash
+pdf_extractor = PdfExtractor(
+    workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+    cache_chars=int(os.getenv("PDF_CACHE_CHARS", "32000000")),
+    range_timeout=float(os.getenv("PDF_RANGE_TIMEOUT", "30"))
+)
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_MB", "20")) * 1024 * 1024
 
-                    while not interview_stop_event.is_set():
-                        await asyncio.sleep(0.05)
+def extract_pdf_text(path):
+    return pdf_extractor.extract_text(path)
 
-                    input_stream.stop(); input_stream.close()
-                    output_stream.stop(); output_stream.close()
 
-                    send_task.cancel(); recv_task.cancel()
-            except Exception as e:
-                print("❌ Error:", e)
+@app.route("/extract-pdf", methods=["POST"])
+def extract_pdf():
+    return pdf_upload_response(pdf_extractor, PDF_MAX_BYTES)
 
-        asyncio.run(run())
 
-        with interview_lock:
-            interview_thread_running = False
+# Session instructions get a compacted JD (see jd_compact.py), cached by JD hash
+jd_compactor = JdCompactor(budget_tokens=int(os.getenv("JD_TOKEN_BUDGET", "1500")))
 
-    with interview_lock:
-        if interview_thread_running:
-            return None
-        interview_thread_running = True
+@app.route("/jd-stats", methods=["GET"])
+def jd_stats():
+    return jsonify(jd_compactor.stats())
 
-    threading.Thread(target=interview_thread, daemon=True).start()
-    return "Interview session started!"
 
-# ---------------------------------------------
-# PDF Extract
-# ---------------------------------------------
-def extract_pdf_text(path):
-    text = ""
-    with pdfplumber.open(path) as pdf:
-        for p in pdf.pages:
-            t = p.extract_text()
-            if t:
-                text += t + "\n"
-    return text.strip()
+@app.route("/pdf-stats", methods=["GET"])
+def pdf_stats():
+    return jsonify(pdf_extractor.stats())
 
 # ---------------------------------------------
 # API ENDPOINTS
@@ -205,40 +271,60 @@ def extract_pdf_text(path):
 
 @app.route("/interview", methods=["POST"])
 def route_interview():
-    jd = (request.get_json() or {}).get("jd")
+    data = request.get_json() or {}
+    jd = data.get("jd")
     if not jd:
         return jsonify({"error": "JD missing"}), 400
 
-    result = run_interview_session(jd)
-    if not result:
+    if data.get("session_id") and sessions.get(data["session_id"]):
         return jsonify({"error": "Interview already running"}), 409
 
-    return jsonify({"result": result})
+    compact, jd_cache = jd_compactor.compact(jd)
+    if not compact["text"]:
+        return jsonify({"error": "JD missing"}), 400
+    try:
+        interview = sessions.create(compact["text"], session_id=data.get("session_id"),
+                                    transport=data.get("audio", AUDIO_TRANSPORT))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+
+    result = {"result": "Interview session started!", "session_id": interview.id,
+              "jd": {"tokens_before": compact["tokens_before"],
+                     "tokens_after": compact["tokens_after"], "cache": jd_cache}}
+    if interview.transport == "websocket":
+        host = request.host.split(":")[0]
+        result["audio_url"] = f"ws://{host}:{AUDIO_WS_PORT}/interview/{interview.id}/audio"
+    return jsonify(result)
 
 
 @app.route("/stop-interview", methods=["POST"])
 def route_stop():
-    global interview_stop_event, interview_thread_running, audio_buffer
+    session_id = (request.get_json() or {}).get("session_id")
+    if not session_id:
+        return jsonify({"error": "session_id missing"}), 400
 
-    with interview_lock:
-        if interview_thread_running and interview_stop_event:
-            interview_stop_event.set()
-            audio_buffer = np.array([], dtype=np.int16)
+    stats = sessions.stop(session_id)
+    if stats is None:
+        return jsonify({"error": "No such interview"}), 404
 
-            while not audio_input_queue.empty():
-                audio_input_queue.get_nowait()
+    return jsonify({"result": "Interview stopped.", "session": stats})
 
-            while not audio_output_queue.empty():
-                audio_output_queue.get_nowait()
 
-            return jsonify({"result": "Interview stopped."})
-
-        return jsonify({"error": "No interview running"}), 409
+@app.route("/interviews", methods=["GET"])
+def route_interviews():
+    return jsonify(sessions.snapshot())
 
 
 # ---------------------------------------------
 # TEXT CHAT (Your new endpoint)
 # ---------------------------------------------
+def error_status(e):
+    # An upstream call that ran out of time is a gateway timeout, anything else ours
+    return 504 if isinstance(e, UpstreamError) and e.status == 504 else 500
+
+
 @app.route("/text-chat", methods=["POST"])
 def text_chat():
     data = request.get_json() or {}
@@ -247,55 +333,111 @@ def text_chat():
     if not prompt:
         return jsonify({"error": "Prompt missing"}), 400
 
+    if wants_stream(data):
+        return sse_response(stream_chat(prompt))
+
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-        return jsonify({"response": response.text})
+        text = upstream.generate_text("gemini-2.5-flash", prompt)
+        return jsonify({"response": text})
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": str(e)}), error_status(e)
+
+
+def stream_chat(prompt):
+    # Forward model text as it is generated: one "data" event per delta, then "done"
+    try:
+        for text in upstream.stream_text("gemini-2.5-flash", prompt):
+            yield sse_event({"text": text})
+    except Exception as e:
+        yield sse_event({"error": str(e)}, event="error")
+        return
+    yield sse_event({}, event="done")
+
+
+@app.route("/upstream-stats", methods=["GET"])
+def upstream_stats():
+    return jsonify(upstream.stats())
 
 
 # ---------------------------------------------
 # GENERATE QUESTIONS
 # ---------------------------------------------
+# Identical requests (after normalizing case/whitespace) are served from cache,
+# and concurrent identical requests share one upstream call
+question_cache = question_cache_from_env()
+
 @app.route("/generate-questions", methods=["POST"])
 def generate_questions():
     data = request.get_json() or {}
 
-    required = ["company_name", "role", "domain", "experience_level", "question_type", "difficulty"]
-    for k in required:
-        if not data.get(k):
-            return jsonify({"error": f"Missing field: {k}"}), 400
-
-    prompt = f"""
-Generate interview questions for:
-Company: {data['company_name']}
-Role: {data['role']}
-Domain: {data['domain']}
-Experience: {data['experience_level']}
-Type: {data['question_type']}
-Difficulty: {data['difficulty']}
-Count: {data.get('num_questions', 10)}
+    try:
+        params = normalize_spec(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-Return ONLY JSON array with fields: id, question, answer, explanation.
-"""
+    key = question_key(params, "brief")
+    if wants_stream(data):
+        return sse_response(question_events(
+            question_cache, key,
+            lambda: iter_json_array(upstream.stream_text(QUESTION_MODEL, question_prompt(params)))))
 
     try:
-        resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
+        questions, status = question_cache.get_or_compute(
+            key, lambda: fetch_questions(params)
         )
-        json_data = json.loads(resp.text)
-        return jsonify(json_data)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": str(e)}), error_status(e)
+
+    resp = jsonify(questions)
+    resp.headers["X-Cache"] = status.upper()
+    return resp
+
+
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    return jsonify(question_cache.stats())
+
+
+def fetch_questions(data):
+    return parse_json_array(upstream.generate_text(QUESTION_MODEL, question_prompt(data)))
+
+
+# ---------------------------------------------
+# BATCH QUESTION GENERATION
+# ---------------------------------------------
+# Many specs per call, fanned out over the upstream client (see question_batch.py)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_SPECS = int(os.getenv("BATCH_MAX_SPECS", "200"))
+
+@app.route("/generate-questions/batch", methods=["POST"])
+def generate_questions_batch():
+    data = request.get_json() or {}
+    specs = data.get("specs")
+    if not isinstance(specs, list) or not specs:
+        return jsonify({"error": "specs must be a non-empty list"}), 400
+
+    try:
+        concurrency = min(int(data.get("concurrency", BATCH_CONCURRENCY)), BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be an integer"}), 400
+
+    batch = QuestionBatch(upstream, question_prompt, style="brief", cache=question_cache,
+                          concurrency=max(concurrency, 1))
+    try:
+        jobs, invalid = batch.plan(specs, limit=BATCH_MAX_SPECS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return sse_response(batch_events(batch, jobs, invalid))
 
 
 # ---------------------------------------------
 # RUN FLASK
 # ---------------------------------------------
 if __name__ == "__main__":
-    app.run(debug=True, port=5000)
+    app.debug = os.getenv("FLASK_DEBUG", "1").lower() not in ("0", "false", "no")
+    # With the debug reloader, only the child process that serves requests opens the socket
+    if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        serve_audio_sockets(sessions, port=AUDIO_WS_PORT)
+    app.run(port=5000)
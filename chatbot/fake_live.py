@@ -0,0 +1,125 @@
+"""
+Local stand-in for the Gemini Live API, for exercising the audio path
+without an API key or network access.
+
+    FAKE_LIVE=1 python chatbot.py
+
+It mimics the small part of `client.aio.live.connect(...)` the interview
+code uses: `send_realtime_input(audio=Blob)`, `send_client_content` and
+`receive()`. `connect_delay` simulates the connection handshake. Each time
+the caller has sent TURN_SECONDS of audio, or ends the audio stream, the
+session "answers" by echoing that audio back, resampled to the 24 kHz
+output rate, in Live-sized chunks followed by a turn_complete event.
+"""
+import asyncio
+import re
+from types import SimpleNamespace
+
+import numpy as np
+
+TURN_SECONDS = 2.0
+OUTPUT_RATE = 24000
+CHUNK_SAMPLES = 2400
+
+
+def _resample(samples, src_rate, dst_rate):
+    if src_rate == dst_rate or not len(samples):
+        return samples
+    n = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.linspace(0, len(samples) - 1, n)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+
+class FakeLiveSession:
+    def __init__(self, config=None, turn_seconds=TURN_SECONDS, chunk_delay=0.0):
+        self.config = config
+        self.turn_seconds = turn_seconds
+        self.chunk_delay = chunk_delay
+        self.received_samples = 0
+        self.turns = 0
+        self._pending = []
+        self._pending_samples = 0
+        self._pending_rate = 16000
+        self._responses = asyncio.Queue()
+        self.context = []
+        self.closed = False
+
+    async def send_realtime_input(self, audio=None, audio_stream_end=False, **kwargs):
+        if self.closed:
+            raise RuntimeError("Fake Live session is closed")
+        if audio_stream_end and self._pending:
+            # Mic went quiet: answer what was said so far
+            await self._answer(np.concatenate(self._pending), self._pending_rate)
+            self._pending, self._pending_samples = [], 0
+        if audio is None:
+            return
+        match = re.search(r"rate=(\d+)", audio.mime_type or "")
+        rate = int(match.group(1)) if match else 16000
+        self._pending_rate = rate
+        samples = np.frombuffer(audio.data, dtype=np.int16)
+        self.received_samples += len(samples)
+        self._pending.append(samples)
+        self._pending_samples += len(samples)
+        if self._pending_samples >= self.turn_seconds * rate:
+            await self._answer(np.concatenate(self._pending), rate)
+            self._pending, self._pending_samples = [], 0
+
+    async def _answer(self, samples, rate):
+        reply = _resample(samples, rate, OUTPUT_RATE)
+        for start in range(0, len(reply), CHUNK_SAMPLES):
+            await self._responses.put(SimpleNamespace(
+                data=reply[start:start + CHUNK_SAMPLES].tobytes(), server_content=None))
+        self.turns += 1
+        await self._responses.put(SimpleNamespace(
+            data=None,
+            server_content=SimpleNamespace(turn_complete=True, input_transcription=None)))
+
+    async def send_client_content(self, turns=None, turn_complete=True, **kwargs):
+        if self.closed:
+            raise RuntimeError("Fake Live session is closed")
+        self.context.append(turns)
+
+    async def receive(self):
+        """Yield responses up to and including the next turn_complete, like a Live turn."""
+        if self.closed:
+            # Like a closed Live websocket: fail instead of returning an empty turn
+            raise RuntimeError("Fake Live session is closed")
+        while not self.closed:
+            response = await self._responses.get()
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield response
+            if response.server_content is not None:
+                return
+
+
+class _FakeConnect:
+    def __init__(self, owner, config):
+        self.owner = owner
+        self.config = config
+        self.session = None
+
+    async def __aenter__(self):
+        if self.owner.connect_delay:
+            # Stands in for the websocket + setup handshake of a real connect
+            await asyncio.sleep(self.owner.connect_delay)
+        self.session = FakeLiveSession(self.config, **self.owner.session_kwargs)
+        self.owner.sessions.append(self.session)
+        return self.session
+
+    async def __aexit__(self, *exc):
+        self.session.closed = True
+        return False
+
+
+class FakeLiveClient:
+    """Drop-in for `genai.Client` where only `.aio.live.connect` is used."""
+
+    def __init__(self, connect_delay=0.0, **session_kwargs):
+        self.connect_delay = connect_delay
+        self.session_kwargs = session_kwargs
+        self.sessions = []
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+
+    def connect(self, model=None, config=None):
+        return _FakeConnect(self, config)
@@ -0,0 +1,313 @@
+import asyncio
+import collections
+import threading
+import time
+import uuid
+
+from audio_bridge import AudioDownlink
+from audio_ring import AudioRingBuffer
+from audio_uplink import AudioUplink
+from audio_vad import VAD_MODES, VoiceActivityGate
+
+
+TRANSPORTS = ("websocket", "local")
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class InterviewSession:
+    """
+    State owned by one candidate's interview: its own mic uplink, playback
+    buffer and stop event. Nothing here is shared between sessions.
+
+    With the "websocket" transport, audio comes from and goes to a remote
+    client and `playback` is a bounded AudioDownlink queue; with "local" it
+    is the jitter buffer drained by a sound card on this machine. Unless
+    `vad_mode` is "off", `vad` gates silent mic audio before it is sent.
+
+    `start_seconds` runs from creation until the app calls `mark_running`
+    (Live connected, audio tasks up) and is passed to `on_running` right
+    away; `stop_seconds` runs from `request_stop` until teardown has finished.
+
+    A "websocket" session is stopped if no audio client connects within
+    `client_timeout` seconds, or if its client disconnects and none comes
+    back within `reconnect_grace` seconds.
+    """
+
+    def __init__(self, session_id, job_description, loop, transport="websocket",
+                 input_rate=16000, output_rate=24000, frame_ms=0, jitter_ms=120,
+                 playback_seconds=10, vad_mode="energy", client_timeout=60.0,
+                 reconnect_grace=15.0, on_running=None):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown audio transport {transport!r}")
+        if vad_mode not in VAD_MODES:
+            raise ValueError(f"Unknown VAD mode {vad_mode!r}")
+        self.id = session_id
+        self.job_description = job_description
+        self.transport = transport
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.uplink = AudioUplink(loop, sample_rate=input_rate, frame_ms=frame_ms)
+        if transport == "local":
+            self.playback = AudioRingBuffer(
+                capacity=output_rate * playback_seconds,
+                target_depth=output_rate * jitter_ms // 1000
+            )
+        else:
+            self.playback = AudioDownlink()
+        self.vad = VoiceActivityGate(input_rate, mode=vad_mode) if vad_mode != "off" else None
+        self.client_connected = False
+        self.client_timeout = client_timeout
+        self.reconnect_grace = reconnect_grace
+        self.on_running = on_running
+        self.stop_event = asyncio.Event()
+        self.state = "starting"
+        self.error = None
+        self.stop_reason = None
+        self.created_at = time.time()
+        self.future = None
+        self.warm = None
+        self.start_seconds = None
+        self.stop_seconds = None
+        self.teardown_timed_out = False
+        self._created = time.perf_counter()
+        self._stop_requested = None
+        self._client_deadline = None
+
+    @property
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    def mark_running(self, warm=False):
+        """Called by the app once the session is live; records start latency."""
+        self.state = "running"
+        self.warm = warm
+        self.start_seconds = time.perf_counter() - self._created
+        if self.on_running is not None:
+            self.on_running(self.start_seconds)
+
+    def request_stop(self, reason="requested"):
+        """Set the stop event (on the session loop) and start the stop clock."""
+        if self._stop_requested is None:
+            self._stop_requested = time.perf_counter()
+            self.stop_reason = reason
+        self.stop_event.set()
+
+    # ------------------------------
+    # Audio client tracking (session loop only)
+    # ------------------------------
+    def watch_client(self):
+        """Start the deadline for the first audio client to connect."""
+        self._arm_client_deadline(self.client_timeout, "no audio client connected")
+
+    def attach_client(self):
+        self.client_connected = True
+        self._cancel_client_deadline()
+
+    def detach_client(self):
+        """Client went away: stop unless another one connects within the grace period."""
+        self.client_connected = False
+        self._arm_client_deadline(self.reconnect_grace, "audio client did not reconnect")
+
+    def _arm_client_deadline(self, seconds, reason):
+        self._cancel_client_deadline()
+        if self.transport != "websocket" or seconds is None or self.stopping:
+            return
+
+        def expire():
+            self._client_deadline = None
+            if not self.client_connected and not self.stopping:
+                print(f"⏱ Session {self.id}: {reason} within {seconds:g}s, stopping")
+                self.state = "stopping"
+                self.request_stop(reason)
+
+        self._client_deadline = asyncio.get_running_loop().call_later(seconds, expire)
+
+    def _cancel_client_deadline(self):
+        if self._client_deadline is not None:
+            self._client_deadline.cancel()
+            self._client_deadline = None
+
+    def stats(self):
+        return {
+            "session_id": self.id,
+            "state": self.state,
+            "transport": self.transport,
+            "client_connected": self.client_connected,
+            "error": self.error,
+            "stop_reason": self.stop_reason,
+            "uptime_seconds": round(time.time() - self.created_at, 1),
+            "warm_start": self.warm,
+            "start_ms": round(self.start_seconds * 1000, 1) if self.start_seconds is not None else None,
+            "stop_ms": round(self.stop_seconds * 1000, 1) if self.stop_seconds is not None else None,
+            "uplink_dropped": self.uplink.dropped,
+            "playback": self.playback.stats(),
+            "vad": self.vad.stats() if self.vad else None,
+        }
+
+
+class SessionManager:
+    """
+    Runs any number of interview sessions as tasks on one shared event loop.
+
+    `run_session` is the app's `async def run_session(session)` that connects
+    to Gemini Live, calls `session.mark_running()` and streams audio until
+    `session.stop_event` is set. The loop lives on a single daemon thread, so
+    Flask request threads only ever schedule work onto it.
+
+    Teardown is bounded: once a stop is requested, `run_session` gets
+    `stop_deadline` seconds to close its streams and Live connection before
+    it is cancelled. A `warm_pool` (LivePool) is started with the loop.
+    """
+
+    def __init__(self, run_session, max_sessions=50, stop_deadline=5.0, warm_pool=None,
+                 **session_kwargs):
+        self.run_session = run_session
+        self.max_sessions = max_sessions
+        self.stop_deadline = stop_deadline
+        self.warm_pool = warm_pool
+        self.session_kwargs = session_kwargs
+        self.sessions = {}
+        self.loop = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.start_latencies = collections.deque(maxlen=500)
+        self.stop_latencies = collections.deque(maxlen=500)
+        self.teardown_timeouts = 0
+
+    def start(self):
+        """Start the shared event loop thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever,
+                                            name="interview-loop", daemon=True)
+            self._thread.start()
+        if self.warm_pool is not None:
+            self.warm_pool.start(self.loop)
+        return self
+
+    def create(self, job_description, session_id=None, transport="websocket"):
+        """
+        Register and launch a session; returns it. Raises ValueError if the
+        ID is already in use or the transport is unknown, and RuntimeError if
+        the node is at capacity.
+        """
+        self.start()
+        session_id = session_id or uuid.uuid4().hex
+        with self._lock:
+            if session_id in self.sessions:
+                raise ValueError(f"Session {session_id} already exists")
+            if len(self.sessions) >= self.max_sessions:
+                raise RuntimeError(f"Session limit reached ({self.max_sessions})")
+            session = InterviewSession(session_id, job_description, self.loop,
+                                       transport=transport,
+                                       on_running=self.start_latencies.append,
+                                       **self.session_kwargs)
+            self.sessions[session_id] = session
+        session.future = asyncio.run_coroutine_threadsafe(self._run(session), self.loop)
+        return session
+
+    async def _run(self, session):
+        session.watch_client()
+        runner = asyncio.create_task(self.run_session(session))
+        stopped = asyncio.create_task(session.stop_event.wait())
+        try:
+            await asyncio.wait({runner, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if not runner.done():
+                # Stop requested: wait for a clean teardown, then force it
+                done, _ = await asyncio.wait({runner}, timeout=self.stop_deadline)
+                if not done:
+                    session.teardown_timed_out = True
+                    self.teardown_timeouts += 1
+                    print(f"⚠ Session {session.id} did not stop within {self.stop_deadline}s, cancelling")
+                    runner.cancel()
+                    await asyncio.wait({runner})
+            if not runner.cancelled() and runner.exception() is not None:
+                raise runner.exception()
+        except Exception as e:
+            session.error = str(e)
+            print(f"❌ Session {session.id} failed: {e}")
+        finally:
+            runner.cancel()
+            stopped.cancel()
+            session._cancel_client_deadline()
+            session.state = "stopped"
+            if session._stop_requested is not None:
+                session.stop_seconds = time.perf_counter() - session._stop_requested
+                self.stop_latencies.append(session.stop_seconds)
+            session.stop_event.set()
+            session.uplink.close()
+            # Streams and sockets are closed by now, so nothing reads the buffer concurrently
+            session.playback.reset()
+            with self._lock:
+                self.sessions.pop(session.id, None)
+
+    def get(self, session_id):
+        with self._lock:
+            return self.sessions.get(session_id)
+
+    def stop(self, session_id, wait=True):
+        """
+        Ask a session to finish; returns its stats or None if unknown. With
+        `wait`, blocks until teardown is done (at most about `stop_deadline`)
+        and returns the final stats.
+        """
+        session = self.get(session_id)
+        if session is None:
+            return None
+        session.state = "stopping"
+        stats = session.stats()
+        self.loop.call_soon_threadsafe(session.request_stop)
+        if not wait:
+            return stats
+        try:
+            session.future.result(timeout=self.stop_deadline + 1.0)
+        except Exception:
+            pass
+        return session.stats()
+
+    def stop_all(self):
+        """Stop every session in parallel and wait for all teardowns."""
+        with self._lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            session.state = "stopping"
+            self.loop.call_soon_threadsafe(session.request_stop)
+        for session in sessions:
+            try:
+                session.future.result(timeout=self.stop_deadline + 1.0)
+            except Exception:
+                pass
+        return [session.stats() for session in sessions]
+
+    def latency(self):
+        """Start/stop latency percentiles over recent sessions, in ms."""
+        def ms(values, q):
+            value = _percentile(list(values), q)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "start_p50_ms": ms(self.start_latencies, 50),
+            "start_p95_ms": ms(self.start_latencies, 95),
+            "stop_p50_ms": ms(self.stop_latencies, 50),
+            "stop_p95_ms": ms(self.stop_latencies, 95),
+            "teardown_timeouts": self.teardown_timeouts,
+        }
+
+    def snapshot(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return {
+            "active": len(sessions),
+            "max_sessions": self.max_sessions,
+            "latency": self.latency(),
+            "warm_pool": self.warm_pool.stats() if self.warm_pool is not None else None,
+            "sessions": [s.stats() for s in sessions],
+        }
@@ -0,0 +1,252 @@
+"""
+Job description compaction for Live sessions.
+
+The JD is sent with every interview's Live session setup and stays in its
+context, so its size is paid in setup latency and again on every turn.
+`compact_jd` normalizes the text (PDF hyphenation and hard wraps, bullets,
+whitespace), drops repeated lines such as page headers and footers,
+removes boilerplate paragraphs (equal opportunity statements, application
+instructions, privacy notices) and then fits what is left into a token
+budget, dropping the least relevant sections first.
+
+    python jd_compact.py posting.pdf --budget 1500
+"""
+import argparse
+import hashlib
+import re
+import threading
+import unicodedata
+
+from response_cache import ResponseCache
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_BULLET = re.compile(r"^\s*(?:[-*•‣▪●◦⁃∙·]|\d+[.)])\s+")
+_PAGE_LINE = re.compile(r"^\s*(?:page\s*)?\d+\s*(?:(?:of|/)\s*\d+)?\s*$", re.I)
+
+# Notice sentences that carry no signal for the interviewer. Only whole
+# non-bullet paragraphs outside the sections in KEEP_SECTIONS are tested, so
+# a requirement such as "- Build session handling with HTTP cookies" stays.
+BOILERPLATE = [re.compile(p, re.I) for p in (
+    r"\b(?:is|are) an? equal (?:employment )?opportunity(?: and affirmative action)? employer",
+    r"without regard to (?:race|colou?r|age|sex|gender|religion|national origin)",
+    r"\b(?:request|need|require) (?:an? )?reasonable accommodation",
+    r"\breasonable accommodations? (?:will be|are|is) (?:made|provided|available)",
+    r"\bparticipates? in e-?verify\b",
+    r"\b(?:read|see|review|consult) our (?:applicant |candidate |recruitment )?privacy "
+    r"(?:notice|policy|statement)",
+    r"\b(?:this (?:site|website)|we) uses? cookies\b",
+    r"\b(?:do(?:es)?|will) not accept (?:unsolicited )?(?:resumes|cvs|candidates|submissions) "
+    r"from (?:third[- ]party )?recruit(?:ment|ing) agenc",
+    r"^(?:click|apply) (?:here|now|today)\b.{0,40}$",
+    r"^how to apply\b",
+    r"\ball rights reserved\b",
+    r"^share (?:this )?(?:job|posting)\b",
+)]
+
+# Section headings, most relevant first; unmatched sections rank last
+SECTION_PRIORITY = [
+    re.compile(r"responsibilit|what you(?:'|’)?ll do|duties|the role|your role|day to day", re.I),
+    re.compile(r"requirement|qualification|skills|must have|what you(?:'|’)?ll bring|experience", re.I),
+    re.compile(r"nice to have|preferred|bonus|plus", re.I),
+    re.compile(r"about (?:the )?(?:team|job|position)|summary|overview", re.I),
+    re.compile(r"^about\b|who we are|benefits|perks|what we offer|why join|culture", re.I),
+]
+
+# Ranks of the sections never scanned for boilerplate: responsibilities,
+# requirements and nice-to-haves
+KEEP_SECTIONS = (0, 1, 2)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count for budgeting: one token per word or punctuation mark,
+    plus one per four characters beyond the first four of long words.
+    Errs on the high side of typical tokenizer counts for English prose.
+    """
+    return sum(1 + max(0, len(t) - 4) // 4 for t in _TOKEN.findall(text))
+
+
+def _truncate(text, budget_tokens):
+    """Longest prefix of `text` whose estimate fits `budget_tokens`."""
+    used, end = 0, 0
+    for token in _TOKEN.finditer(text):
+        cost = estimate_tokens(token.group())
+        if used + cost > budget_tokens:
+            left = budget_tokens - used
+            if left > 0:
+                # Part of an over-long token: up to 4 * left + 3 characters cost `left`
+                end = token.start() + 4 * left + 3
+            break
+        used += cost
+        end = token.end()
+    return text[:end]
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    # Hyphenation at PDF line breaks: "engi-\nneer" -> "engineer"
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    lines = []
+    for raw in text.split("\n"):
+        bullet = bool(_BULLET.match(raw))
+        line = " ".join(_BULLET.sub("", raw).split())
+        if not line:
+            lines.append("")
+        elif bullet:
+            lines.append("- " + line)
+        elif (lines and lines[-1] and not lines[-1].endswith((".", ":", ";", "!", "?"))
+              and line[0].islower()):
+            # Hard-wrapped continuation of the previous line
+            lines[-1] += " " + line
+        else:
+            lines.append(line)
+    return lines
+
+
+def _is_heading(line):
+    if line.startswith("- ") or len(line) > 60 or line.endswith("."):
+        return False
+    if line.endswith(":") or line.isupper():
+        return True
+    # Short title-like line naming a known section, e.g. "Nice to Have"
+    return len(line.split()) <= 5 and any(p.search(line) for p in SECTION_PRIORITY)
+
+
+def _priority(heading):
+    if heading is None:
+        return 1  # preamble: usually the title and a one-line summary
+    for rank, pattern in enumerate(SECTION_PRIORITY):
+        if pattern.search(heading):
+            return rank
+    return len(SECTION_PRIORITY)
+
+
+def compact_jd(text, budget_tokens=1500):
+    """
+    Compact a raw job description. Returns a dict with the compacted `text`
+    and a before/after report (characters, estimated tokens, lines removed
+    as duplicates, boilerplate and over budget, and truncated).
+
+    A single line larger than the whole budget (a JD pasted as one
+    paragraph) is cut to the budget left instead of dropped. If nothing at
+    all survives, the normalized JD cut to the budget is returned, so a
+    non-blank JD never compacts to an empty text.
+    """
+    report = {"chars_before": len(text), "tokens_before": estimate_tokens(text),
+              "duplicates": 0, "boilerplate": 0, "over_budget": 0, "truncated": 0}
+
+    normalized = _normalize(text)
+    seen = set()
+    kept = []  # (priority, line)
+    heading = None
+    for line in normalized:
+        if not line or _PAGE_LINE.match(line):
+            continue
+        fingerprint = re.sub(r"\W+", " ", line.lower()).strip()
+        if fingerprint in seen:
+            report["duplicates"] += 1
+            continue
+        seen.add(fingerprint)
+        if _is_heading(line):
+            heading = line
+        elif (not line.startswith("- ")
+              and (heading is None or _priority(heading) not in KEEP_SECTIONS)
+              and any(p.search(line) for p in BOILERPLATE)):
+            report["boilerplate"] += 1
+            continue
+        kept.append((_priority(heading), line))
+
+    # Fill the budget with the most relevant sections, then restore the original order
+    order = sorted(range(len(kept)), key=lambda i: (kept[i][0], i))
+    chosen, used = set(), 0
+    for i in order:
+        priority, line = kept[i]
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget_tokens:
+            remaining = budget_tokens - used - 1
+            if cost <= budget_tokens or remaining <= 0 or not _truncate(line, remaining):
+                report["over_budget"] += 1
+                continue
+            line = _truncate(line, remaining)
+            kept[i] = (priority, line)
+            cost = estimate_tokens(line) + 1
+            report["truncated"] += 1
+        chosen.add(i)
+        used += cost
+    # Headings whose section was dropped entirely
+    lines = [line for i, (_, line) in enumerate(kept) if i in chosen]
+    lines = [line for j, line in enumerate(lines)
+             if not (_is_heading(line) and (j + 1 == len(lines) or _is_heading(lines[j + 1])))]
+
+    compacted = "\n".join(lines)
+    if not compacted:
+        compacted = _truncate("\n".join(line for line in normalized if line), budget_tokens)
+    report.update(text=compacted, chars_after=len(compacted), tokens_after=estimate_tokens(compacted))
+    return report
+
+
+class JdCompactor:
+    """
+    compact_jd behind a cache keyed by the SHA-256 of the raw JD and the
+    budget, so repeated interviews for the same posting reuse the result.
+    Keeps running before/after totals for the size report.
+    """
+
+    def __init__(self, budget_tokens=1500, max_entries=256, ttl=86400):
+        self.budget_tokens = budget_tokens
+        self.cache = ResponseCache(ttl=ttl, max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.compacted = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def compact(self, text):
+        """Returns (compact_jd result, cache status)."""
+        key = hashlib.sha256(f"{self.budget_tokens}\0{text}".encode("utf-8")).hexdigest()
+        result, status = self.cache.get_or_compute(key, lambda: compact_jd(text, self.budget_tokens))
+        with self._lock:
+            self.compacted += 1
+            self.tokens_before += result["tokens_before"]
+            self.tokens_after += result["tokens_after"]
+        return result, status
+
+    def stats(self):
+        with self._lock:
+            saved = self.tokens_before - self.tokens_after
+            return {
+                "budget_tokens": self.budget_tokens,
+                "compacted": self.compacted,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved_pct": round(100 * saved / self.tokens_before, 1) if self.tokens_before else 0.0,
+                "cache": self.cache.stats(),
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Before/after size report for JD compaction.")
+    parser.add_argument("path", help="JD as a .txt or .pdf file")
+    parser.add_argument("--budget", type=int, default=1500, help="token budget for the JD")
+    parser.add_argument("--show", action="store_true", help="print the compacted text")
+    args = parser.parse_args(argv)
+
+    if args.path.lower().endswith(".pdf"):
+        from pdf_extract import PdfExtractor
+        text = PdfExtractor(workers=1).extract_text(args.path)
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+
+    result = compact_jd(text, args.budget)
+    if args.show:
+        print(result["text"])
+        print()
+    print(f"  before   {result['chars_before']:8d} chars  ~{result['tokens_before']:6d} tokens")
+    print(f"  after    {result['chars_after']:8d} chars  ~{result['tokens_after']:6d} tokens "
+          f"({100 * (1 - result['tokens_after'] / max(result['tokens_before'], 1)):.0f}% smaller)")
+    print(f"  removed  {result['duplicates']} duplicate, {result['boilerplate']} boilerplate, "
+          f"{result['over_budget']} over-budget lines ({result['truncated']} truncated)")
+
+
+if __name__ == "__main__":
+    main()
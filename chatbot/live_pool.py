@@ -0,0 +1,257 @@
+"""
+Pool of pre-connected Gemini Live sessions for near-instant interview start.
+
+A Live connection carries its own conversation, so a session is never
+handed to a second interview. Instead the pool keeps `size` fresh sessions
+connected with the base config (voice, modalities, base instruction) and
+replaces each one as soon as it is leased; with `size` 0 every interview
+connects on demand. A warm session gets the interview's job description as
+a context turn; a caller that passes its own `connect` to `session()` gets
+a cold connection with its full config (JD in the system instruction)
+whenever no warm session is ready. Idle sessions are recycled after
+`max_idle` seconds, before the server would close them.
+
+    python live_pool.py --cycles 20 --connect-ms 400
+
+compares start/stop latency with and without warm sessions against the
+local fake Live client (fake_live.py).
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import time
+
+
+class _Slot:
+    def __init__(self, leased):
+        self.leased = leased
+        self.session = None
+        self.error = None
+        self.connected_at = None
+        self.ready = asyncio.Event()
+        self.release = asyncio.Event()
+        self.task = None
+
+
+class LivePool:
+    """
+    `connect` is a zero-argument callable returning the async context manager
+    of one Live connection, e.g.
+    `lambda: client.aio.live.connect(model=model, config=config)`.
+
+    All methods run on the session loop passed to `start`.
+    """
+
+    def __init__(self, connect, size=1, max_idle=240.0, retry_delay=5.0, max_retry_delay=60.0):
+        self.connect = connect
+        self.size = size
+        self.max_idle = max_idle
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.loop = None
+        self._idle = collections.deque()
+        self._connecting = []
+        self._failures_in_row = 0
+        self._retry_handle = None
+
+        self.warm_starts = 0
+        self.cold_starts = 0
+        self.expired = 0
+        self.failures = 0
+        self.connect_latencies = collections.deque(maxlen=200)
+
+    def start(self, loop):
+        """Begin warming sessions on `loop` (thread-safe, idempotent)."""
+        if self.loop is None:
+            self.loop = loop
+            loop.call_soon_threadsafe(self._refill)
+
+    # ------------------------------
+    # Warm slots
+    # ------------------------------
+    def _spawn(self, leased=False, connect=None):
+        slot = _Slot(leased)
+        self._connecting.append(slot)
+        slot.task = self.loop.create_task(self._hold(slot, connect or self.connect))
+        return slot
+
+    def _refill(self):
+        if self._retry_handle is not None:
+            return
+        spare = len(self._idle) + sum(not s.leased for s in self._connecting)
+        for _ in range(self.size - spare):
+            self._spawn()
+
+    def _retry_later(self):
+        # Back off while connects keep failing (no network, bad key, quota)
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** (self._failures_in_row - 1))
+
+        def retry():
+            self._retry_handle = None
+            self._refill()
+
+        if self._retry_handle is None:
+            self._retry_handle = self.loop.call_later(delay, retry)
+
+    async def _hold(self, slot, connect):
+        """Open one connection and keep it open until released (or idle too long)."""
+        started = time.perf_counter()
+        try:
+            async with connect() as session:
+                slot.session = session
+                slot.connected_at = time.perf_counter()
+                self.connect_latencies.append(slot.connected_at - started)
+                self._failures_in_row = 0
+                self._connecting.remove(slot)
+                if not slot.leased:
+                    self._idle.append(slot)
+                slot.ready.set()
+                while not slot.release.is_set():
+                    timeout = None if slot.leased else self.max_idle - (time.perf_counter() - slot.connected_at)
+                    try:
+                        await asyncio.wait_for(slot.release.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        if not slot.leased:
+                            self._idle.remove(slot)
+                            self.expired += 1
+                            break
+        except Exception as e:
+            slot.error = e
+            self.failures += 1
+            self._failures_in_row += 1
+            print(f"❌ Live connect failed: {e}")
+        finally:
+            if slot in self._connecting:
+                self._connecting.remove(slot)
+            if slot in self._idle:
+                self._idle.remove(slot)
+            slot.ready.set()
+            if not slot.leased:
+                if slot.error is not None:
+                    self._retry_later()
+                else:
+                    self._refill()
+
+    async def _acquire(self, connect=None):
+        while self._idle:
+            slot = self._idle.popleft()
+            if not slot.task.done():
+                slot.leased = True
+                self.warm_starts += 1
+                self._refill()
+                return slot, True
+        if connect is not None:
+            # Nothing connected yet: the caller's own connection and config
+            slot = self._spawn(leased=True, connect=connect)
+        else:
+            # Nothing connected yet: take over a warm connect in progress, or start one
+            pending = [s for s in self._connecting if not s.leased]
+            slot = pending[0] if pending else self._spawn(leased=True)
+        slot.leased = True
+        self.cold_starts += 1
+        self._refill()
+        await slot.ready.wait()
+        if slot.session is None:
+            raise slot.error or RuntimeError("Live connection closed before use")
+        return slot, False
+
+    @contextlib.asynccontextmanager
+    async def session(self, connect=None):
+        """
+        Lease a connected Live session for one interview: yields
+        (session, warm). A warm session was opened with the base config.
+        Otherwise the session comes from `connect` when given, else from the
+        pool's own connect. The connection is closed when the block exits;
+        if the caller is cancelled meanwhile, the close is cancelled too.
+        """
+        slot, warm = await self._acquire(connect)
+        try:
+            yield slot.session, warm
+        finally:
+            slot.release.set()
+            try:
+                await asyncio.shield(slot.task)
+            except asyncio.CancelledError:
+                slot.task.cancel()
+                raise
+
+    def stats(self):
+        latencies = sorted(self.connect_latencies)
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "connecting": len(self._connecting),
+            "warm_starts": self.warm_starts,
+            "cold_starts": self.cold_starts,
+            "expired": self.expired,
+            "failures": self.failures,
+            "connect_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+        }
+
+
+# ------------------------------
+# Benchmark against the fake Live client
+# ------------------------------
+def _bench(warm_sessions, cycles, connect_ms, gap):
+    from fake_live import FakeLiveClient
+    from interview_sessions import SessionManager
+
+    client = FakeLiveClient(connect_delay=connect_ms / 1000)
+    # size 0: every interview connects on demand, as without a pool
+    pool = LivePool(lambda: client.aio.live.connect(model="fake"), size=warm_sessions)
+
+    async def run_session(interview):
+        def connect_cold():
+            config = {"system_instruction": interview.job_description}
+            return client.aio.live.connect(model="fake", config=config)
+
+        async with pool.session(connect_cold) as (session, warm):
+            if warm:
+                await session.send_client_content(turns=interview.job_description,
+                                                  turn_complete=False)
+            interview.mark_running(warm)
+
+            async def receive():
+                while True:
+                    async for _ in session.receive():
+                        pass
+
+            receiver = asyncio.create_task(receive())
+            try:
+                await interview.stop_event.wait()
+            finally:
+                receiver.cancel()
+                await asyncio.gather(receiver, return_exceptions=True)
+
+    manager = SessionManager(run_session, warm_pool=pool).start()
+    time.sleep(connect_ms / 1000 + 0.2)  # let the pool fill
+    for _ in range(cycles):
+        interview = manager.create("JD", transport="websocket")
+        while interview.start_seconds is None and not interview.future.done():
+            time.sleep(0.001)
+        manager.stop(interview.id)
+        time.sleep(gap)
+
+    label = f"{warm_sessions} warm" if warm_sessions else "cold connect"
+    latency = manager.latency()
+    print(f"  {label:<14} start p50 {latency['start_p50_ms']:7.1f} ms  p95 {latency['start_p95_ms']:7.1f} ms"
+          f"   stop p50 {latency['stop_p50_ms']:6.1f} ms  p95 {latency['stop_p95_ms']:6.1f} ms")
+    print(f"    {pool.stats()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interview start/stop latency with and without a warm pool.")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--connect-ms", type=float, default=400, help="simulated Live handshake time")
+    parser.add_argument("--warm", type=int, default=2, help="warm sessions to compare against")
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between interviews")
+    args = parser.parse_args(argv)
+
+    print(f"{args.cycles} interviews, {args.connect_ms:.0f} ms simulated connect:")
+    _bench(0, args.cycles, args.connect_ms, args.gap)
+    _bench(args.warm, args.cycles, args.connect_ms, args.gap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Local mock of the Gemini REST generateContent endpoint, plus a load test
+for the pooled upstream client.
+
+    python mock_gemini.py serve --port 8090 --latency 0.5 --error-rate 0.1
+    GEMINI_API_BASE=http://127.0.0.1:8090/v1beta python chatbot.py
+
+    python mock_gemini.py bench --requests 400 --workers 8 --concurrency 64
+
+The mock answers every request after `latency` seconds with a JSON array
+of questions, fails a fraction of them with `fail_status` (503 by default;
+the next `fail_next` for certain), can trickle response bodies out over
+`trickle` seconds, and counts the TCP connections it accepted and the most
+requests it had in progress at once, so connection reuse and concurrency
+limits are visible.
+streamGenerateContent?alt=sse sends the same text as server-sent events,
+spread over another `latency` seconds.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+from upstream import UpstreamClient, UpstreamError
+
+
+def fake_questions(prompt):
+    match = re.search(r"(\d+)", prompt or "")
+    count = min(int(match.group(1)) if match else 5, 50)
+    return [{"id": i + 1, "question": f"Mock question {i + 1}?", "answer": "Mock answer.",
+             "explanation": "Generated by mock_gemini.py."} for i in range(count)]
+
+
+class MockGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, port=0, latency=0.2, error_rate=0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_next = 0
+        self.fail_status = 503
+        self.trickle = 0.0
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1beta"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Clients that hit their deadline hang up mid-response; expected here
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if not self.server.trickle:
+            self.wfile.write(data)
+            return
+        # A few bytes at a time: every read is quick, the whole body is not
+        for start in range(0, len(data), 16):
+            self.wfile.write(data[start:start + 16])
+            self.wfile.flush()
+            time.sleep(self.server.trickle * 16 / len(data))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        with self.server._lock:
+            self.server.requests += 1
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+            fail = self.server.fail_next > 0
+            self.server.fail_next -= fail
+        try:
+            self._respond(payload, fail)
+        finally:
+            with self.server._lock:
+                self.server.active -= 1
+
+    def _respond(self, payload, fail):
+        time.sleep(self.server.latency)
+        if fail or random.random() < self.server.error_rate:
+            status = self.server.fail_status
+            self._reply(status, {"error": {"code": status, "message": "Mock overload"}})
+            return
+        prompt = payload.get("contents", [{}])[0].get("parts", [{}])[0].get("text", "")
+        text = "```json\n" + json.dumps(fake_questions(prompt), indent=2) + "\n```"
+        if ":streamGenerateContent" in self.path:
+            self._stream(text)
+            return
+        self._reply(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+    def _stream(self, text, pieces=20):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = max(1, -(-len(text) // pieces))
+        for start in range(0, len(text), step):
+            chunk = {"candidates": [{"content": {"parts": [{"text": text[start:start + step]}]}}]}
+            event = f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+            self.wfile.flush()
+            time.sleep(self.server.latency / pieces)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+# ------------------------------
+# Load test
+# ------------------------------
+def _summary(name, latencies, elapsed, failures, server, connections_before):
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"  {name:<34} {len(latencies) / elapsed:7.1f} req/s  "
+          f"p50 {np.percentile(lat, 50):7.0f} ms  p95 {np.percentile(lat, 95):7.0f} ms  "
+          f"failed {failures:3d}  connections {server.connections - connections_before}")
+
+
+def bench_per_call(server, total, workers):
+    """Baseline: one fresh requests.post per call, one blocking call per worker thread."""
+    latencies, failures = [], 0
+    before = server.connections
+
+    def call(i):
+        start = time.perf_counter()
+        resp = requests.post(f"{server.url}/models/mock:generateContent",
+                             json={"contents": [{"parts": [{"text": "Generate 5"}]}]}, timeout=60)
+        return resp.ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        for ok, latency in pool.map(call, range(total)):
+            if ok:
+                latencies.append(latency)
+            else:
+                failures += 1
+    _summary(f"requests.post, {workers} workers", latencies, time.perf_counter() - start,
+             failures, server, before)
+
+
+def bench_pooled(server, total, concurrency):
+    client = UpstreamClient(api_key="mock", base_url=server.url, max_concurrency=concurrency,
+                            max_connections=concurrency).start()
+    before = server.connections
+
+    async def call():
+        start = time.perf_counter()
+        await client.generate_content("mock", "Generate 5")
+        return time.perf_counter() - start
+
+    async def run_all():
+        return await asyncio.gather(*(call() for _ in range(total)), return_exceptions=True)
+
+    start = time.perf_counter()
+    results = asyncio.run_coroutine_threadsafe(run_all(), client.loop).result()
+    elapsed = time.perf_counter() - start
+    latencies = [r for r in results if not isinstance(r, UpstreamError)]
+    _summary(f"UpstreamClient, concurrency {concurrency}", latencies, elapsed,
+             total - len(latencies), server, before)
+    print(f"    {client.stats()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Gemini REST server and load test.")
+    parser.add_argument("command", choices=("serve", "bench"))
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per mock response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 503")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=8, help="baseline worker threads")
+    parser.add_argument("--concurrency", type=int, default=64, help="pooled client concurrency")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = MockGeminiServer(args.port, args.latency, args.error_rate)
+        print(f"✓ Mock Gemini listening on {server.url}")
+        server.serve_forever()
+        return
+
+    server = MockGeminiServer(0, args.latency, args.error_rate).start()
+    print(f"{args.requests} requests, {args.latency * 1000:.0f} ms mock latency, "
+          f"{args.error_rate:.0%} errors:")
+    bench_per_call(server, args.requests, args.workers)
+    bench_pooled(server, args.requests, args.concurrency)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
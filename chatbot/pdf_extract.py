@@ -0,0 +1,341 @@
+"""
+PDF text extraction for uploaded resumes and job descriptions.
+
+Pages of larger documents are extracted in parallel on worker processes
+(pdfplumber is pure Python and holds the GIL) and handed out in page order
+as soon as each range is done, so callers can start on page 1 while the
+rest are still being parsed. Finished documents are cached by the SHA-256
+of their bytes, so re-uploading the same file costs one hash.
+
+Workers run this file (`pdf_extract.py --worker`) rather than a
+multiprocessing spawn of the caller, which would re-import the app's
+__main__ (genai client, caches, Live pool) in every worker.
+
+    python pdf_extract.py resume.pdf --workers 4
+"""
+import argparse
+import collections
+import hashlib
+import io
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pdfplumber
+
+
+def _extract_range(source, start, stop):
+    """Worker: text of pages [start, stop) of a PDF path or bytes ("" for pages without text)."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _worker_main():
+    """`pdf_extract.py --worker`: pickled (source, start, stop) in, (ok, pages or error) out."""
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    # Stray prints from pdfplumber must not corrupt the reply stream
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            args = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            reply = (True, _extract_range(*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        pickle.dump(reply, replies)
+        replies.flush()
+
+
+class _WorkerProcess:
+    """One worker process, used by one thread at a time."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker"],
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def call(self, *args, timeout=None):
+        """Run one range; after `timeout` seconds the worker is killed and TimeoutError raised."""
+        expired = threading.Event()
+
+        def kill():
+            expired.set()
+            self.proc.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout is not None else None
+        pickle.dump(args, self.proc.stdin)
+        self.proc.stdin.flush()
+        if timer is not None:
+            timer.start()
+        try:
+            ok, value = pickle.load(self.proc.stdout)
+        except (EOFError, pickle.UnpicklingError):
+            code = self.proc.wait()
+            if expired.is_set():
+                raise TimeoutError(f"PDF pages {args[1] + 1}-{args[2]} took longer than {timeout}s")
+            raise RuntimeError(f"PDF worker exited with code {code}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def close(self):
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+class _WorkerPool:
+    """
+    `workers` worker processes behind a thread pool with the Executor
+    interface. A range running longer than `timeout` seconds kills its worker
+    (pdfplumber can hang on malformed files), which is then replaced.
+    """
+
+    def __init__(self, workers, timeout=None):
+        self.timeout = timeout
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-worker")
+        self._idle = queue.SimpleQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        for _ in range(workers):
+            self._add()
+
+    def _add(self):
+        worker = _WorkerProcess()
+        with self._lock:
+            self._all.append(worker)
+        self._idle.put(worker)
+
+    def _call(self, *args):
+        worker = self._idle.get()
+        try:
+            return worker.call(*args, timeout=self.timeout)
+        finally:
+            if worker.proc.poll() is None:
+                self._idle.put(worker)
+            else:
+                # Crashed or killed: replace it so the pool keeps its size
+                with self._lock:
+                    self._all.remove(worker)
+                self._add()
+
+    def submit(self, source, start, stop):
+        """Future of `_extract_range(source, start, stop)` run on a worker process."""
+        return self._threads.submit(self._call, source, start, stop)
+
+    def shutdown(self, cancel_futures=False):
+        self._threads.shutdown(cancel_futures=cancel_futures)
+        with self._lock:
+            workers, self._all = self._all, []
+        for worker in workers:
+            worker.close()
+
+
+class PdfTextCache:
+    """LRU of content hash -> page texts, bounded by the total characters held."""
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.chars = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            pages = self._entries.get(key)
+            if pages is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pages
+
+    def put(self, key, pages):
+        size = sum(len(p) for p in pages)
+        if size > self.max_chars:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = pages
+            self.chars += size
+            while self.chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self.chars -= sum(len(p) for p in evicted)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class PdfExtractor:
+    """
+    Cached, parallel page-text extraction.
+
+    Documents of at most `pages_per_task` pages (most resumes) are parsed in
+    the calling thread; starting a worker costs more than they do. Longer
+    ones are split into ranges of `pages_per_task` pages across `workers`
+    processes, started on first use and reused afterwards. Workers import
+    only this module, whatever the caller's __main__ is. A range that takes
+    longer than `range_timeout` seconds fails the document and its worker
+    is restarted.
+    """
+
+    def __init__(self, workers=None, pages_per_task=4, cache_chars=32_000_000, range_timeout=30.0):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.pages_per_task = pages_per_task
+        self.range_timeout = range_timeout
+        self.cache = PdfTextCache(cache_chars)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.pages = 0
+        self.parallel = 0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Fresh interpreters running this file: forking a process that runs Flask
+                # threads and event loops is unsafe, and a multiprocessing spawn would
+                # re-import the app's __main__ in every worker
+                self._pool = _WorkerPool(self.workers, self.range_timeout)
+            return self._pool
+
+    def _extract(self, data, path=None):
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            count = len(pdf.pages)
+            if count <= self.pages_per_task or self.workers <= 1:
+                for page in pdf.pages:
+                    yield page.extract_text() or ""
+                return
+
+        # Workers reopen the file by path when there is one, instead of receiving the bytes
+        source = path or data
+        pool = self._get_pool()
+        futures = [pool.submit(source, start, min(start + self.pages_per_task, count))
+                   for start in range(0, count, self.pages_per_task)]
+        self.parallel += 1
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Caller stopped early (or a range failed): drop ranges not yet started
+            for future in futures:
+                future.cancel()
+
+    def iter_pages(self, source):
+        """
+        Yield the text of each page in order. `source` is a path, bytes or a
+        binary file object. Only fully extracted documents are cached.
+        """
+        path = None
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            with open(path, "rb") as f:
+                data = f.read()
+        elif isinstance(source, bytes):
+            data = source
+        else:
+            data = source.read()
+
+        key = hashlib.sha256(data).hexdigest()
+        pages = self.cache.get(key)
+        if pages is not None:
+            yield from pages
+            return
+
+        pages = []
+        for text in self._extract(data, path):
+            pages.append(text)
+            yield text
+        self.documents += 1
+        self.pages += len(pages)
+        self.cache.put(key, tuple(pages))
+
+    def extract_text(self, source):
+        """Whole-document text: non-empty pages joined by newlines."""
+        return "\n".join(t for t in self.iter_pages(source) if t).strip()
+
+    def stats(self):
+        return {
+            "documents": self.documents,
+            "pages": self.pages,
+            "parallel_documents": self.parallel,
+            "workers": self.workers,
+            "cache_entries": len(self.cache),
+            "cache_chars": self.cache.chars,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_evictions": self.cache.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+# ------------------------------
+# Benchmark
+# ------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time serial, parallel and cached PDF extraction.")
+    parser.add_argument("pdf")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pages-per-task", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    text = ""
+    with pdfplumber.open(args.pdf) as pdf:
+        for page in pdf.pages:
+            t = page.extract_text()
+            if t:
+                text += t + "\n"
+    serial = time.perf_counter() - start
+    print(f"  serial pdfplumber     {serial * 1000:8.1f} ms  ({len(text.strip())} chars)")
+
+    extractor = PdfExtractor(args.workers, args.pages_per_task)
+    # Start the workers (and their pdfplumber import) outside the timed runs
+    pool = extractor._get_pool()
+    for future in [pool.submit(args.pdf, 0, 1) for _ in range(extractor.workers)]:
+        future.result()
+
+    start = time.perf_counter()
+    first = None
+    for _ in extractor.iter_pages(args.pdf):
+        first = first or time.perf_counter() - start
+    parallel = time.perf_counter() - start
+    print(f"  PdfExtractor          {parallel * 1000:8.1f} ms  first page after "
+          f"{(first or 0) * 1000:.1f} ms, {extractor.workers} workers")
+
+    start = time.perf_counter()
+    cached = extractor.extract_text(args.pdf)
+    print(f"  PdfExtractor (cached) {(time.perf_counter() - start) * 1000:8.1f} ms")
+    assert cached == text.strip(), "parallel extraction differs from serial"
+    print(f"  {extractor.stats()}")
+    extractor.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--worker"]:
+        _worker_main()
+    else:
+        main()
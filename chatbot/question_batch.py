@@ -0,0 +1,289 @@
+"""
+Batch question generation for pre-seeding question banks.
+
+    python question_batch.py specs.jsonl -o bank.jsonl --concurrency 8
+
+Each line of the specs file is one /generate-questions request body. A field
+given as a list expands into every combination, so one line such as
+
+    {"company_name": ["Acme", "Globex"], "role": "Backend Engineer",
+     "domain": "Payments", "experience_level": ["Junior", "Senior"],
+     "question_type": "Technical", "difficulty": ["Easy", "Hard"]}
+
+stands for eight specs. Identical specs (same cache key as the endpoint of
+the app whose prompt --style selects) are generated once. Up to
+`concurrency` specs are in flight on the shared upstream client, and
+results are written as they finish, one JSONL row per unique spec. Rerunning with the same output file skips the specs it already
+holds, so a run that died halfway resumes where it stopped; failed specs are
+retried. Results also go into the question cache, so with QUESTION_CACHE_DB
+set the server answers pre-generated specs without an upstream call.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from question_gen import (PROMPT_STYLES, QUESTION_MODEL, question_cache_from_env, question_key,
+                          upstream_from_env)
+from streaming import parse_json_array
+from upstream import response_text
+
+QUESTION_FIELDS = ("company_name", "role", "domain", "experience_level", "question_type", "difficulty")
+
+
+def expand_grid(spec):
+    """Yield one spec per combination of the list-valued fields."""
+    names = [k for k, v in spec.items() if isinstance(v, list)]
+    for values in itertools.product(*(spec[k] for k in names)):
+        yield {**spec, **dict(zip(names, values))}
+
+
+def normalize_spec(spec, default_count=10):
+    """
+    Request params for a spec: text fields as str and `num_questions` as int,
+    so 10 and "10" share a cache key. Used by /generate-questions in both
+    apps and by batches; raises ValueError for a missing or invalid field.
+    """
+    for k in QUESTION_FIELDS:
+        if not spec.get(k):
+            raise ValueError(f"Missing field: {k}")
+    params = {k: str(spec[k]) for k in QUESTION_FIELDS}
+    try:
+        params["num_questions"] = int(spec.get("num_questions", default_count))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid num_questions: {spec['num_questions']!r}") from None
+    return params
+
+
+class QuestionBatch:
+    """
+    Fans many question specs out over an UpstreamClient.
+
+    `prompt_for(params)` builds the prompt for one spec and `style` names it
+    (a PROMPT_STYLES key) for the cache key, as the endpoints do. With a `cache`
+    (a ResponseCache), cached specs are answered without an upstream call
+    and fresh results are stored for the server to reuse. Cache lookups go
+    through `get_or_compute` on a worker thread, never on the upstream loop
+    (a SQLite cache does disk I/O under its lock), so a spec the server is
+    generating at the same moment is awaited instead of generated twice.
+    """
+
+    def __init__(self, upstream, prompt_for, style="brief", model=QUESTION_MODEL, cache=None,
+                 concurrency=8, default_count=10):
+        self.upstream = upstream
+        self.prompt_for = prompt_for
+        self.style = style
+        self.model = model
+        self.cache = cache
+        self.concurrency = concurrency
+        self.default_count = default_count
+        self._cache_threads = None
+
+    def plan(self, specs, skip=(), limit=None):
+        """
+        Expand and de-duplicate specs into jobs of (key, params, indexes).
+
+        `indexes` are the positions of the expanded specs a job answers.
+        Keys in `skip` are left out. Invalid specs come back separately as
+        (index, error) instead of failing the whole batch. Raises ValueError
+        if the specs expand to more than `limit` entries.
+        """
+        jobs, invalid = {}, []
+        expanded = (s for spec in specs
+                    for s in (expand_grid(spec) if isinstance(spec, dict) else [spec]))
+        for index, spec in enumerate(expanded):
+            if limit is not None and index >= limit:
+                raise ValueError(f"Batch expands to more than {limit} specs")
+            if not isinstance(spec, dict):
+                invalid.append((index, "Spec must be an object"))
+                continue
+            try:
+                params = normalize_spec(spec, self.default_count)
+            except ValueError as e:
+                invalid.append((index, str(e)))
+                continue
+            key = question_key(params, self.style, self.model)
+            if key in skip:
+                continue
+            if key in jobs:
+                jobs[key][2].append(index)
+            else:
+                jobs[key] = (key, params, [index])
+        return list(jobs.values()), invalid
+
+    async def _generate(self, key, params, indexes):
+        row = {"key": key, "spec": params, "indexes": indexes}
+        start = time.perf_counter()
+        try:
+            if self.cache is None:
+                resp = await self.upstream.generate_content(self.model, self.prompt_for(params))
+                questions, status = parse_json_array(response_text(resp)), "miss"
+            else:
+                loop = asyncio.get_running_loop()
+
+                def compute():
+                    # Worker thread: the upstream call itself still runs on the loop
+                    resp = asyncio.run_coroutine_threadsafe(
+                        self.upstream.generate_content(self.model, self.prompt_for(params)),
+                        loop).result()
+                    return parse_json_array(response_text(resp))
+
+                questions, status = await loop.run_in_executor(
+                    self._cache_threads, self.cache.get_or_compute, key, compute)
+            # "coalesced": another caller generated it while we waited
+            row["status"] = "generated" if status == "miss" else "cached"
+            row["questions"] = questions
+        except Exception as e:
+            row["status"] = "failed"
+            row["error"] = str(e)
+        row["seconds"] = round(time.perf_counter() - start, 3)
+        return row
+
+    async def _fan_out(self, jobs, emit):
+        # A fixed set of workers pulls from one iterator: `concurrency` specs are
+        # in flight at a time and the remaining jobs never become pending tasks
+        pending = iter(jobs)
+        workers = min(self.concurrency, len(jobs))
+        if self.cache is not None and workers:
+            self._cache_threads = ThreadPoolExecutor(max_workers=workers,
+                                                     thread_name_prefix="question-cache")
+
+        async def worker():
+            for job in pending:
+                emit(await self._generate(*job))
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            if self._cache_threads is not None:
+                # Threads still waiting on an upstream call finish it, then exit
+                self._cache_threads.shutdown(wait=False)
+                self._cache_threads = None
+
+    def run(self, jobs):
+        """
+        Blocking iterator over result rows in completion order. Closing it
+        early cancels the specs still waiting to start.
+        """
+        self.upstream.start()
+        rows = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                await self._fan_out(jobs, rows.put)
+            finally:
+                rows.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.upstream.loop)
+        try:
+            while True:
+                row = rows.get()
+                if row is finished:
+                    break
+                yield row
+        finally:
+            future.cancel()
+        # Surface a crash of the fan-out itself (per-spec errors are rows)
+        if not future.cancelled():
+            future.result()
+
+
+class JsonlStore:
+    """Append-only JSONL result file; `completed` holds the keys that already have questions."""
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        needs_newline = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    needs_newline = not line.endswith("\n")
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        # Torn last line from an interrupted run
+                        continue
+                    if row.get("questions") is not None:
+                        self.completed.add(row["key"])
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    def write(self, row):
+        self._file.write(json.dumps(row) + "\n")
+        # Flushed per row so an interrupted run loses at most the spec in progress
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_specs(path):
+    """Specs from a JSONL file or a JSON array file ("-" reads stdin)."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate interview question banks.")
+    parser.add_argument("specs", help="JSONL (or JSON array) of /generate-questions bodies; - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="result JSONL; rerun with it to resume")
+    parser.add_argument("--concurrency", type=int, default=8, help="specs in flight at once")
+    parser.add_argument("--style", choices=sorted(PROMPT_STYLES), default="brief",
+                        help="prompt of chatbot.py (brief) or chat.py (detailed)")
+    args = parser.parse_args(argv)
+
+    # Same .env, upstream client and cache configuration as the server, without
+    # importing a Flask app (and starting its Live pool and session loop)
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        parser.error("GEMINI_API_KEY missing in .env")
+    prompt_for, default_count = PROMPT_STYLES[args.style]
+
+    store = JsonlStore(args.output)
+    batch = QuestionBatch(upstream_from_env(api_key), prompt_for, style=args.style,
+                          cache=question_cache_from_env(), concurrency=args.concurrency,
+                          default_count=default_count)
+    jobs, invalid = batch.plan(read_specs(args.specs), skip=store.completed)
+    for index, error in invalid:
+        print(f"❌ Spec {index}: {error}")
+    print(f"{len(jobs)} specs to generate ({len(store.completed)} already in {args.output}), "
+          f"concurrency {args.concurrency}")
+
+    counts = {"generated": 0, "cached": 0, "failed": 0}
+    start = time.perf_counter()
+    try:
+        for done, row in enumerate(batch.run(jobs), 1):
+            store.write(row)
+            counts[row["status"]] += 1
+            label = " / ".join(row["spec"][k] for k in ("company_name", "role", "difficulty"))
+            if row["status"] == "failed":
+                print(f"❌ [{done}/{len(jobs)}] {label}: {row['error']}")
+            else:
+                print(f"✓ [{done}/{len(jobs)}] {label}: {len(row['questions'])} questions "
+                      f"({row['status']}, {row['seconds']:.1f}s)")
+    finally:
+        store.close()
+
+    print(f"Done in {time.perf_counter() - start:.1f}s: {counts['generated']} generated, "
+          f"{counts['cached']} from cache, {counts['failed']} failed")
+    if counts["failed"] or invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
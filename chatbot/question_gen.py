@@ -0,0 +1,92 @@
+"""
+Question generation pieces shared by chatbot.py, chat.py and question_batch.py.
+
+Importing this module has no side effects: it builds no clients and reads no
+environment until one of the factories below is called, so CLI tools can use
+the apps' prompts, upstream client and cache without importing a Flask app.
+"""
+import os
+
+from response_cache import ResponseCache, cache_key
+from upstream import DEFAULT_BASE_URL, UpstreamClient
+
+# Model used for REST text generation (via the pooled upstream client)
+QUESTION_MODEL = "gemini-2.5-flash"
+
+
+def question_prompt(params):
+    """Compact prompt used by chatbot.py."""
+    return f"""
+Generate interview questions for:
+Company: {params['company_name']}
+Role: {params['role']}
+Domain: {params['domain']}
+Experience: {params['experience_level']}
+Type: {params['question_type']}
+Difficulty: {params['difficulty']}
+Count: {params.get('num_questions', 10)}
+
+Return ONLY JSON array with fields: id, question, answer, explanation.
+"""
+
+
+def detailed_question_prompt(params):
+    """Prompt used by chat.py, with per-field instructions."""
+    return f"""
+You are an expert interviewer. Generate {params['num_questions']} unique interview questions.
+Company: {params['company_name']}
+Role: {params['role']}
+Domain: {params['domain']}
+Experience Level: {params['experience_level']}
+Question Type: {params['question_type']}
+Difficulty: {params['difficulty']}
+
+For each question, return a JSON object with:
+- id: a unique number
+- question: the actual question text
+- answer: a clear and concise correct answer
+- explanation: a short explanation or reasoning behind the answer
+
+Return ONLY a valid JSON array.
+"""
+
+
+# Prompt and default question count per app: "brief" is chatbot.py, "detailed" chat.py
+PROMPT_STYLES = {
+    "brief": (question_prompt, 10),
+    "detailed": (detailed_question_prompt, 15),
+}
+
+
+def question_key(params, style, model=QUESTION_MODEL):
+    """
+    Cache key for a normalized spec. The prompt style and model are part of
+    the key, so apps sharing one QUESTION_CACHE_DB never serve each other's
+    question sets.
+    """
+    return cache_key({**params, "_style": style, "_model": model})
+
+
+def upstream_from_env(api_key):
+    """Pooled upstream client configured from GEMINI_API_BASE and UPSTREAM_* variables."""
+    return UpstreamClient(
+        api_key,
+        base_url=os.getenv("GEMINI_API_BASE", DEFAULT_BASE_URL),
+        max_concurrency=int(os.getenv("UPSTREAM_CONCURRENCY", "16")),
+        max_connections=int(os.getenv("UPSTREAM_CONNECTIONS", "32")),
+        deadline=float(os.getenv("UPSTREAM_DEADLINE", "60"))
+    )
+
+
+def question_cache_from_env():
+    """
+    Question set cache configured from QUESTION_CACHE_* variables. With
+    QUESTION_CACHE_DB set (e.g. question_cache.sqlite3) entries persist and
+    are shared by every process pointing at the same file; `question_key`
+    keeps each prompt style's entries apart.
+    """
+    return ResponseCache(
+        ttl=int(os.getenv("QUESTION_CACHE_TTL", "21600")),
+        max_entries=int(os.getenv("QUESTION_CACHE_SIZE", "512")),
+        path=os.getenv("QUESTION_CACHE_DB") or None
+    )
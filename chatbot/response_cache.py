@@ -0,0 +1,269 @@
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def cache_key(params):
+    """Stable key for request parameters: case, surrounding and repeated whitespace ignored."""
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, str):
+            value = " ".join(value.lower().split())
+        normalized[name] = value
+    blob = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class MemoryStore:
+    """In-process LRU dict of key -> (expires_at, value)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """On-disk store with the same interface; survives restarts and can be shared by workers."""
+
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key):
+        row = self._db.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row[0], json.loads(row[1])
+
+    def put(self, key, expires_at, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), expires_at, time.time()),
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (excess,))
+        return max(excess, 0)
+
+    def delete(self, key):
+        self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.items = []  # streamed so far, when the leader is a stream
+        self._progress = threading.Condition()
+
+    def add(self, item):
+        with self._progress:
+            self.items.append(item)
+            self._progress.notify_all()
+
+    def finish(self):
+        with self._progress:
+            self.done.set()
+            self._progress.notify_all()
+
+    def follow(self):
+        """Yield the leader's items as they arrive, then the rest of its value; re-raises its error."""
+        sent = 0
+        while True:
+            with self._progress:
+                self._progress.wait_for(lambda: len(self.items) > sent or self.done.is_set())
+                items = self.items[sent:]
+                finished = self.done.is_set()
+            yield from items
+            sent += len(items)
+            if finished:
+                break
+        if self.error is not None:
+            raise self.error
+        yield from self.value[sent:]
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache for JSON-serializable responses with single-flight
+    coalescing: while one request computes a value, identical requests wait
+    for it instead of making their own upstream call. Failures are handed
+    to the waiters but never cached. `stream_or_compute` does the same for
+    list values produced item by item, so streamed and plain requests for
+    one key share a single computation.
+
+    `path` switches from the in-memory store to SQLite.
+    """
+
+    def __init__(self, ttl=3600, max_entries=512, path=None):
+        self.ttl = ttl
+        self.store = SQLiteStore(path, max_entries) if path else MemoryStore(max_entries)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, key):
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            self.store.delete(key)
+            self.expirations += 1
+            return None
+        return value
+
+    def get(self, key):
+        """Cached value or None, counted as a hit or miss (for callers that fill it themselves)."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self.evictions += self.store.put(key, time.time() + self.ttl, value)
+
+    def get_or_compute(self, key, compute):
+        """Returns (value, status) with status "hit", "miss" or "coalesced"; re-raises compute errors."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value, "hit"
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "coalesced"
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        else:
+            with self._lock:
+                self.evictions += self.store.put(key, time.time() + self.ttl, flight.value)
+            return flight.value, "miss"
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.finish()
+
+    def stream_or_compute(self, key, produce):
+        """
+        Streaming get_or_compute for list values: returns (items, status).
+
+        On a hit `items` iterates the cached list. Otherwise the first caller
+        iterates `produce()` and the list is cached once it is exhausted;
+        identical callers meanwhile get its items as they arrive
+        ("coalesced"). Iterating `items` re-raises the producer's error.
+        `items` is a generator: iterate it to the end or close it, or
+        coalesced callers wait forever; if the first caller stops early they
+        get a RuntimeError.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return (item for item in value), "hit"
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight.follow(), "coalesced"
+            flight = self._flights[key] = _Flight()
+            self.misses += 1
+        return self._lead(key, flight, produce), "miss"
+
+    def _lead(self, key, flight, produce):
+        try:
+            for item in produce():
+                flight.add(item)
+                yield item
+            flight.value = list(flight.items)
+            with self._lock:
+                self.evictions += self.store.put(key, time.time() + self.ttl, flight.value)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            if flight.value is None and flight.error is None:
+                flight.error = RuntimeError("Stream was closed before it finished")
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.finish()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "backend": "sqlite" if isinstance(self.store, SQLiteStore) else "memory",
+                "entries": len(self.store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+                "in_flight": len(self._flights),
+            }
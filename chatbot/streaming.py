@@ -0,0 +1,211 @@
+import json
+import re
+from contextlib import closing
+
+from flask import Response, jsonify, request, stream_with_context
+
+# Headers that stop proxies (and the Flask dev server) from buffering the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data, event=None):
+    """One server-sent event with a JSON payload."""
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    """Flask response streaming the `events` generator, unbuffered."""
+    return Response(stream_with_context(events), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+
+def wants_stream(data):
+    """
+    True for {"stream": true}, a stream=true/1/yes form field or an
+    EventSource-style Accept header on the current request. Form values are
+    strings, so "false" and "0" must not count.
+    """
+    return (str(data.get("stream")).lower() in ("1", "true", "yes")
+            or "text/event-stream" in request.headers.get("Accept", ""))
+
+
+def question_events(cache, key, produce):
+    """
+    Server-sent events for /generate-questions: one "question" event per
+    array element, sent as soon as it is complete, then "done" (or "error").
+    `produce()` starts the upstream stream; identical concurrent requests,
+    streamed or not, share one upstream call through `cache`.
+    """
+    questions, status = cache.stream_or_compute(key, produce)
+    count = 0
+    try:
+        with closing(questions):
+            for question in questions:
+                count += 1
+                yield sse_event(question, event="question")
+    except Exception as e:
+        yield sse_event({"error": f"Question stream failed: {e}"}, event="error")
+        return
+
+    yield sse_event({"count": count, "cached": status != "miss"}, event="done")
+
+
+def pdf_upload_response(extractor, max_bytes):
+    """
+    Response for /extract-pdf: the text of the PDF uploaded as multipart field
+    "file", as JSON or, with stream=true (form field) or Accept:
+    text/event-stream, as page events sent while later pages are still
+    being extracted.
+    """
+    upload = request.files.get("file")
+    if upload is None:
+        return jsonify({"error": "PDF file missing"}), 400
+    data = upload.read()
+    if len(data) > max_bytes:
+        return jsonify({"error": "PDF too large"}), 413
+
+    if wants_stream(request.form):
+        return sse_response(page_events(extractor.iter_pages(data)))
+
+    try:
+        pages = list(extractor.iter_pages(data))
+    except Exception as e:
+        return jsonify({"error": f"Could not read PDF: {e}"}), 400
+    return jsonify({"text": "\n".join(t for t in pages if t).strip(), "pages": len(pages)})
+
+
+def page_events(pages):
+    """Server-sent events for PDF pages: one "page" event per page in order, then "done" (or "error")."""
+    count = 0
+    try:
+        for text in pages:
+            count += 1
+            yield sse_event({"page": count, "text": text}, event="page")
+    except Exception as e:
+        yield sse_event({"error": f"Could not read PDF: {e}"}, event="error")
+        return
+    yield sse_event({"pages": count}, event="done")
+
+
+def batch_events(batch, jobs, invalid):
+    """
+    Server-sent events for a QuestionBatch: "invalid" for specs that failed
+    validation, one "result" per unique spec as it completes (status
+    generated, cached or failed), then "done" with the totals. A failed spec
+    does not stop the batch.
+    """
+    for index, error in invalid:
+        yield sse_event({"indexes": [index], "error": error}, event="invalid")
+
+    counts = {"generated": 0, "cached": 0, "failed": 0}
+    for row in batch.run(jobs):
+        counts[row["status"]] += 1
+        yield sse_event(row, event="result")
+    yield sse_event({"specs": len(jobs), "invalid": len(invalid), **counts}, event="done")
+
+
+# An opening `[` at the start of the reply, optionally after a ```json fence line
+_ARRAY_OPEN = re.compile(r"\s*(?:```[^\n]*\n\s*)?\[")
+# A reply start that may still turn into _ARRAY_OPEN once more text arrives
+_ARRAY_OPEN_PREFIX = re.compile(r"\s*(?:`{1,3}|```[^\n]*(?:\n\s*)?)?")
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for a JSON array that arrives in text chunks.
+
+    `feed(text)` returns the top-level elements completed by that chunk, so
+    each question can be forwarded as soon as its closing brace arrives
+    instead of after the whole array. The array may be preceded only by
+    whitespace and a ```json fence; control characters inside strings are
+    tolerated, as models sometimes emit raw newlines there.
+
+    A reply that starts with anything else (a preamble such as "Here are
+    [10] questions:") is buffered instead, and `finish()` returns the
+    elements of the first array of objects found in it.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder(strict=False)
+        self._buf = ""
+        self.started = False
+        self.buffered = False
+        self.done = False
+        self.count = 0
+
+    def feed(self, text):
+        if self.done:
+            return []
+        self._buf += text
+        if self.buffered:
+            return []
+        if not self.started:
+            match = _ARRAY_OPEN.match(self._buf)
+            if match is None:
+                # Wait for more text unless the reply can no longer start with the array
+                self.buffered = _ARRAY_OPEN_PREFIX.fullmatch(self._buf) is None
+                return []
+            self._buf = self._buf[match.end():]
+            self.started = True
+
+        items = []
+        pos = 0
+        while True:
+            # Skip separators between elements
+            while pos < len(self._buf) and self._buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(self._buf):
+                break
+            if self._buf[pos] == "]":
+                self.done = True
+                pos += 1
+                break
+            try:
+                item, pos = self._decoder.raw_decode(self._buf, pos)
+            except json.JSONDecodeError:
+                # Element not complete yet
+                break
+            items.append(item)
+        self._buf = self._buf[pos:]
+        self.count += len(items)
+        return items
+
+    def finish(self):
+        """
+        Elements still to be returned (only for a buffered reply); raises if
+        the stream ended before the array was closed or held no array.
+        """
+        if self.done:
+            return []
+        if not self.started:
+            items = self._find_array(self._buf)
+            self.done = True
+            self.count += len(items)
+            return items
+        raise ValueError(f"Response ended inside the JSON array after {self.count} items")
+
+    def _find_array(self, text):
+        # Brackets in prose ("[10] questions") decode to arrays too, so only an
+        # array of objects counts
+        for start in (i for i, c in enumerate(text) if c == "["):
+            try:
+                value, _ = self._decoder.raw_decode(text, start)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, list) and all(isinstance(v, dict) for v in value):
+                return value
+        raise ValueError("No JSON array in response")
+
+
+def iter_json_array(chunks):
+    """Elements of a JSON array streamed as text `chunks`, each as soon as it is complete."""
+    parser = JsonArrayStream()
+    for text in chunks:
+        yield from parser.feed(text)
+    yield from parser.finish()
+
+
+def parse_json_array(text):
+    """Parse a complete JSON array reply (fences and raw control characters tolerated)."""
+    parser = JsonArrayStream()
+    return parser.feed(text) + parser.finish()
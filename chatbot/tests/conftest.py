@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Chatbot modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from audio_bridge import MAX_MESSAGE_BYTES, handle_audio_socket
+from fake_live import FakeLiveClient
+from interview_sessions import SessionManager
+from mock_gemini import MockGeminiServer
+
+
+def fake_interview(client):
+    """run_session for SessionManager: chatbot.run_interview wired to a FakeLiveClient."""
+
+    async def run_interview(interview):
+        async with client.aio.live.connect(model="fake") as session:
+            interview.mark_running()
+
+            async def send():
+                async for chunk in interview.uplink.frames():
+                    await session.send_realtime_input(audio=SimpleNamespace(
+                        data=chunk.tobytes(), mime_type=f"audio/pcm;rate={interview.input_rate}"))
+
+            async def receive():
+                while True:
+                    async for response in session.receive():
+                        if response.data:
+                            interview.playback.write(np.frombuffer(response.data, dtype=np.int16))
+
+            tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+            try:
+                await interview.stop_event.wait()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    return run_interview
+
+
+@pytest.fixture
+def mock_server():
+    """MockGeminiServer on a free port, with no latency unless a test sets it."""
+    server = MockGeminiServer(port=0, latency=0.0).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def audio_server():
+    """
+    Factory for a SessionManager on fake Live plus the audio WebSocket
+    server on a free port; returns (manager, "ws://host:port"). Everything
+    is torn down after the test.
+    """
+    from websockets.asyncio.server import serve
+
+    started = []
+
+    def start(client=None, **session_kwargs):
+        session_kwargs.setdefault("vad_mode", "off")
+        manager = SessionManager(fake_interview(client or FakeLiveClient()), stop_deadline=1.0,
+                                 **session_kwargs).start()
+
+        async def start_server():
+            return await serve(lambda ws: handle_audio_socket(ws, manager), "127.0.0.1", 0,
+                               max_size=MAX_MESSAGE_BYTES, max_queue=16)
+
+        server = asyncio.run_coroutine_threadsafe(start_server(), manager.loop).result()
+        started.append((manager, server))
+        port = server.sockets[0].getsockname()[1]
+        return manager, f"ws://127.0.0.1:{port}"
+
+    yield start
+
+    for manager, server in started:
+        manager.stop_all()
+        server.close()
+        asyncio.run_coroutine_threadsafe(server.wait_closed(), manager.loop).result(timeout=5)
+        manager.loop.call_soon_threadsafe(manager.loop.stop)
+        manager._thread.join(5)
+        manager.loop.close()
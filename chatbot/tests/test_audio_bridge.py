@@ -0,0 +1,145 @@
+import asyncio
+import json
+import socket
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import pytest
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+
+from audio_bridge import MAX_MESSAGE_BYTES
+from audio_codec import mulaw_decode, mulaw_encode
+from fake_live import FakeLiveClient
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def open_audio(url, interview, query="", **kwargs):
+    ws = connect(f"{url}/interview/{interview.id}/audio{query}", **kwargs)
+    ready = json.loads(ws.recv(timeout=5))
+    assert ready["type"] == "ready"
+    return ws, ready
+
+
+def close_code(ws):
+    with pytest.raises(ConnectionClosed) as closed:
+        while True:
+            ws.recv(timeout=5)
+    return closed.value.rcvd.code
+
+
+def test_round_trip_at_client_rate_and_codec(audio_server):
+    rate, seconds, tone_hz = 48000, 0.5, 440
+    manager, url = audio_server(FakeLiveClient(turn_seconds=seconds))
+    interview = manager.create("JD")
+    ws, ready = open_audio(url, interview, f"?rate={rate}&codec=mulaw")
+    assert (ready["rate"], ready["codec"]) == (rate, "mulaw")
+
+    t = np.arange(int(rate * seconds)) / rate
+    tone = (8000 * np.sin(2 * np.pi * tone_hz * t)).astype(np.int16)
+    for start in range(0, len(tone), rate // 50):
+        ws.send(mulaw_encode(tone[start:start + rate // 50]).tobytes())
+
+    # The fake model echoes the turn at 24 kHz; the bridge sends it back as 48 kHz mu-law
+    received = bytearray()
+    while len(received) < 0.9 * len(tone):
+        message = ws.recv(timeout=5)
+        assert isinstance(message, bytes)
+        received += message
+    ws.close()
+
+    echo = mulaw_decode(bytes(received)).astype(np.float64)
+    assert len(received) <= len(tone)
+    spectrum = np.abs(np.fft.rfft(echo * np.hanning(len(echo))))
+    peak_hz = np.argmax(spectrum) * rate / len(echo)
+    assert abs(peak_hz - tone_hz) < 10
+
+
+def test_oversized_message_is_rejected(audio_server):
+    manager, url = audio_server()
+    interview = manager.create("JD")
+    ws, _ = open_audio(url, interview)
+    ws.send(b"\0" * (MAX_MESSAGE_BYTES + 2))
+    assert close_code(ws) == 1009  # message too big
+    assert wait_for(lambda: not interview.client_connected)
+    assert interview.uplink.queue.empty()
+
+
+def test_slow_reader_sheds_downlink_chunks(audio_server):
+    manager, url = audio_server()
+    interview = manager.create("JD")
+    # A small receive window, so the socket buffers fill after a few seconds of audio
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(("127.0.0.1", urlsplit(url).port))
+    ws, _ = open_audio(url, interview, sock=sock, close_timeout=0.1)
+
+    # Noise, so permessage-deflate cannot shrink it away
+    noise = np.random.default_rng(0).integers(-8000, 8000, 24000).astype(np.int16)
+
+    async def speak(max_chunks):
+        # One second of model audio per chunk, with the sender getting a turn after each
+        for _ in range(max_chunks):
+            interview.playback.write(noise)
+            await asyncio.sleep(0)
+            if interview.playback.dropped_chunks:
+                return
+
+    # The client never reads: once the socket buffers fill, the oldest chunks are dropped
+    asyncio.run_coroutine_threadsafe(speak(2000), manager.loop).result(timeout=30)
+    stats = interview.playback.stats()
+    ws.close()
+    assert stats["dropped_chunks"] > 0
+    assert stats["queued_chunks"] <= interview.playback.queue.maxsize
+
+
+def test_stop_message_ends_the_session(audio_server):
+    manager, url = audio_server()
+    interview = manager.create("JD")
+    ws, _ = open_audio(url, interview)
+    ws.send(json.dumps({"type": "stop"}))
+    close_code(ws)
+    interview.future.result(timeout=5)
+    assert interview.state == "stopped"
+    assert interview.stop_reason == "requested"
+    assert manager.get(interview.id) is None
+
+
+def test_second_client_is_refused(audio_server):
+    manager, url = audio_server()
+    interview = manager.create("JD")
+    first, _ = open_audio(url, interview)
+    second = connect(f"{url}/interview/{interview.id}/audio")
+    assert close_code(second) == 4409
+    assert interview.client_connected
+    first.close()
+
+
+def test_session_without_client_is_stopped(audio_server):
+    manager, _ = audio_server(client_timeout=0.2)
+    interview = manager.create("JD")
+    interview.future.result(timeout=5)
+    assert interview.stop_reason == "no audio client connected"
+
+
+def test_disconnected_client_may_reconnect_within_grace(audio_server):
+    manager, url = audio_server(reconnect_grace=0.5)
+    interview = manager.create("JD")
+    ws, _ = open_audio(url, interview)
+    ws.close()
+    time.sleep(0.2)
+    ws, _ = open_audio(url, interview)
+    time.sleep(0.5)
+    assert not interview.stopping
+    ws.close()
+    interview.future.result(timeout=5)
+    assert interview.stop_reason == "audio client did not reconnect"
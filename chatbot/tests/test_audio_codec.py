@@ -0,0 +1,106 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from audio_codec import ClientAudioCodec, PolyphaseResampler, mulaw_decode, mulaw_encode
+
+RATE_PAIRS = [(48000, 16000), (44100, 16000), (24000, 48000), (24000, 44100), (16000, 24000)]
+
+
+def signal(rate, seconds=0.25):
+    rng = np.random.default_rng(rate)
+    t = np.arange(int(rate * seconds)) / rate
+    return (8000 * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 300, len(t))).astype(np.int16)
+
+
+def odd_chunks(samples):
+    """Split into irregular block sizes, including empty and single-sample blocks."""
+    sizes = [1, 0, 7, 160, 441, 3, 960, 2]
+    chunks, start, i = [], 0, 0
+    while start < len(samples):
+        chunks.append(samples[start:start + sizes[i % len(sizes)]])
+        start += sizes[i % len(sizes)]
+        i += 1
+    return chunks
+
+
+@pytest.mark.parametrize("src, dst", RATE_PAIRS)
+def test_chunked_stream_matches_whole_stream(src, dst):
+    audio = signal(src)
+    whole = PolyphaseResampler(src, dst).process(audio)
+
+    resampler = PolyphaseResampler(src, dst)
+    chunked = np.concatenate([resampler.process(c) for c in odd_chunks(audio)])
+
+    np.testing.assert_array_equal(chunked, whole)
+
+
+@pytest.mark.parametrize("src, dst", RATE_PAIRS)
+def test_each_chunk_yields_the_outputs_its_inputs_complete(src, dst):
+    # After n input samples exactly ceil(n * dst / src) outputs are due
+    resampler = PolyphaseResampler(src, dst)
+    fed = 0
+    for chunk in odd_chunks(signal(src)):
+        out = resampler.process(chunk)
+        due = math.ceil((fed + len(chunk)) * dst / src) - math.ceil(fed * dst / src)
+        assert len(out) == due
+        assert out.dtype == np.int16
+        fed += len(chunk)
+
+
+def test_equal_rates_pass_through():
+    audio = signal(16000)
+    assert PolyphaseResampler(16000, 16000).process(audio) is audio
+
+
+# Reference G.711 values, as produced by audioop.lin2ulaw / ulaw2lin
+SAMPLES = [0, 1, -1, 100, -100, 1000, -1000, 8000, -8000, 32767, -32768]
+ENCODED = [255, 255, 126, 242, 114, 206, 78, 160, 32, 128, 0]
+DECODED = [0, 0, -8, 104, -104, 988, -988, 7932, -7932, 32124, -32124]
+
+
+def test_mulaw_matches_reference_values():
+    encoded = mulaw_encode(np.array(SAMPLES, dtype=np.int16))
+    assert encoded.dtype == np.uint8
+    assert encoded.tolist() == ENCODED
+    decoded = mulaw_decode(encoded.tobytes())
+    assert decoded.dtype == np.int16
+    assert decoded.tolist() == DECODED
+
+
+def test_mulaw_round_trip_error_is_relative_to_the_sample():
+    samples = np.arange(-32768, 32768, 7, dtype=np.int64).astype(np.int16)
+    decoded = mulaw_decode(mulaw_encode(samples).tobytes()).astype(np.int32)
+    magnitude = np.abs(samples.astype(np.int32))
+    error = np.abs(decoded - samples)
+    # The quantisation step doubles per segment: about 3% of the sample,
+    # except above the top code (+-32124), which saturates
+    in_range = magnitude <= 32124
+    assert (error[in_range] <= magnitude[in_range] / 32 + 8).all()
+    assert error.max() <= 644
+    # Decoded codes re-encode to themselves
+    assert mulaw_encode(decoded.astype(np.int16)).tolist() == mulaw_encode(samples).tolist()
+
+
+def test_mulaw_matches_audioop_for_every_sample():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        audioop = pytest.importorskip("audioop")
+    every = np.arange(-32768, 32768, dtype=np.int64).astype(np.int16)
+    expected = np.frombuffer(audioop.lin2ulaw(every.tobytes(), 2), dtype=np.uint8)
+    np.testing.assert_array_equal(mulaw_encode(every), expected)
+
+    codes = bytes(range(256))
+    expected = np.frombuffer(audioop.ulaw2lin(codes, 2), dtype=np.int16)
+    np.testing.assert_array_equal(mulaw_decode(codes), expected)
+
+
+def test_client_codec_decodes_mulaw_at_the_client_rate():
+    codec = ClientAudioCodec(48000, 16000, 24000, codec="mulaw")
+    audio = signal(48000)
+    message = mulaw_encode(audio).tobytes()
+    assert len(codec.decode(message)) == len(audio) // 3
+    with pytest.raises(ValueError):
+        ClientAudioCodec(48000, 16000, 24000, codec="opus")
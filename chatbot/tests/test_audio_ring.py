@@ -0,0 +1,93 @@
+import numpy as np
+
+from audio_ring import AudioRingBuffer
+
+
+def ramp(start, n):
+    """Consecutive sample values, so any reordering or gap shows up in a comparison."""
+    return np.arange(start, start + n, dtype=np.int16)
+
+
+def read(ring, frames):
+    out = np.full(frames, -1, dtype=np.int16)
+    return ring.read_into(out), out
+
+
+def test_writes_and_reads_wrap_around_the_end():
+    ring = AudioRingBuffer(8)
+    assert ring.write(ramp(0, 6)) == 6
+    n, out = read(ring, 5)
+    assert n == 5
+    np.testing.assert_array_equal(out, ramp(0, 5))
+
+    # Write position 6: two samples fill the tail, four wrap to the front
+    assert ring.write(ramp(6, 6)) == 6
+    assert len(ring) == 7
+    n, out = read(ring, 7)
+    # Read position 5: three from the tail, four from the front
+    assert n == 7
+    np.testing.assert_array_equal(out, ramp(5, 7))
+    assert len(ring) == 0
+
+
+def test_overrun_keeps_the_oldest_samples_and_counts_the_rest():
+    ring = AudioRingBuffer(8)
+    ring.write(ramp(0, 5))
+    assert ring.write(ramp(5, 6)) == 3
+    assert ring.write(ramp(11, 2)) == 0
+
+    assert (ring.overruns, ring.dropped_samples) == (2, 5)
+    n, out = read(ring, 8)
+    assert n == 8
+    np.testing.assert_array_equal(out, ramp(0, 8))
+    assert ring.stats() == {"buffered": 0, "underruns": 0, "overruns": 2, "dropped_samples": 5}
+
+
+def test_underrun_pads_with_silence():
+    ring = AudioRingBuffer(8)
+    ring.write(ramp(1, 3))
+    n, out = read(ring, 5)
+    assert n == 3
+    np.testing.assert_array_equal(out, [1, 2, 3, 0, 0])
+    assert ring.underruns == 1
+
+    # Nothing buffered while idle is silence, not another underrun
+    n, out = read(ring, 4)
+    assert n == 0
+    np.testing.assert_array_equal(out, np.zeros(4))
+    assert ring.underruns == 1
+
+
+def test_playback_waits_for_target_depth_and_rebuffers_after_underrun():
+    ring = AudioRingBuffer(16, target_depth=6)
+    ring.write(ramp(0, 4))
+    assert read(ring, 2)[0] == 0
+    ring.write(ramp(4, 2))
+    n, out = read(ring, 2)
+    assert n == 2
+    np.testing.assert_array_equal(out, ramp(0, 2))
+
+    # Once playing, blocks are served below the target depth
+    assert read(ring, 3)[0] == 3
+    n, out = read(ring, 3)
+    assert n == 1
+    np.testing.assert_array_equal(out, [5, 0, 0])
+    assert ring.underruns == 1
+
+    # After the underrun it buffers up to target_depth again before playing
+    ring.write(ramp(6, 5))
+    assert read(ring, 2)[0] == 0
+    assert len(ring) == 5
+    ring.write(ramp(11, 1))
+    n, out = read(ring, 6)
+    assert n == 6
+    np.testing.assert_array_equal(out, ramp(6, 6))
+
+
+def test_target_depth_is_capped_at_capacity_and_reset_discards():
+    ring = AudioRingBuffer(4, target_depth=10)
+    assert ring.target_depth == 4
+    ring.write(ramp(0, 4))
+    ring.reset()
+    assert len(ring) == 0
+    assert read(ring, 4)[0] == 0
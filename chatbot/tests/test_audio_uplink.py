@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from audio_uplink import AudioUplink
+
+RATE = 16000
+SIZES = [100, 37, 511, 1, 290, 341, 960, 3, 317]  # 2560 samples: eight 20 ms frames
+
+
+def ramp_chunks(sizes):
+    samples = np.arange(sum(sizes), dtype=np.int16)
+    bounds = np.cumsum([0] + sizes)
+    return samples, [samples[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def feed_from_thread(loop, uplink, chunks, done):
+    """Hand chunks to the loop the way the sounddevice callback does, then set `done`."""
+    def worker():
+        for chunk in chunks:
+            loop.call_soon_threadsafe(uplink.put, chunk)
+        loop.call_soon_threadsafe(done.set)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    return thread
+
+
+async def take(frames, count):
+    return [await anext(frames) for _ in range(count)]
+
+
+def test_odd_sized_chunks_are_coalesced_into_fixed_frames():
+    samples, chunks = ramp_chunks(SIZES)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        uplink = AudioUplink(loop, sample_rate=RATE, frame_ms=20)
+        done = asyncio.Event()
+        thread = feed_from_thread(loop, uplink, chunks, done)
+        frames = await asyncio.wait_for(take(uplink.frames(), 8), timeout=5)
+        await done.wait()
+        thread.join()
+        return uplink, frames
+
+    uplink, frames = asyncio.run(main())
+    assert uplink.frame_samples == 320
+    assert [len(f) for f in frames] == [320] * 8
+    np.testing.assert_array_equal(np.concatenate(frames), samples)
+    assert uplink.dropped == 0
+
+
+def test_full_queue_drops_the_oldest_chunks():
+    samples, chunks = ramp_chunks([160] * 6)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        uplink = AudioUplink(loop, sample_rate=RATE, maxsize=4)
+        done = asyncio.Event()
+        thread = feed_from_thread(loop, uplink, chunks, done)
+        # Nothing is consumed until all six chunks have been queued
+        await done.wait()
+        thread.join()
+        return uplink, await asyncio.wait_for(take(uplink.frames(), 4), timeout=5)
+
+    uplink, received = asyncio.run(main())
+    assert uplink.dropped == 2
+    np.testing.assert_array_equal(np.concatenate(received), samples[320:])
+
+
+def test_callback_takes_the_first_channel_and_stops_once_closed():
+    async def main():
+        loop = asyncio.get_running_loop()
+        uplink = AudioUplink(loop, sample_rate=RATE)
+        stereo = np.stack([np.arange(5, dtype=np.int16), -np.ones(5, np.int16)], axis=1)
+        await loop.run_in_executor(None, uplink.callback, stereo, 5, None, None)
+        uplink.close()
+        await loop.run_in_executor(None, uplink.callback, stereo, 5, None, None)
+        await asyncio.sleep(0)
+        return uplink
+
+    uplink = asyncio.run(main())
+    assert uplink.queue.qsize() == 1
+    np.testing.assert_array_equal(uplink.queue.get_nowait(), np.arange(5))
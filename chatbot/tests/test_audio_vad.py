@@ -0,0 +1,71 @@
+import numpy as np
+
+from audio_vad import VoiceActivityGate
+
+RATE = 16000
+CHUNK = RATE // 50  # 20 ms blocks, as a browser or sound card delivers them
+
+
+def silence(seconds, rng):
+    return rng.normal(0, 20, int(RATE * seconds)).astype(np.int16)
+
+
+def tone(seconds, hz, amplitude):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * hz * t)).astype(np.int16)
+
+
+def speech(seconds, rng):
+    """Voiced bursts of 200-400 ms with 100-200 ms pauses, like syllables and words."""
+    parts, total = [], 0
+    while total < seconds * RATE:
+        burst = tone(rng.uniform(0.2, 0.4), rng.uniform(120, 220), rng.uniform(3000, 8000))
+        pause = silence(rng.uniform(0.1, 0.2), rng)
+        parts += [burst, pause]
+        total += len(burst) + len(pause)
+    return np.concatenate(parts)[:int(seconds * RATE)]
+
+
+def feed(gate, samples):
+    """Samples sent, segments ended and the in_speech state after each chunk."""
+    sent, ended, states = 0, 0, []
+    for start in range(0, len(samples), CHUNK):
+        out, segment_ended = gate.process(samples[start:start + CHUNK])
+        sent += 0 if out is None else len(out)
+        ended += segment_ended
+        states.append(gate.in_speech)
+    return sent, ended, states
+
+
+def test_silence_is_gated():
+    gate = VoiceActivityGate(RATE)
+    sent, ended, states = feed(gate, silence(2, np.random.default_rng(0)))
+    assert sent == 0 and ended == 0 and not any(states)
+
+
+def test_speech_passes_and_ends_after_hangover():
+    rng = np.random.default_rng(1)
+    gate = VoiceActivityGate(RATE)
+    feed(gate, silence(1, rng))
+    sent, ended, states = feed(gate, speech(6, rng))
+    # One segment spans the whole utterance, pauses included
+    assert gate.segments == 1 and all(states[20:])
+    assert sent >= 0.95 * 6 * RATE
+    _, ended, states = feed(gate, silence(1, rng))
+    assert ended == 1 and not states[-1]
+
+
+def test_constant_tone_does_not_hold_the_gate_open():
+    rng = np.random.default_rng(2)
+    gate = VoiceActivityGate(RATE)
+    feed(gate, silence(1, rng))
+    # Mains hum well above the room's noise floor: voiced-looking and steady
+    hum = tone(10, 100, 1000)
+    sent, ended, states = feed(gate, hum)
+    assert states[0] and ended == 1 and not states[-1]
+    assert sent < 0.6 * len(hum)
+    assert gate.stats()["noise_floor_db"] > -35
+
+    # Speech over the hum is still heard
+    sent, _, _ = feed(gate, hum[:RATE * 3] + speech(3, rng))
+    assert gate.segments > 1 and sent >= 0.9 * 3 * RATE
@@ -0,0 +1,68 @@
+import importlib
+import time
+
+import pytest
+
+from live_pool import LivePool
+
+JD = "Backend Engineer: build payment APIs in Go."
+
+
+@pytest.fixture(params=["chatbot", "chat"])
+def app_module(request, monkeypatch):
+    monkeypatch.setenv("FAKE_LIVE", "1")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    return importlib.import_module(request.param)
+
+
+def start_interview(app_module):
+    """Start an interview on the app's session manager and wait until it is live."""
+    interview = app_module.sessions.create(JD)
+    deadline = time.monotonic() + 5
+    while interview.state != "running":
+        assert time.monotonic() < deadline and not interview.future.done()
+        time.sleep(0.01)
+    return interview
+
+
+def test_cold_connect_keeps_jd_in_system_instruction(app_module):
+    assert app_module.live_pool.size == 0
+    interview = start_interview(app_module)
+    session = app_module.live_client.sessions[-1]
+    try:
+        assert interview.warm is False
+        assert JD in session.config["system_instruction"]
+        assert session.config["system_instruction"].startswith(app_module.BASE_SYSTEM_INSTRUCTION)
+        assert session.context == []
+    finally:
+        app_module.sessions.stop(interview.id)
+
+
+def test_warm_session_gets_jd_as_context_turn(app_module, monkeypatch):
+    client = app_module.live_client
+    pool = LivePool(lambda: client.aio.live.connect(model=app_module.model, config=app_module.config),
+                    size=1)
+    monkeypatch.setattr(app_module, "live_pool", pool)
+    pool.start(app_module.sessions.start().loop)
+    deadline = time.monotonic() + 5
+    while pool.stats()["idle"] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    warm_session = pool._idle[0].session
+
+    interview = start_interview(app_module)
+    try:
+        assert interview.warm is True
+        assert warm_session.config["system_instruction"] == app_module.BASE_SYSTEM_INSTRUCTION
+        assert len(warm_session.context) == 1
+        assert JD in warm_session.context[0].parts[0].text
+    finally:
+        app_module.sessions.stop(interview.id)
+        pool.size = 0
+
+
+def test_blank_jd_does_not_start_an_interview(app_module):
+    before = len(app_module.sessions.snapshot()["sessions"])
+    resp = app_module.app.test_client().post("/interview", json={"jd": "  \n\t "})
+    assert resp.status_code == 400
+    assert len(app_module.sessions.snapshot()["sessions"]) == before
@@ -0,0 +1,14 @@
+import time
+
+
+def test_start_latency_is_recorded_while_the_session_runs(audio_server):
+    manager, _ = audio_server()
+    interview = manager.create("JD")
+    deadline = time.monotonic() + 5
+    while interview.state != "running" and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert interview.state == "running"
+    assert manager.latency()["start_p50_ms"] is not None
+    manager.stop(interview.id)
+    assert len(manager.start_latencies) == 1
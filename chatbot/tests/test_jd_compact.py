@@ -0,0 +1,72 @@
+from jd_compact import compact_jd
+
+TECHNICAL_JD = """Senior Backend Engineer
+
+Responsibilities:
+- Build secure session handling with HTTP cookies
+- Own our privacy policy enforcement service
+- Implement the Apply now flow for job seekers
+- Maintain recruiting agencies integrations via ATS APIs
+- Add E-Verify status checks to the onboarding pipeline
+
+Requirements:
+- 5+ years of Python
+- Experience with reasonable accommodation request workflows in HR systems
+
+About Us
+We build hiring software used by thousands of companies.
+
+Acme is an equal opportunity employer. All qualified applicants will receive consideration
+without regard to race, color, religion, sex or national origin.
+If you need a reasonable accommodation during the application process, contact us.
+Please read our applicant privacy notice before applying.
+We do not accept unsolicited resumes from recruitment agencies.
+This site uses cookies to improve your experience.
+Apply now!
+© 2024 Acme Inc. All rights reserved.
+"""
+
+
+def test_technical_bullets_mentioning_notice_words_survive():
+    text = compact_jd(TECHNICAL_JD)["text"]
+    for line in ("Responsibilities:", "HTTP cookies", "privacy policy enforcement",
+                 "Apply now flow", "recruiting agencies integrations", "E-Verify status checks",
+                 "Requirements:", "reasonable accommodation request workflows"):
+        assert line in text
+
+
+def test_notice_paragraphs_are_removed():
+    result = compact_jd(TECHNICAL_JD)
+    text = result["text"]
+    for notice in ("equal opportunity employer", "without regard to", "contact us",
+                   "privacy notice", "unsolicited resumes", "uses cookies", "Apply now!",
+                   "All rights reserved"):
+        assert notice not in text
+    assert result["boilerplate"] == 7
+    assert "We build hiring software" in text
+
+
+def test_notice_words_inside_kept_sections_are_not_boilerplate():
+    jd = ("What you'll do:\n"
+          "Design the cookie consent service. Our privacy policy engine checks every request.\n")
+    result = compact_jd(jd)
+    assert result["boilerplate"] == 0
+    assert "privacy policy engine" in result["text"]
+
+
+def test_single_paragraph_over_budget_is_truncated_not_dropped():
+    result = compact_jd("x" * 20000, budget_tokens=10)
+    assert result["text"] and "x" * 20000 != result["text"]
+    assert set(result["text"]) == {"x"}
+    assert 0 < result["tokens_after"] <= 10
+    assert result["truncated"] == 1
+
+    words = compact_jd(" ".join(["word"] * 5000), budget_tokens=10)
+    assert words["text"].startswith("word word") and words["tokens_after"] <= 10
+
+
+def test_jd_that_compacts_to_nothing_falls_back_to_normalized_text():
+    result = compact_jd("We are an   equal opportunity employer.\n\n", budget_tokens=100)
+    assert result["text"] == "We are an equal opportunity employer."
+
+    assert compact_jd("   \n\t ")["text"] == ""
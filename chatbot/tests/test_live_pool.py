@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+import pytest
+
+from fake_live import FakeLiveClient
+from interview_sessions import SessionManager
+from live_pool import LivePool
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+@pytest.fixture
+def start_pool(loop):
+    """Factory for LivePools running on `loop`; their connections are closed after the test."""
+    pools = []
+
+    def start(connect, **kwargs):
+        pool = LivePool(connect, **kwargs)
+        pool.start(loop)
+        pools.append(pool)
+        return pool
+
+    yield start
+
+    async def close_all():
+        for pool in pools:
+            # Closing a slot refills the pool unless it is empty
+            pool.size = 0
+            if pool._retry_handle is not None:
+                pool._retry_handle.cancel()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(close_all(), loop).result(timeout=5)
+
+
+def run(loop, coro, timeout=10):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=timeout)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+async def lease(pool):
+    """Seconds to get a session from the pool, and whether it was warm."""
+    start = time.perf_counter()
+    async with pool.session() as (session, warm):
+        elapsed = time.perf_counter() - start
+        assert not session.closed
+    assert session.closed
+    return elapsed, warm
+
+
+def test_warm_acquire_is_faster_than_cold_connect(loop, start_pool):
+    client = FakeLiveClient(connect_delay=0.2)
+    cold = start_pool(lambda: client.aio.live.connect(model="fake"), size=0)
+    warm = start_pool(lambda: client.aio.live.connect(model="fake"), size=1)
+    assert wait_for(lambda: warm.stats()["idle"] == 1)
+
+    cold_seconds, cold_warm = run(loop, lease(cold))
+    warm_seconds, warm_warm = run(loop, lease(warm))
+    assert (cold_warm, warm_warm) == (False, True)
+    assert cold_seconds >= 0.2
+    assert warm_seconds < 0.05
+    assert (warm.warm_starts, cold.cold_starts) == (1, 1)
+    # The leased warm session is replaced right away
+    assert wait_for(lambda: warm.stats()["idle"] == 1)
+
+
+def test_hung_session_is_cancelled_after_stop_deadline():
+    cancelled = threading.Event()
+
+    async def run_session(interview):
+        interview.mark_running()
+        await interview.stop_event.wait()
+        try:
+            # Teardown that never finishes, e.g. a close on a dead connection
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    manager = SessionManager(run_session, stop_deadline=0.2).start()
+    interview = manager.create("JD")
+    assert wait_for(lambda: interview.state == "running")
+
+    start = time.perf_counter()
+    stats = manager.stop(interview.id)
+    assert time.perf_counter() - start < 1.0
+    assert cancelled.is_set()
+    assert interview.teardown_timed_out
+    assert manager.teardown_timeouts == 1
+    assert stats["state"] == "stopped"
+    assert manager.get(interview.id) is None
+
+
+def test_connect_failure_backs_off_and_retries(loop, start_pool):
+    client = FakeLiveClient()
+    attempts = []
+
+    @contextlib.asynccontextmanager
+    async def flaky_connect():
+        attempts.append(time.perf_counter())
+        if len(attempts) <= 3:
+            raise ConnectionError("network unreachable")
+        async with client.aio.live.connect(model="fake") as session:
+            yield session
+
+    pool = start_pool(flaky_connect, size=1, retry_delay=0.05, max_retry_delay=1.0)
+    assert wait_for(lambda: pool.stats()["idle"] == 1)
+    assert pool.failures == 3
+    # Delays double after each failure in a row: 0.05, 0.1, 0.2
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert all(gap >= 0.9 * delay for gap, delay in zip(gaps, (0.05, 0.1, 0.2)))
+    _, warm = run(loop, lease(pool))
+    assert warm
+
+
+def test_idle_sessions_are_recycled_after_max_idle(loop, start_pool):
+    client = FakeLiveClient()
+    pool = start_pool(lambda: client.aio.live.connect(model="fake"), size=1, max_idle=0.1)
+    assert wait_for(lambda: pool.expired >= 2)
+    first = client.sessions[0]
+    assert first.closed
+    # One fresh session is kept open in place of each expired one
+    assert wait_for(lambda: pool.stats()["idle"] == 1)
+    assert sum(not s.closed for s in client.sessions) == 1
+    _, warm = run(loop, lease(pool))
+    assert warm
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from pdf_extract import PdfExtractor
+
+CHATBOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def make_pdf(page_texts):
+    """Minimal PDF with one line of Helvetica text per page."""
+    count = len(page_texts)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(count))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {count} >>".encode()]
+    font = 3 + 2 * count
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> "
+                       f"/Contents {4 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+PAGES = [f"Page {i + 1} text" for i in range(10)]
+
+
+def test_parallel_matches_in_thread_extraction(tmp_path):
+    path = tmp_path / "jd.pdf"
+    path.write_bytes(make_pdf(PAGES))
+    serial = PdfExtractor(workers=1).extract_text(str(path))
+    extractor = PdfExtractor(workers=2, pages_per_task=3)
+    try:
+        assert list(extractor.iter_pages(path.read_bytes())) == PAGES
+        assert extractor.extract_text(str(path)) == serial == "\n".join(PAGES)
+        assert extractor.parallel == 1  # second call was a cache hit
+    finally:
+        extractor.close()
+
+
+def test_workers_do_not_import_the_callers_main(tmp_path):
+    pdf = tmp_path / "jd.pdf"
+    pdf.write_bytes(make_pdf(PAGES))
+    imports = tmp_path / "imports.log"
+    # Stands in for chatbot.py: an app __main__ that must be imported exactly once
+    app = tmp_path / "app.py"
+    app.write_text(textwrap.dedent(f"""
+        import sys
+        with open({str(imports)!r}, "a") as f:
+            f.write(__name__ + "\\n")
+        sys.path.insert(0, {os.path.abspath(CHATBOT_DIR)!r})
+        from pdf_extract import PdfExtractor
+
+        extractor = PdfExtractor(workers=2, pages_per_task=2)
+        text = extractor.extract_text({str(pdf)!r})
+        extractor.close()
+        assert extractor.parallel == 1
+        print(text)
+    """))
+    result = subprocess.run([sys.executable, str(app)], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split("\n")[:10] == PAGES
+    assert imports.read_text().split() == ["__main__"]
+
+
+def test_range_past_its_deadline_kills_and_replaces_the_worker(tmp_path):
+    path = tmp_path / "jd.pdf"
+    path.write_bytes(make_pdf(PAGES))
+    extractor = PdfExtractor(workers=2, pages_per_task=3, range_timeout=0)
+    try:
+        with pytest.raises(TimeoutError):
+            extractor.extract_text(str(path))
+        assert len(extractor.cache) == 0
+
+        extractor._pool.timeout = 30
+        assert extractor.extract_text(str(path)) == "\n".join(PAGES)
+        assert all(w.proc.poll() is None for w in extractor._pool._all)
+    finally:
+        extractor.close()
@@ -0,0 +1,100 @@
+import json
+import sys
+import threading
+
+import question_batch
+from question_batch import QuestionBatch, normalize_spec
+from question_gen import question_key
+from response_cache import ResponseCache
+from upstream import UpstreamClient
+
+SPEC = {"company_name": "Acme", "role": "Backend Engineer", "domain": "Payments",
+        "experience_level": "Senior", "question_type": "Technical", "difficulty": ["Easy", "Hard"],
+        "num_questions": 3}
+
+
+def prompt_for(params):
+    return f"{params['num_questions']} questions, {params['difficulty']}"
+
+
+def test_cache_is_used_off_the_upstream_loop(mock_server, tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "questions.db"))
+    threads = []
+    get_or_compute = cache.get_or_compute
+
+    def recording(key, compute):
+        threads.append(threading.current_thread().name)
+        return get_or_compute(key, compute)
+
+    cache.get_or_compute = recording
+    upstream = UpstreamClient("key", mock_server.url)
+    batch = QuestionBatch(upstream, prompt_for, cache=cache)
+    jobs, _ = batch.plan([SPEC])
+
+    rows = list(batch.run(jobs))
+    assert sorted(r["status"] for r in rows) == ["generated", "generated"]
+    assert len(threads) == 2 and "upstream-loop" not in threads
+
+    rows = list(batch.run(jobs))
+    assert [r["status"] for r in rows] == ["cached", "cached"]
+    assert all(len(r["questions"]) == 3 for r in rows)
+    assert mock_server.requests == 2
+
+
+def test_concurrent_batches_share_one_upstream_call(mock_server):
+    mock_server.latency = 0.3
+    cache = ResponseCache()
+    upstream = UpstreamClient("key", mock_server.url)
+    batches = [QuestionBatch(upstream, prompt_for, cache=cache) for _ in range(3)]
+    results = []
+
+    def run(batch):
+        jobs, _ = batch.plan([SPEC])
+        results.extend(batch.run(jobs))
+
+    workers = [threading.Thread(target=run, args=(b,)) for b in batches]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(timeout=10)
+
+    # Two unique specs, each generated once however many batches ask for it
+    assert mock_server.requests == 2
+    assert sorted(r["status"] for r in results).count("generated") == 2
+    assert len(results) == 6 and all(r["questions"] for r in results)
+
+
+def test_cli_runs_without_importing_an_app(mock_server, monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("GEMINI_API_BASE", mock_server.url)
+    monkeypatch.delenv("QUESTION_CACHE_DB", raising=False)
+    for name in ("chatbot", "chat"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    specs = tmp_path / "specs.jsonl"
+    specs.write_text(json.dumps(SPEC) + "\n")
+    output = tmp_path / "bank.jsonl"
+
+    question_batch.main([str(specs), "-o", str(output), "--style", "detailed"])
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["status"] for r in rows) == ["generated", "generated"]
+    assert all(len(r["questions"]) == 3 for r in rows)
+    assert "chatbot" not in sys.modules and "chat" not in sys.modules
+
+
+def test_cli_style_only_warms_that_apps_cache_entries(mock_server, monkeypatch, tmp_path):
+    db = str(tmp_path / "questions.db")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("GEMINI_API_BASE", mock_server.url)
+    monkeypatch.setenv("QUESTION_CACHE_DB", db)
+    spec = {**SPEC, "difficulty": "Hard"}
+    specs = tmp_path / "specs.jsonl"
+    specs.write_text(json.dumps(spec) + "\n")
+
+    question_batch.main([str(specs), "-o", str(tmp_path / "bank.jsonl"), "--style", "detailed"])
+
+    params = normalize_spec(spec, default_count=15)
+    cache = ResponseCache(path=db)
+    assert cache.get(question_key(params, "detailed")) is not None
+    # chat.py's detailed set must not be served by chatbot.py's brief endpoint
+    assert cache.get(question_key(params, "brief")) is None
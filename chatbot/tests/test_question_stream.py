@@ -0,0 +1,85 @@
+import importlib
+import json
+import threading
+
+import pytest
+
+from response_cache import ResponseCache
+from upstream import UpstreamClient
+
+SPEC = {"company_name": "Acme", "role": "Backend Engineer", "domain": "Payments",
+        "experience_level": "Senior", "question_type": "Technical", "difficulty": "Hard",
+        "num_questions": 3}
+
+
+@pytest.fixture(params=["chatbot", "chat"])
+def app_module(request, monkeypatch, mock_server):
+    monkeypatch.setenv("FAKE_LIVE", "1")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    app = importlib.import_module(request.param)
+    monkeypatch.setattr(app, "upstream", UpstreamClient("key", mock_server.url))
+    monkeypatch.setattr(app, "question_cache", ResponseCache())
+    return app
+
+
+def events(body):
+    """(event, data) pairs from an SSE response body."""
+    parsed = []
+    for block in body.decode("utf-8").strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        parsed.append((lines.get("event"), json.loads(lines["data"])))
+    return parsed
+
+
+def test_concurrent_streams_share_one_upstream_call(app_module, mock_server):
+    mock_server.latency = 0.5
+    barrier = threading.Barrier(5)
+    streamed, plain = [], []
+
+    def stream():
+        client = app_module.app.test_client()
+        barrier.wait()
+        streamed.append(events(client.post("/generate-questions", json={**SPEC, "stream": True}).data))
+
+    def fetch():
+        client = app_module.app.test_client()
+        barrier.wait()
+        plain.append(client.post("/generate-questions", json=SPEC))
+
+    threads = [threading.Thread(target=stream) for _ in range(4)] + [threading.Thread(target=fetch)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert mock_server.requests == 1
+    assert len(streamed) == 4
+    for body in streamed:
+        assert [event for event, _ in body] == ["question"] * 3 + ["done"]
+        assert [data for _, data in body[:3]] == [data for _, data in streamed[0][:3]]
+    # Exactly one request, streamed or not, led the upstream call
+    leaders = [not body[-1][1]["cached"] for body in streamed] + [plain[0].headers["X-Cache"] == "MISS"]
+    assert plain[0].status_code == 200 and sum(leaders) == 1
+
+
+def test_stream_failure_reaches_coalesced_streams(app_module, mock_server):
+    mock_server.latency = 0.5
+    mock_server.fail_next = 10
+    app_module.upstream.retries = 0
+    barrier = threading.Barrier(3)
+    streamed = []
+
+    def stream():
+        client = app_module.app.test_client()
+        barrier.wait()
+        streamed.append(events(client.post("/generate-questions", json={**SPEC, "stream": True}).data))
+
+    threads = [threading.Thread(target=stream) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert mock_server.requests == 1
+    assert [body[-1][0] for body in streamed] == ["error"] * 3
+    assert app_module.question_cache.stats()["entries"] == 0
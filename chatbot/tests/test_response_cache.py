@@ -0,0 +1,106 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+from question_batch import normalize_spec
+from question_gen import question_key
+from response_cache import ResponseCache, cache_key
+
+SPEC = {"company_name": "Acme", "role": "Backend Engineer", "domain": "Payments",
+        "experience_level": "Senior", "question_type": "Technical", "difficulty": "Hard"}
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl=0.05)
+    cache.put("k", [1])
+    assert cache.get("k") == [1]
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")
+    cache.put("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(path=path).get_or_compute("k", lambda: [{"id": 1}])
+    cache = ResponseCache(path=path)
+    assert cache.get_or_compute("k", lambda: pytest.fail("recomputed")) == ([{"id": 1}], "hit")
+    assert cache.stats()["backend"] == "sqlite"
+
+
+def test_single_flight_error_reaches_waiters_and_is_not_cached():
+    cache = ResponseCache()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            results.append(cache.get_or_compute("k", compute))
+        except RuntimeError as e:
+            results.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=call) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    while cache.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["upstream down"] * 4
+    assert cache.stats()["entries"] == 0
+    assert cache.get_or_compute("k", lambda: [1]) == ([1], "miss")
+
+
+def test_num_questions_is_normalized_before_keying():
+    assert cache_key(normalize_spec({**SPEC, "num_questions": 10})) == \
+        cache_key(normalize_spec({**SPEC, "num_questions": "10"}))
+    with pytest.raises(ValueError):
+        normalize_spec({**SPEC, "num_questions": "ten"})
+
+
+def test_prompt_styles_and_models_do_not_share_keys():
+    params = normalize_spec({**SPEC, "num_questions": 10})
+    assert question_key(params, "brief") != question_key(params, "detailed")
+    assert question_key(params, "brief") != question_key(params, "brief", model="other-model")
+    assert question_key(params, "brief") == question_key(normalize_spec({**SPEC, "num_questions": "10"}),
+                                                         "brief")
+
+
+@pytest.mark.parametrize("name", ["chatbot", "chat"])
+def test_apps_share_one_entry_for_int_and_string_counts(name, monkeypatch):
+    monkeypatch.setenv("FAKE_LIVE", "1")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    app = importlib.import_module(name)
+    cache = ResponseCache()
+    monkeypatch.setattr(app, "question_cache", cache)
+    monkeypatch.setattr(app, "fetch_questions", lambda *args, **kwargs: [{"id": 1}])
+
+    client = app.app.test_client()
+    first = client.post("/generate-questions", json={**SPEC, "num_questions": 10})
+    second = client.post("/generate-questions", json={**SPEC, "num_questions": "10"})
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert client.post("/generate-questions", json={**SPEC, "num_questions": "ten"}).status_code == 400
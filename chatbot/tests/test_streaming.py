@@ -0,0 +1,27 @@
+import pytest
+
+from streaming import JsonArrayStream, iter_json_array, parse_json_array
+
+QUESTIONS = '[{"id": 1, "question": "Why?"}, {"id": 2, "question": "How?"}]'
+
+
+def test_elements_are_returned_as_they_complete():
+    parser = JsonArrayStream()
+    assert parser.feed("```json\n") == []
+    assert parser.feed('[{"id": 1, "question": "Why?"}, {"id": 2') == [{"id": 1, "question": "Why?"}]
+    assert parser.feed(', "question": "How?"}]\n```') == [{"id": 2, "question": "How?"}]
+    assert parser.finish() == []
+
+
+def test_preamble_with_brackets_falls_back_to_whole_reply():
+    reply = f"Here are [2] questions:\n{QUESTIONS}"
+    chunks = [reply[i:i + 7] for i in range(0, len(reply), 7)]
+    assert [q["id"] for q in iter_json_array(chunks)] == [1, 2]
+    assert [q["id"] for q in parse_json_array(reply)] == [1, 2]
+
+
+def test_unclosed_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array(['[{"id": 1}, {"id"']))
+    with pytest.raises(ValueError):
+        parse_json_array("Sorry, I can't help with [that].")
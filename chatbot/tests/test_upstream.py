@@ -0,0 +1,106 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+
+from upstream import UpstreamClient, UpstreamError, response_text
+
+
+def run(client, coro):
+    client.start()
+    return asyncio.run_coroutine_threadsafe(coro, client.loop).result(timeout=30)
+
+
+def test_503_is_retried_then_succeeds(mock_server):
+    mock_server.fail_next = 2
+    client = UpstreamClient("key", mock_server.url, retries=3, backoff=0.01)
+    text = client.generate_text("gemini-2.5-flash", "5 questions")
+    assert "Mock question 5?" in text
+    assert mock_server.requests == 3
+    assert (client.retried, client.failures) == (2, 0)
+
+
+def test_503_after_last_retry_is_raised(mock_server):
+    mock_server.fail_next = 10
+    client = UpstreamClient("key", mock_server.url, retries=2, backoff=0.01)
+    with pytest.raises(UpstreamError) as raised:
+        client.generate_text("gemini-2.5-flash", "5 questions")
+    assert raised.value.status == 503
+    assert mock_server.requests == 3
+
+
+def test_deadline_raises_upstream_error(mock_server):
+    mock_server.latency = 1.0
+    client = UpstreamClient("key", mock_server.url)
+    start = time.monotonic()
+    with pytest.raises(UpstreamError) as raised:
+        client.generate_text("gemini-2.5-flash", "5 questions", deadline=0.2)
+    assert raised.value.status == 504
+    assert time.monotonic() - start < 0.9
+    assert client.timeouts == 1
+
+
+def test_upstream_504_is_not_counted_as_a_timeout(mock_server):
+    mock_server.fail_next = 10
+    mock_server.fail_status = 504
+    client = UpstreamClient("key", mock_server.url, retries=1, backoff=0.01)
+    with pytest.raises(UpstreamError) as raised:
+        client.generate_text("gemini-2.5-flash", "5 questions")
+    assert raised.value.status == 504
+    assert (client.failures, client.timeouts) == (1, 0)
+
+
+def test_deadline_covers_a_slow_trickling_body(mock_server):
+    mock_server.trickle = 2.0
+    client = UpstreamClient("key", mock_server.url, retries=0)
+    start = time.monotonic()
+    with pytest.raises(UpstreamError) as raised:
+        client.generate_text("gemini-2.5-flash", "20 questions", deadline=0.3)
+    assert raised.value.status == 504
+    assert time.monotonic() - start < 1.0
+    assert client.timeouts == 1
+
+
+def test_route_maps_deadline_to_504(mock_server, monkeypatch):
+    monkeypatch.setenv("FAKE_LIVE", "1")
+    app_module = importlib.import_module("chatbot")
+    mock_server.latency = 1.0
+    monkeypatch.setattr(app_module, "upstream", UpstreamClient("key", mock_server.url, deadline=0.2))
+
+    resp = app_module.app.test_client().post("/text-chat", json={"prompt": "hello"})
+    assert resp.status_code == 504
+    assert "Deadline exceeded" in resp.get_json()["error"]
+
+
+def test_in_flight_requests_never_exceed_max_concurrency(mock_server):
+    mock_server.latency = 0.02
+    client = UpstreamClient("key", mock_server.url, max_concurrency=4, max_connections=16)
+    seen = []
+
+    async def call():
+        response_text(await client.generate_content("gemini-2.5-flash", "2 questions"))
+        seen.append(client.in_flight)
+
+    async def burst():
+        await asyncio.gather(*(call() for _ in range(40)))
+
+    run(client, burst())
+    assert mock_server.requests == 40
+    assert mock_server.max_active == 4
+    assert max(seen) <= 4
+    assert client.stats()["in_flight"] == 0
+
+
+def test_connections_are_reused(mock_server):
+    mock_server.latency = 0.005
+    client = UpstreamClient("key", mock_server.url, max_concurrency=8, max_connections=8)
+
+    async def burst():
+        for _ in range(5):
+            await asyncio.gather(*(client.generate_content("gemini-2.5-flash", "1 question")
+                                   for _ in range(40)))
+
+    run(client, burst())
+    assert mock_server.requests == 200
+    assert mock_server.connections <= 8
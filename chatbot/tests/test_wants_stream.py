@@ -0,0 +1,25 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture(params=["chatbot", "chat"])
+def app_module(request, monkeypatch):
+    monkeypatch.setenv("FAKE_LIVE", "1")
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    return importlib.import_module(request.param)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("true", True), ("1", True), ("Yes", True), (True, True),
+    ("false", False), ("0", False), ("no", False), ("", False), (False, False), (None, False),
+])
+def test_stream_flag_parses_alike_from_json_and_form(app_module, value, expected):
+    with app_module.app.test_request_context():
+        assert app_module.wants_stream({"stream": value}) is expected
+
+
+def test_form_false_returns_json(app_module):
+    client = app_module.app.test_client()
+    resp = client.post("/extract-pdf", data={"stream": "false", "file": (b"%PDF-", "x.pdf")})
+    assert resp.mimetype == "application/json"
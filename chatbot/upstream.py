@@ -0,0 +1,285 @@
+import asyncio
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+
+import httpx
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Connections per httpx pool; httpcore's request-to-connection assignment is
+# quadratic in pool size, so large pools are split into shards of this size
+CONNECTIONS_PER_SHARD = 8
+
+
+class UpstreamError(Exception):
+    """Gemini call failed for good; `status` is the HTTP status (None for network errors)."""
+
+    def __init__(self, message, status=None, raw=None):
+        super().__init__(message)
+        self.status = status
+        self.raw = raw
+
+
+class DeadlineExceeded(UpstreamError):
+    """The request's own deadline ran out; reported as 504 like a gateway timeout."""
+
+    def __init__(self, message="Deadline exceeded"):
+        super().__init__(message, status=504)
+
+
+def response_text(resp_json):
+    """Concatenated text of the first candidate of a generateContent response."""
+    candidates = resp_json.get("candidates") or []
+    if not candidates:
+        raise UpstreamError("No candidates returned from Gemini", raw=resp_json)
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(p.get("text", "") for p in parts)
+
+
+class UpstreamClient:
+    """
+    Shared client for Gemini REST text generation.
+
+    All calls run on one background event loop over a shared set of
+    keep-alive connections (`max_connections`, spread over a few
+    `httpx.AsyncClient` pools), so a Flask thread only waits on a future and
+    never owns a connection. At most `max_concurrency` requests are in
+    flight upstream; the rest queue for a slot. Failed attempts (network
+    errors, 408/429/5xx) are retried with full-jitter exponential backoff,
+    honouring Retry-After, and nothing (queueing, attempts, sleeps) runs
+    past the request's deadline.
+    """
+
+    def __init__(self, api_key, base_url=DEFAULT_BASE_URL, max_concurrency=16,
+                 max_connections=32, retries=3, backoff=0.5, max_backoff=8.0, deadline=60.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+
+        self.loop = None
+        self._pools = None
+        self._slots = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def start(self):
+        """Start the background loop and connection pool (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever,
+                                            name="upstream-loop", daemon=True)
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+        return self
+
+    async def _open(self):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        shards = -(-self.max_connections // CONNECTIONS_PER_SHARD)
+        per_shard = -(-self.max_connections // shards)
+        self._pools = itertools.cycle([
+            httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=per_shard,
+                                    max_keepalive_connections=per_shard),
+                headers={"x-goog-api-key": self.api_key or ""},
+            )
+            for _ in range(shards)
+        ])
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _acquire(self, expires):
+        self.requests += 1
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), max(expires - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DeadlineExceeded("Deadline exceeded waiting for an upstream slot")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def post_json(self, path, payload, deadline=None):
+        """POST `payload` to `path` with retries; returns the decoded JSON body."""
+        expires = time.monotonic() + (deadline or self.deadline)
+        await self._acquire(expires)
+        try:
+            attempt = 0
+            while True:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded()
+                retry_after = None
+                try:
+                    # httpx applies `timeout` to each connect/read/write, not to the
+                    # whole exchange, so the deadline is enforced around the call
+                    async with asyncio.timeout(remaining):
+                        resp = await next(self._pools).post(f"{self.base_url}/{path}",
+                                                            json=payload, timeout=remaining)
+                    if resp.status_code < 400:
+                        return resp.json()
+                    error = UpstreamError(f"Gemini returned HTTP {resp.status_code}",
+                                          status=resp.status_code, raw=resp.text)
+                    if resp.status_code not in RETRY_STATUSES:
+                        raise error
+                    if resp.headers.get("retry-after", "").isdigit():
+                        retry_after = float(resp.headers["retry-after"])
+                except (httpx.TimeoutException, TimeoutError):
+                    error = DeadlineExceeded()
+                except httpx.TransportError as e:
+                    error = UpstreamError(f"Upstream connection failed: {e}")
+
+                delay = self._backoff_delay(attempt, retry_after)
+                if attempt >= self.retries or time.monotonic() + delay >= expires:
+                    raise error
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(delay)
+        except UpstreamError as e:
+            self.failures += 1
+            # Only our own deadline; an HTTP 504 from upstream is an ordinary failure
+            self.timeouts += isinstance(e, DeadlineExceeded)
+            raise
+        finally:
+            self._release()
+
+    async def stream_content(self, model, prompt, deadline=None):
+        """
+        Yield text deltas from streamGenerateContent as they arrive (SSE).
+
+        Failures before the first delta are retried like `post_json`; once
+        text has been yielded the stream cannot be replayed, so later
+        failures are raised to the caller. The deadline cancels the task
+        iterating this generator, so consume it from one task (as
+        `stream_text` does).
+        """
+        expires = time.monotonic() + (deadline or self.deadline)
+        url = f"{self.base_url}/models/{model}:streamGenerateContent?alt=sse"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        await self._acquire(expires)
+        try:
+            attempt = 0
+            started = False
+            while True:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded()
+                retry_after = None
+                try:
+                    async with asyncio.timeout(remaining), \
+                            next(self._pools).stream("POST", url, json=payload,
+                                                     timeout=remaining) as resp:
+                        if resp.status_code < 400:
+                            async for line in resp.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                chunk = json.loads(line[5:])
+                                # Trailing chunks may carry only usage metadata
+                                text = response_text(chunk) if chunk.get("candidates") else ""
+                                if text:
+                                    started = True
+                                    yield text
+                            return
+                        raw = (await resp.aread()).decode("utf-8", "replace")
+                        error = UpstreamError(f"Gemini returned HTTP {resp.status_code}",
+                                              status=resp.status_code, raw=raw)
+                        if resp.status_code not in RETRY_STATUSES:
+                            raise error
+                        if resp.headers.get("retry-after", "").isdigit():
+                            retry_after = float(resp.headers["retry-after"])
+                except (httpx.TimeoutException, TimeoutError):
+                    error = DeadlineExceeded()
+                except httpx.TransportError as e:
+                    error = UpstreamError(f"Upstream connection failed: {e}")
+
+                delay = self._backoff_delay(attempt, retry_after)
+                if started or attempt >= self.retries or time.monotonic() + delay >= expires:
+                    raise error
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(delay)
+        except UpstreamError as e:
+            self.failures += 1
+            # Only our own deadline; an HTTP 504 from upstream is an ordinary failure
+            self.timeouts += isinstance(e, DeadlineExceeded)
+            raise
+        finally:
+            self._release()
+
+    async def generate_content(self, model, prompt, deadline=None):
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        return await self.post_json(f"models/{model}:generateContent", payload, deadline)
+
+    def generate_text(self, model, prompt, deadline=None):
+        """Blocking helper for Flask views: run on the shared loop and wait for the text."""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(
+            self.generate_content(model, prompt, deadline), self.loop)
+        return response_text(future.result())
+
+    def stream_text(self, model, prompt, deadline=None):
+        """
+        Blocking iterator over `stream_content` deltas for Flask streaming
+        responses. Closing it early (client went away) cancels the upstream call.
+        """
+        self.start()
+        deltas = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for text in self.stream_content(model, prompt, deadline):
+                    deltas.put(text)
+            except Exception as e:
+                deltas.put(e)
+            finally:
+                deltas.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = deltas.get()
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retried": self.retried,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+        }
@@ -0,0 +1,345 @@
+"""
+Headless batch emotion analysis for recorded videos and image folders.
+
+    python emotion_batch.py interview1.mp4 interview2.mp4 stills/ -o results.jsonl
+
+Frames are decoded on a background thread, grouped into chunks and fanned out
+to a process pool where every worker holds its own copy of the face detector
+and model. Each worker detects faces for the whole chunk and classifies all of
+them in a single batched forward pass. Results come back in frame order and
+are streamed to JSONL (or Parquet, if pyarrow is installed), one row per face.
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from emotion_config import (add_backend_arguments, add_detector_arguments, default_model_path,
+                            detector_options)
+from emotion_inference import EMOTION_LABELS
+from face_detection import FaceDetector
+from face_tracking import box_iou
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+# ------------------------------
+# Background frame reader
+# ------------------------------
+def iter_frames(source, every=1):
+    """Yield (frame_index, timestamp_seconds, gray_frame) for a video file or image folder."""
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTENSIONS))
+        for index, name in enumerate(names[::every]):
+            gray = cv2.imread(os.path.join(source, name), cv2.IMREAD_GRAYSCALE)
+            if gray is not None:
+                yield index * every, None, gray
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    index = 0
+    try:
+        while True:
+            # grab() skips decoding of frames we are not going to analyse
+            if not cap.grab():
+                break
+            if index % every == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                timestamp = index / fps if fps > 0 else cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                yield index, timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            index += 1
+    finally:
+        cap.release()
+
+
+class FrameReader:
+    """Decodes frames on a daemon thread and hands them out in fixed-size chunks."""
+
+    _END = object()
+
+    def __init__(self, sources, chunk_size=64, every=1, max_chunks=8):
+        self.sources = sources
+        self.chunk_size = chunk_size
+        self.every = every
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+
+    def _run(self):
+        try:
+            for source in self.sources:
+                chunk = []
+                for index, timestamp, gray in iter_frames(source, self.every):
+                    chunk.append((index, timestamp, gray))
+                    if len(chunk) >= self.chunk_size:
+                        self._queue.put((source, chunk))
+                        chunk = []
+                if chunk:
+                    self._queue.put((source, chunk))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue.put(self._END)
+
+    def __iter__(self):
+        self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+
+# ------------------------------
+# Process pool workers
+# ------------------------------
+_worker = {}
+
+
+def _init_worker(backend, model_path, threads_per_worker, detector_kwargs):
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    cv2.setNumThreads(threads_per_worker)
+
+    from emotion_inference import load_backend
+
+    if backend == "keras":
+        try:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        except (ImportError, RuntimeError):
+            pass
+
+    _worker["model"] = load_backend(backend, model_path, num_threads=threads_per_worker)
+    _worker["detector"] = FaceDetector(**detector_kwargs)
+
+
+def _process_chunk(chunk):
+    """Detect faces in every frame of the chunk, then classify all faces in one batch."""
+    detect_faces = _worker["detector"]
+    model = _worker["model"]
+
+    per_frame = [(index, timestamp, gray, detect_faces(gray)) for index, timestamp, gray in chunk]
+
+    # Size the model's reusable batch buffer once for the whole chunk, then
+    # resize the crops straight into it
+    model.buffer.ensure_capacity(sum(len(faces) for *_, faces in per_frame))
+    count = 0
+    for _, _, gray, faces in per_frame:
+        for box in faces:
+            model.buffer.put(count, gray, box)
+            count += 1
+
+    probs = model.predict_batch(model.buffer.batch(count)) if count else None
+
+    results, offset = [], 0
+    for index, timestamp, _, faces in per_frame:
+        frame_probs = probs[offset:offset + len(faces)] if faces else []
+        offset += len(faces)
+        results.append((index, timestamp, faces, [p.tolist() for p in frame_probs]))
+    return results
+
+
+# ------------------------------
+# Track IDs across frames
+# ------------------------------
+class IoUTrackAssigner:
+    """Gives faces in consecutive frames the same ID when their boxes overlap."""
+
+    def __init__(self, iou_threshold=0.3):
+        self.iou_threshold = iou_threshold
+        self.previous = []
+        self.next_id = 1
+
+    def reset(self):
+        self.previous = []
+
+    def assign(self, faces):
+        pairs = sorted(
+            ((box_iou(prev_box, box), pi, fi)
+             for pi, (_, prev_box) in enumerate(self.previous)
+             for fi, box in enumerate(faces)),
+            reverse=True,
+        )
+        ids = [None] * len(faces)
+        used = set()
+        for iou, pi, fi in pairs:
+            if iou < self.iou_threshold:
+                break
+            if pi in used or ids[fi] is not None:
+                continue
+            used.add(pi)
+            ids[fi] = self.previous[pi][0]
+        for fi in range(len(faces)):
+            if ids[fi] is None:
+                ids[fi] = self.next_id
+                self.next_id += 1
+        self.previous = list(zip(ids, faces))
+        return ids
+
+
+# ------------------------------
+# Public API
+# ------------------------------
+def analyze(sources, backend="keras", model_path=None, workers=None, chunk_size=64, every=1,
+            detector_kwargs=None):
+    """
+    Yield one result dict per detected face, in frame order per source:
+    {"source", "frame", "timestamp", "track_id", "box", "emotion", "probs"}.
+
+    `detector_kwargs` are passed to `face_detection.FaceDetector` in every worker.
+    """
+    model_path = model_path or default_model_path(backend)
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    reader = FrameReader(sources, chunk_size=chunk_size, every=every, max_chunks=workers * 2)
+    assigner = IoUTrackAssigner()
+
+    # Spawn, not fork: workers import TensorFlow themselves
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(backend, model_path, threads_per_worker,
+                                       detector_kwargs or {})) as pool:
+        pending = collections.deque()
+        current_source = None
+
+        def drain_one():
+            nonlocal current_source
+            source, future = pending.popleft()
+            if source != current_source:
+                assigner.reset()
+                current_source = source
+            for index, timestamp, faces, probs in future.result():
+                for track_id, box, p in zip(assigner.assign(faces), faces, probs):
+                    yield {
+                        "source": source,
+                        "frame": index,
+                        "timestamp": timestamp,
+                        "track_id": track_id,
+                        "box": list(box),
+                        "emotion": EMOTION_LABELS[int(np.argmax(p))],
+                        "probs": p,
+                    }
+
+        for source, chunk in reader:
+            pending.append((source, pool.submit(_process_chunk, chunk)))
+            # Keep a bounded number of chunks in flight
+            if len(pending) >= workers * 2:
+                yield from drain_one()
+        while pending:
+            yield from drain_one()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, row):
+        self._file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter:
+    """Buffers rows and writes them as Parquet row groups (requires pyarrow)."""
+
+    def __init__(self, path, row_group_size=10000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ ERROR: Parquet output needs pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._schema = pa.schema([
+            ("source", pa.string()),
+            ("frame", pa.int64()),
+            ("timestamp", pa.float64()),
+            ("track_id", pa.int64()),
+            ("box", pa.list_(pa.int32())),
+            ("emotion", pa.string()),
+            ("probs", pa.list_(pa.float32())),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+        self._row_group_size = row_group_size
+
+    def write(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(path):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch emotion analysis for videos and image folders.")
+    parser.add_argument("sources", nargs="+", help="video files and/or directories of images")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output path (.jsonl or .parquet); '-' writes JSONL to stdout")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="frames per worker task")
+    parser.add_argument("--every", type=int, default=1, help="analyse every Nth frame")
+    add_backend_arguments(parser)
+    add_detector_arguments(parser)
+    args = parser.parse_args(argv)
+
+    for source in args.sources:
+        if not os.path.exists(source):
+            parser.error(f"not found: {source}")
+    model_path = args.model or default_model_path(args.backend)
+    if not os.path.exists(model_path):
+        parser.error(f"model file not found: {model_path}")
+
+    writer = open_writer(args.output)
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for row in analyze(args.sources, backend=args.backend, model_path=model_path,
+                           workers=args.workers, chunk_size=args.chunk_size,
+                           every=max(1, args.every),
+                           detector_kwargs=detector_options(args)):
+            writer.write(row)
+            rows += 1
+    finally:
+        writer.close()
+
+    print(f"✓ {rows} face results in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
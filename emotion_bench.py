@@ -0,0 +1,293 @@
+"""
+Reproducible benchmark for the detection + inference path, no webcam needed.
+
+    python emotion_bench.py --backends keras tflite -o bench.json
+    python emotion_bench.py --backends keras --baseline bench.json --max-regression 0.10
+
+Frames with 0, 1, 5 and 30 synthetic faces are generated deterministically
+(or loaded from --fixtures, together with their ground-truth boxes) and
+replayed through face detection and every backend / batching mode. Inference
+uses the ground-truth boxes, so every case classifies exactly the intended
+number of faces even where the Haar cascade would miss a drawn face.
+
+Each backend runs in a fresh process, so peak RSS is measured per backend.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from emotion_config import BACKEND_EXTENSIONS, default_model_path
+
+FACE_COUNTS = (0, 1, 5, 30)
+FRAME_SIZE = (1280, 720)
+BATCHING_MODES = ("batched", "per-face")
+
+
+# ------------------------------
+# Fixtures
+# ------------------------------
+def draw_face(frame, x, y, size, rng):
+    """Draw a crude frontal face (head, eyes, brows, nose, mouth) into a BGR frame."""
+    cx, cy = x + size // 2, y + size // 2
+    skin = int(rng.integers(150, 210))
+    cv2.ellipse(frame, (cx, cy), (size * 2 // 5, size // 2), 0, 0, 360, (skin, skin, skin), -1)
+    eye_dy, eye_dx = size // 8, size // 6
+    for sign in (-1, 1):
+        cv2.ellipse(frame, (cx + sign * eye_dx, cy - eye_dy), (size // 14, size // 24), 0, 0, 360,
+                    (40, 40, 40), -1)
+        cv2.line(frame, (cx + sign * eye_dx - size // 12, cy - eye_dy - size // 10),
+                 (cx + sign * eye_dx + size // 12, cy - eye_dy - size // 10), (60, 60, 60), 2)
+    cv2.line(frame, (cx, cy - size // 20), (cx, cy + size // 12), (110, 110, 110), 2)
+    cv2.ellipse(frame, (cx, cy + size // 5), (size // 6, size // 16), 0, 0, 180, (70, 70, 70), 2)
+
+
+def generate_fixture(num_faces, seed=0):
+    """Deterministic 720p frame with `num_faces` faces laid out on a grid; returns (frame, boxes)."""
+    rng = np.random.default_rng(seed + num_faces)
+    width, height = FRAME_SIZE
+    noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    frame = cv2.resize(noise, FRAME_SIZE, interpolation=cv2.INTER_CUBIC)
+
+    boxes = []
+    if num_faces:
+        cols = int(np.ceil(np.sqrt(num_faces * width / height)))
+        rows = int(np.ceil(num_faces / cols))
+        cell = min(width // cols, height // rows)
+        size = int(cell * 0.8)
+        for i in range(num_faces):
+            row, col = divmod(i, cols)
+            x = col * cell + (cell - size) // 2
+            y = row * cell + (cell - size) // 2
+            draw_face(frame, x, y, size, rng)
+            boxes.append((x, y, size, size))
+    return frame, boxes
+
+
+def load_fixtures(fixture_dir=None, seed=0):
+    """
+    {num_faces: (frame, boxes)}. With `fixture_dir`, frames are read from
+    `faces_<n>.png` and boxes from `boxes.json`; missing files are generated
+    and written there so later runs replay the exact same pixels.
+    """
+    fixtures = {}
+    boxes_path = os.path.join(fixture_dir, "boxes.json") if fixture_dir else None
+    saved_boxes = {}
+    if boxes_path and os.path.exists(boxes_path):
+        with open(boxes_path) as f:
+            saved_boxes = json.load(f)
+
+    for n in FACE_COUNTS:
+        frame = None
+        if fixture_dir:
+            path = os.path.join(fixture_dir, f"faces_{n}.png")
+            if os.path.exists(path) and str(n) in saved_boxes:
+                frame = cv2.imread(path)
+                boxes = [tuple(b) for b in saved_boxes[str(n)]]
+        if frame is None:
+            frame, boxes = generate_fixture(n, seed)
+            if fixture_dir:
+                os.makedirs(fixture_dir, exist_ok=True)
+                cv2.imwrite(os.path.join(fixture_dir, f"faces_{n}.png"), frame)
+                saved_boxes[str(n)] = [list(b) for b in boxes]
+        fixtures[n] = (frame, boxes)
+
+    if boxes_path:
+        with open(boxes_path, "w") as f:
+            json.dump(saved_boxes, f, indent=2)
+    return fixtures
+
+
+# ------------------------------
+# Measurement
+# ------------------------------
+def _percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99)) * 1000
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(backend, model_path, fixture_dir, seed, frames, warmup, detector_kwargs):
+    """Benchmark one backend on all fixtures; meant to run in its own process."""
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+    from emotion_inference import load_backend
+    from face_detection import FaceDetector
+
+    fixtures = load_fixtures(fixture_dir, seed)
+    detect_faces = FaceDetector(**detector_kwargs)
+
+    start = time.perf_counter()
+    model = load_backend(backend, model_path)
+    model.warmup()
+    load_seconds = time.perf_counter() - start
+
+    cases = []
+    for n, (frame, boxes) in fixtures.items():
+        for mode in BATCHING_MODES:
+            if mode == "per-face" and n <= 1:
+                continue
+
+            def infer(gray):
+                if mode == "batched":
+                    model.predict_faces(gray, boxes)
+                else:
+                    for box in boxes:
+                        model.predict_faces(gray, [box])
+
+            for _ in range(warmup):
+                infer(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+            totals, detects, infers = [], [], []
+            detected = 0
+            for _ in range(frames):
+                t0 = time.perf_counter()
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                detected = len(detect_faces(gray))
+                t1 = time.perf_counter()
+                infer(gray)
+                t2 = time.perf_counter()
+                totals.append(t2 - t0)
+                detects.append(t1 - t0)
+                infers.append(t2 - t1)
+
+            elapsed = sum(totals)
+            cases.append({
+                "backend": backend,
+                "mode": mode,
+                "faces": n,
+                "detected": detected,
+                "frames": frames,
+                "fps": frames / elapsed,
+                "faces_per_sec": frames * n / elapsed,
+                "latency": _percentiles(totals),
+                "detect_latency": _percentiles(detects),
+                "infer_latency": _percentiles(infers),
+            })
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+        "cases": cases,
+    }
+
+
+def _run_backend_safely(kwargs):
+    try:
+        return run_backend(**kwargs)
+    except Exception as e:
+        return {"backend": kwargs["backend"], "error": f"{type(e).__name__}: {e}"}
+
+
+def case_key(case):
+    return f"{case['backend']}/{case['mode']}/{case['faces']}"
+
+
+def compare(results, baseline, max_regression):
+    """Print fps change per case against `baseline`; return the keys that regressed."""
+    old = {case_key(c): c for r in baseline.get("backends", []) for c in r.get("cases", [])}
+    regressed = []
+    print("\nAgainst baseline:")
+    for r in results["backends"]:
+        for case in r.get("cases", []):
+            key = case_key(case)
+            if key not in old:
+                continue
+            change = case["fps"] / old[key]["fps"] - 1.0
+            flag = ""
+            if change < -max_regression:
+                regressed.append(key)
+                flag = "  ❌ regression"
+            print(f"  {key:<24} {old[key]['fps']:9.1f} -> {case['fps']:9.1f} fps ({change:+.1%}){flag}")
+    return regressed
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def main(argv=None):
+    from emotion_config import add_detector_arguments, detector_options
+
+    parser = argparse.ArgumentParser(description="Benchmark emotion detection on fixed fixtures.")
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKEND_EXTENSIONS),
+                        default=["keras"])
+    parser.add_argument("--model", action="append", default=[], metavar="BACKEND=PATH",
+                        help="model file for a backend (default: the standard export path)")
+    parser.add_argument("--fixtures", default=None,
+                        help="directory to load fixture frames from (generated there if missing)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=100, help="measured frames per case")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured frames per case")
+    parser.add_argument("-o", "--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="fail if any case loses more than this fraction of its baseline fps")
+    add_detector_arguments(parser)
+    args = parser.parse_args(argv)
+
+    model_paths = dict(item.split("=", 1) for item in args.model)
+    context = multiprocessing.get_context("spawn")
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count(), "opencv": cv2.__version__},
+        "settings": {"frames": args.frames, "warmup": args.warmup, "seed": args.seed,
+                     **detector_options(args)},
+        "backends": [],
+    }
+
+    for backend in args.backends:
+        kwargs = {
+            "backend": backend,
+            "model_path": model_paths.get(backend) or default_model_path(backend),
+            "fixture_dir": args.fixtures,
+            "seed": args.seed,
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "detector_kwargs": detector_options(args),
+        }
+        # Fresh process per backend: clean peak RSS and no shared runtime state
+        with context.Pool(1) as pool:
+            result = pool.apply(_run_backend_safely, (kwargs,))
+        results["backends"].append(result)
+
+        if "error" in result:
+            print(f"❌ {backend}: {result['error']}")
+            continue
+        print(f"\n{backend}: loaded in {result['load_seconds']:.2f}s, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB")
+        print(f"  {'mode':<9} {'faces':>5} {'fps':>9} {'faces/s':>9} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'detect p50':>11}")
+        for case in result["cases"]:
+            lat = case["latency"]
+            print(f"  {case['mode']:<9} {case['faces']:>5} {case['fps']:>9.1f} "
+                  f"{case['faces_per_sec']:>9.1f} {lat['p50_ms']:>8.2f} {lat['p95_ms']:>8.2f} "
+                  f"{lat['p99_ms']:>8.2f} {case['detect_latency']['p50_ms']:>11.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.max_regression)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Shared settings and CLI options for the emotion scripts.
+# Deliberately imports nothing heavy: argument parsing (and --help) must not
+# wait for OpenCV, NumPy or TensorFlow.
+import os
+
+DEFAULT_MODEL_PATH = "fer2013_mini_XCEPTION.102-0.66.hdf5"
+
+# Model file extension expected by each backend
+BACKEND_EXTENSIONS = {
+    "keras": ".hdf5",
+    "tflite": ".tflite",
+    "onnx": ".onnx",
+    "opencv": ".onnx",
+}
+
+
+def default_model_path(backend):
+    """Model file next to the original .hdf5 with the extension `backend` expects."""
+    return os.path.splitext(DEFAULT_MODEL_PATH)[0] + BACKEND_EXTENSIONS[backend]
+
+
+def add_backend_arguments(parser):
+    """Register the shared --backend / --model CLI options."""
+    parser.add_argument("--backend", choices=sorted(BACKEND_EXTENSIONS), default="keras",
+                        help="inference runtime (tflite/onnx/opencv need an export from "
+                             "emotion_export.py)")
+    parser.add_argument("--model", default=None,
+                        help="model file (default: the .hdf5 model, or its export for the backend)")
+
+
+def add_detector_arguments(parser):
+    """Register the shared detection-scale / face-size CLI options."""
+    parser.add_argument("--detect-width", type=int, default=480,
+                        help="halve frames while they stay at least this wide before "
+                             "face detection (0 = detect at full resolution)")
+    parser.add_argument("--min-face", type=int, default=None,
+                        help="smallest face to detect, in full-resolution pixels")
+    parser.add_argument("--max-face", type=int, default=None,
+                        help="largest face to detect, in full-resolution pixels")
+
+
+def detector_options(args):
+    return {"detect_width": args.detect_width, "min_face": args.min_face, "max_face": args.max_face}
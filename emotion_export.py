@@ -0,0 +1,159 @@
+"""
+Export fer2013_mini_XCEPTION to a lightweight CPU runtime format and check it
+against the original Keras model.
+
+    python emotion_export.py --format tflite
+    python emotion_export.py --format onnx --int8
+    python emotion_export.py --check fer2013_mini_XCEPTION.102-0.66.tflite --backend tflite
+
+The exported file can then be served with `--backend tflite|onnx|opencv` in
+realtime_emotion.py and emotion_batch.py.
+"""
+import argparse
+import os
+import sys
+
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '3')
+
+import cv2
+import numpy as np
+
+from emotion_config import BACKEND_EXTENSIONS, DEFAULT_MODEL_PATH
+from emotion_inference import BatchedEmotionModel, load_backend
+from emotion_preprocess import MODEL_INPUT_SIZE, FaceBatchBuffer
+from face_detection import FaceDetector
+
+
+# ------------------------------
+# Export
+# ------------------------------
+def export_tflite(keras_model, output_path, int8=False):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if int8:
+        # Dynamic-range quantization: int8 weights, float activations
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def export_onnx(keras_model, output_path, int8=False, opset=13):
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = (tf.TensorSpec((None, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 1), tf.float32, name="input"),)
+    if not int8:
+        tf2onnx.convert.from_keras(keras_model, input_signature=signature, opset=opset,
+                                   output_path=output_path)
+        return
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    float_path = output_path + ".float.onnx"
+    tf2onnx.convert.from_keras(keras_model, input_signature=signature, opset=opset,
+                               output_path=float_path)
+    try:
+        quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+    finally:
+        os.remove(float_path)
+
+
+# ------------------------------
+# Accuracy parity
+# ------------------------------
+def load_parity_faces(image_dir=None, limit=512, seed=0):
+    """
+    Face crops to compare backends on: faces detected in `image_dir` if given,
+    otherwise deterministic synthetic crops (smoothed noise).
+    """
+    buffer = FaceBatchBuffer(limit)
+    count = 0
+    if image_dir:
+        detect_faces = FaceDetector()
+        for name in sorted(os.listdir(image_dir)):
+            gray = cv2.imread(os.path.join(image_dir, name), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                continue
+            for box in detect_faces(gray):
+                if count >= limit:
+                    break
+                buffer.put(count, gray, box)
+                count += 1
+    if count == 0:
+        rng = np.random.default_rng(seed)
+        count = min(limit, 256)
+        for slot in range(count):
+            noise = rng.integers(0, 256, (MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), dtype=np.uint8)
+            crop = cv2.GaussianBlur(noise, (7, 7), 0)
+            buffer.put(slot, crop, (0, 0, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE))
+    return buffer.batch(count).copy()
+
+
+def parity_report(reference, candidate, batch, batch_size=64):
+    """Compare two backends on `batch`: top-1 agreement and probability error."""
+    ref, cand = [], []
+    for start in range(0, len(batch), batch_size):
+        chunk = batch[start:start + batch_size]
+        ref.append(reference.predict_batch(chunk))
+        cand.append(candidate.predict_batch(chunk))
+    ref, cand = np.concatenate(ref), np.concatenate(cand)
+
+    diff = np.abs(ref - cand)
+    return {
+        "samples": len(batch),
+        "top1_agreement": float(np.mean(ref.argmax(axis=1) == cand.argmax(axis=1))),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+    }
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the emotion model and check parity.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="source .hdf5 model")
+    parser.add_argument("--format", choices=["tflite", "onnx"], help="export format")
+    parser.add_argument("--int8", action="store_true",
+                        help="apply dynamic int8 weight quantization (not readable by --backend opencv)")
+    parser.add_argument("-o", "--output", default=None, help="output path")
+    parser.add_argument("--check", default=None,
+                        help="exported model to compare against the original (default: the export)")
+    parser.add_argument("--backend", choices=sorted(BACKEND_EXTENSIONS), default=None,
+                        help="runtime used for the parity check (default: matches the format)")
+    parser.add_argument("--images", default=None, help="folder of face images for the parity check")
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="fail if top-1 agreement with the original falls below this")
+    args = parser.parse_args(argv)
+
+    if not args.format and not args.check:
+        parser.error("nothing to do: pass --format and/or --check")
+
+    reference = BatchedEmotionModel.from_path(args.model)
+
+    check_path = args.check
+    if args.format:
+        suffix = ".int8" if args.int8 else ""
+        output = args.output or os.path.splitext(args.model)[0] + suffix + BACKEND_EXTENSIONS[args.format]
+        exporter = export_tflite if args.format == "tflite" else export_onnx
+        exporter(reference.model, output, int8=args.int8)
+        print(f"✓ Exported {args.format} model: {output} "
+              f"({os.path.getsize(output) / 1e6:.2f} MB, original "
+              f"{os.path.getsize(args.model) / 1e6:.2f} MB)")
+        check_path = check_path or output
+
+    backend = args.backend or ("tflite" if check_path.endswith(".tflite") else "onnx")
+    candidate = load_backend(backend, check_path)
+    report = parity_report(reference, candidate, load_parity_faces(args.images))
+    print(f"Parity ({backend} vs keras, {report['samples']} faces): "
+          f"top-1 agreement {report['top1_agreement']:.2%}, "
+          f"max |Δp| {report['max_abs_diff']:.4f}, mean |Δp| {report['mean_abs_diff']:.5f}")
+
+    if report["top1_agreement"] < args.min_agreement:
+        print(f"❌ Agreement below {args.min_agreement:.2%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import os
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from emotion_config import default_model_path
+from emotion_metrics import timed
+from emotion_preprocess import MODEL_INPUT_SIZE, FaceBatchBuffer
+
+# Emotion labels (FER2013)
+EMOTION_LABELS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
+
+
+# ------------------------------
+# Backend interface
+# ------------------------------
+class EmotionBackend:
+    """
+    Common interface of all inference backends.
+
+    Subclasses only implement `_run(batch)` for a non-empty float32
+    (N, 64, 64, 1) batch; preprocessing and label decoding are shared.
+    """
+
+    name = None
+
+    def __init__(self, max_faces=32):
+        self.buffer = FaceBatchBuffer(max_faces)
+        # Optional emotion_metrics.PipelineMetrics for preprocess/predict latency
+        self.metrics = None
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+    def predict_batch(self, batch):
+        """Return an (N, 7) array of class probabilities for an (N, 64, 64, 1) batch."""
+        if len(batch) == 0:
+            return np.empty((0, len(EMOTION_LABELS)), dtype=np.float32)
+        with timed(self.metrics, "predict"):
+            return np.asarray(self._run(batch), dtype=np.float32)
+
+    def predict_faces(self, gray, faces):
+        """Classify all faces of one frame; returns (labels, probabilities) in face order."""
+        with timed(self.metrics, "preprocess"):
+            batch = self.buffer.fill(gray, faces)
+        probs = self.predict_batch(batch)
+        labels = [EMOTION_LABELS[i] for i in np.argmax(probs, axis=1)]
+        return labels, probs
+
+    def warmup(self):
+        """Run one dummy batch so graph tracing / tensor allocation happens before the first frame."""
+        self.predict_batch(np.zeros((1, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 1), dtype=np.float32))
+
+
+class BatchedEmotionModel(EmotionBackend):
+    """
+    Keras backend: runs every face of a frame through the model in one forward pass.
+
+    `model.predict()` sets up a data pipeline on every call, which dominates the
+    cost for tiny batches. Calling the model directly through a traced
+    `tf.function` with a fixed input signature avoids that and never retraces
+    as the number of faces changes.
+    """
+
+    name = "keras"
+
+    def __init__(self, model, max_faces=32):
+        super().__init__(max_faces)
+        self.model = model
+        self._forward = self._build_forward(model)
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        from keras.models import load_model
+        return cls(load_model(path, compile=False), **kwargs)
+
+    @staticmethod
+    def _build_forward(model):
+        try:
+            import tensorflow as tf
+        except ImportError:
+            # Non-TensorFlow Keras backend: plain eager call
+            return lambda batch: model(batch, training=False)
+
+        signature = [tf.TensorSpec([None, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 1], tf.float32)]
+        return tf.function(lambda batch: model(batch, training=False),
+                           input_signature=signature)
+
+    def _run(self, batch):
+        return self._forward(batch)
+
+
+class TFLiteBackend(EmotionBackend):
+    """Runs a `.tflite` export through tflite-runtime (or TensorFlow's bundled interpreter)."""
+
+    name = "tflite"
+
+    def __init__(self, path, num_threads=None, max_faces=32):
+        super().__init__(max_faces)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self._input = self.interpreter.get_input_details()[0]["index"]
+        self._output = self.interpreter.get_output_details()[0]["index"]
+        self._batch_size = None
+
+    def _run(self, batch):
+        # Re-plan tensors only when the number of faces changes
+        if len(batch) != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input, list(batch.shape))
+            self.interpreter.allocate_tensors()
+            self._batch_size = len(batch)
+        self.interpreter.set_tensor(self._input, np.ascontiguousarray(batch))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output)
+
+
+class OnnxBackend(EmotionBackend):
+    """Runs a `.onnx` export on the onnxruntime CPU provider."""
+
+    name = "onnx"
+
+    def __init__(self, path, num_threads=None, max_faces=32):
+        super().__init__(max_faces)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input = self.session.get_inputs()[0].name
+
+    def _run(self, batch):
+        return self.session.run(None, {self._input: batch})[0]
+
+
+class OpenCVDnnBackend(EmotionBackend):
+    """Runs a float `.onnx` export through OpenCV's DNN module; no extra runtime needed."""
+
+    name = "opencv"
+
+    def __init__(self, path, max_faces=32):
+        super().__init__(max_faces)
+        import cv2
+
+        self.net = cv2.dnn.readNetFromONNX(path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def _run(self, batch):
+        self.net.setInput(np.ascontiguousarray(batch))
+        return self.net.forward()
+
+
+def load_backend(backend="keras", path=None, num_threads=None, max_faces=32):
+    """Create the inference backend called `backend` for the model file at `path`."""
+    path = path or default_model_path(backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file not found: {path}")
+
+    if backend == "keras":
+        return BatchedEmotionModel.from_path(path, max_faces=max_faces)
+    if backend == "tflite":
+        return TFLiteBackend(path, num_threads=num_threads, max_faces=max_faces)
+    if backend == "onnx":
+        return OnnxBackend(path, num_threads=num_threads, max_faces=max_faces)
+    if backend == "opencv":
+        return OpenCVDnnBackend(path, max_faces=max_faces)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def load_backend_async(backend="keras", path=None, warmup=True, timer=None, **kwargs):
+    """
+    Load (and warm up) a backend on a background thread.
+
+    Returns a `concurrent.futures.Future`; the caller can open the camera and
+    the face cascade meanwhile and only block on `.result()` when the first
+    frame actually needs a prediction. Stages are recorded on `timer`
+    (a `startup_timer.StartupTimer`) if one is given.
+    """
+    future = Future()
+
+    def run():
+        try:
+            model = load_backend(backend, path, **kwargs)
+            if timer:
+                timer.mark("model loaded")
+            if warmup:
+                model.warmup()
+                if timer:
+                    timer.mark("model warm")
+            future.set_result(model)
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="model-loader", daemon=True).start()
+    return future
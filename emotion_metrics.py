@@ -0,0 +1,228 @@
+import bisect
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Histogram bucket upper bounds in seconds (Prometheus `le` labels)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+FACE_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+
+# Pipeline stages in the order they run
+STAGES = ("capture", "color", "detect", "preprocess", "predict", "render")
+
+
+class Histogram:
+    """Cumulative bucket counts for export plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets, window=2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = collections.deque(maxlen=window)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        if not self.recent:
+            return {f"p{q}": None for q in qs}
+        values = np.percentile(np.fromiter(self.recent, dtype=np.float64), qs)
+        return {f"p{q}": float(v) for q, v in zip(qs, values)}
+
+
+# ------------------------------
+# Pipeline metrics
+# ------------------------------
+class PipelineMetrics:
+    """
+    Thread-safe per-stage latency histograms, FPS and faces-per-frame.
+
+    Stages call `record(stage, seconds)` (or use `with metrics.time(stage)`),
+    and the display side calls `frame_done(num_faces)` once per output frame.
+    """
+
+    def __init__(self, fps_window=2.0):
+        self.fps_window = fps_window
+        self.stages = collections.OrderedDict()
+        self.faces = Histogram(FACE_BUCKETS)
+        self.frames = 0
+        self._frame_times = collections.deque()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def frame_done(self, num_faces):
+        now = time.perf_counter()
+        with self._lock:
+            self.frames += 1
+            self.faces.observe(num_faces)
+            self._frame_times.append(now)
+            while now - self._frame_times[0] > self.fps_window:
+                self._frame_times.popleft()
+
+    def fps(self):
+        with self._lock:
+            if len(self._frame_times) < 2:
+                return 0.0
+            span = self._frame_times[-1] - self._frame_times[0]
+            return (len(self._frame_times) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        """Plain dict of everything measured so far (latencies in milliseconds)."""
+        fps = self.fps()
+        with self._lock:
+            stages = {}
+            for name in sorted(self.stages, key=_stage_order):
+                histogram = self.stages[name]
+                stages[name] = {
+                    "count": histogram.count,
+                    "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else None,
+                    **{k: v * 1000 if v is not None else None
+                       for k, v in histogram.percentiles().items()},
+                }
+            return {
+                "fps": fps,
+                "frames": self.frames,
+                "faces_per_frame": {
+                    "mean": self.faces.total / self.faces.count if self.faces.count else 0.0,
+                    **self.faces.percentiles(),
+                },
+                "stages_ms": stages,
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, labels=None):
+        return render_prometheus([(labels or {}, self)])
+
+    def overlay(self, frame, origin=(10, 40)):
+        """Draw FPS and per-stage p50/p95 onto `frame`."""
+        snapshot = self.snapshot()
+        lines = [f"{snapshot['fps']:.1f} fps, "
+                 f"{snapshot['faces_per_frame']['mean']:.1f} faces/frame"]
+        for name, stage in snapshot["stages_ms"].items():
+            lines.append(f"{name:<10} p50 {stage['p50']:6.1f}  p95 {stage['p95']:6.1f} ms")
+        x, y = origin
+        for line in lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 3)
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+            y += 16
+
+
+def _stage_order(name):
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+def timed(metrics, stage):
+    """`metrics.time(stage)`, or a no-op when instrumentation is off."""
+    return metrics.time(stage) if metrics is not None else contextlib.nullcontext()
+
+
+# ------------------------------
+# Export
+# ------------------------------
+def _label_str(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items.items()) + "}"
+
+
+def _histogram_lines(name, labels, histogram, bounds):
+    cumulative = 0
+    for bound, count in zip(bounds, histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{_label_str(labels, le=bound)} {cumulative}"
+    yield f"{name}_bucket{_label_str(labels, le='+Inf')} {histogram.count}"
+    yield f"{name}_sum{_label_str(labels)} {histogram.total}"
+    yield f"{name}_count{_label_str(labels)} {histogram.count}"
+
+
+def render_prometheus(entries):
+    """Prometheus text exposition for a list of (labels, PipelineMetrics) pairs."""
+    lines = [
+        "# HELP emotion_stage_latency_seconds Latency of each pipeline stage.",
+        "# TYPE emotion_stage_latency_seconds histogram",
+    ]
+    for labels, metrics in entries:
+        with metrics._lock:
+            for stage, histogram in metrics.stages.items():
+                lines.extend(_histogram_lines("emotion_stage_latency_seconds",
+                                              {**labels, "stage": stage}, histogram, LATENCY_BUCKETS))
+
+    lines += [
+        "# HELP emotion_faces_per_frame Faces detected per processed frame.",
+        "# TYPE emotion_faces_per_frame histogram",
+    ]
+    for labels, metrics in entries:
+        with metrics._lock:
+            lines.extend(_histogram_lines("emotion_faces_per_frame", labels, metrics.faces,
+                                          FACE_BUCKETS))
+
+    lines += [
+        "# HELP emotion_fps Processed frames per second over the last few seconds.",
+        "# TYPE emotion_fps gauge",
+    ]
+    for labels, metrics in entries:
+        lines.append(f"emotion_fps{_label_str(labels)} {metrics.fps():.3f}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsDumper:
+    """Writes a JSON or Prometheus-text snapshot to `path` every `interval` seconds."""
+
+    def __init__(self, metrics, path, fmt="json", interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(self.interval + 1)
+        self.dump()
+
+    def dump(self):
+        text = self.metrics.to_prometheus() if self.fmt == "prom" else self.metrics.to_json() + "\n"
+        if self.path == "-":
+            print(text, end="", flush=True)
+            return
+        # Write-then-rename so scrapers never see a half-written file
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.dump()
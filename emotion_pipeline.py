@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+
+import cv2
+
+from emotion_metrics import timed
+
+
+# ------------------------------
+# Bounded, latest-wins queue
+# ------------------------------
+class DropOldestQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    When the consumer falls behind, the oldest waiting frame is discarded so
+    the consumer always works on the freshest frame and latency stays bounded.
+    """
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+class FramePacket:
+    """A frame travelling through the pipeline together with its stage results."""
+
+    __slots__ = ("index", "captured_at", "frame", "gray", "faces", "track_ids", "emotions", "probs")
+
+    def __init__(self, index, frame):
+        self.index = index
+        self.captured_at = time.perf_counter()
+        self.frame = frame
+        self.gray = None
+        self.faces = ()
+        self.track_ids = None
+        self.emotions = []
+        self.probs = None
+
+
+# End-of-stream marker forwarded through every stage
+_END = object()
+
+
+# ------------------------------
+# Capture -> detect -> infer -> display
+# ------------------------------
+class EmotionPipeline:
+    """
+    Runs capture, face detection and emotion inference on their own threads.
+
+    Stages are connected by small `DropOldestQueue`s, so throughput is bound by
+    the slowest stage instead of the sum of all stages. Display stays on the
+    caller's thread (OpenCV windows must be driven from the main thread) and
+    pulls finished packets with `get_result()`.
+
+    With a `tracker` (see `face_tracking.FaceTracker`) the detection stage
+    follows faces between periodic detections and tags each face with its
+    track ID. An optional `smoother` (see `emotion_smoothing.EmotionSmoother`)
+    then replaces plain batched inference for tracked faces.
+
+    Pass an `emotion_metrics.PipelineMetrics` as `metrics` to record capture,
+    color-conversion and detection latency; preprocessing and prediction are
+    recorded by the backend it is attached to.
+
+    A frame whose detection or inference raises is logged and dropped. After
+    `max_consecutive_errors` failures in a row, or any other error in a
+    stage, the stage ends the stream so `get_result()` raises EOFError
+    instead of returning None forever.
+    """
+
+    def __init__(self, cap, detect_faces, batched_model, queue_size=2, tracker=None,
+                 smoother=None, metrics=None, max_consecutive_errors=30):
+        self.cap = cap
+        self.detect_faces = detect_faces
+        self.batched_model = batched_model
+        self.tracker = tracker
+        self.smoother = smoother
+        self.metrics = metrics
+        self.max_consecutive_errors = max_consecutive_errors
+        self.failed_frames = 0
+        if metrics is not None:
+            batched_model.metrics = metrics
+
+        self.detect_queue = DropOldestQueue(queue_size)
+        self.infer_queue = DropOldestQueue(queue_size)
+        self.display_queue = DropOldestQueue(queue_size)
+
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for target, name in ((self._capture_loop, "capture"),
+                             (self._detect_loop, "detect"),
+                             (self._infer_loop, "infer")):
+            thread = threading.Thread(target=target, name=f"emotion-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def get_result(self, timeout=1.0):
+        """Return the next processed packet, None on timeout, or raise EOFError at end of stream."""
+        try:
+            packet = self.display_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if packet is _END:
+            raise EOFError
+        return packet
+
+    def queue_depths(self):
+        """Current number of packets waiting in front of each stage."""
+        return {
+            "detect": self.detect_queue.depth(),
+            "infer": self.infer_queue.depth(),
+            "display": self.display_queue.depth(),
+        }
+
+    def dropped_frames(self):
+        """Frames discarded in front of each stage because it fell behind."""
+        return {
+            "detect": self.detect_queue.dropped,
+            "infer": self.infer_queue.dropped,
+            "display": self.display_queue.dropped,
+        }
+
+    # ------------------------------
+    # Stage workers
+    # ------------------------------
+    def _capture_loop(self):
+        index = 0
+        try:
+            while not self._stop_event.is_set():
+                with timed(self.metrics, "capture"):
+                    ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.detect_queue.put(FramePacket(index, frame))
+                index += 1
+        finally:
+            self.detect_queue.put(_END)
+
+    def _stage_loop(self, inbox, outbox, work):
+        name = threading.current_thread().name
+        errors_in_row = 0
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    packet = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if packet is _END:
+                    return
+                try:
+                    work(packet)
+                except Exception as e:
+                    # e.g. a scheduler timeout: lose this frame, not the stream
+                    self.failed_frames += 1
+                    errors_in_row += 1
+                    print(f"⚠ {name}: dropped frame {packet.index}: {e!r}")
+                    if errors_in_row >= self.max_consecutive_errors:
+                        print(f"❌ {name}: {errors_in_row} frames failed in a row, ending stream")
+                        return
+                    continue
+                errors_in_row = 0
+                outbox.put(packet)
+        except Exception as e:
+            print(f"❌ {name} stopped: {e!r}")
+        finally:
+            # Consumers always see the end of the stream
+            outbox.put(_END)
+
+    def _detect_loop(self):
+        def detect(packet):
+            with timed(self.metrics, "color"):
+                packet.gray = cv2.cvtColor(packet.frame, cv2.COLOR_BGR2GRAY)
+            if self.tracker is None:
+                with timed(self.metrics, "detect"):
+                    packet.faces = self.detect_faces(packet.gray)
+                return
+            with timed(self.metrics, "detect"):
+                tracks = self.tracker.update(packet.gray)
+            packet.faces = [t.box for t in tracks]
+            packet.track_ids = [t.id for t in tracks]
+
+        self._stage_loop(self.detect_queue, self.infer_queue, detect)
+
+    def _infer_loop(self):
+        def infer(packet):
+            if self.smoother is not None and packet.track_ids is not None:
+                packet.emotions, packet.probs = self.smoother.classify(
+                    packet.gray, packet.faces, packet.track_ids)
+            else:
+                packet.emotions, packet.probs = self.batched_model.predict_faces(
+                    packet.gray, packet.faces)
+
+        self._stage_loop(self.infer_queue, self.display_queue, infer)
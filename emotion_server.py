@@ -0,0 +1,425 @@
+"""
+Multi-camera emotion service: many sources, one model.
+
+    python emotion_server.py 0 rtsp://cam2/stream lobby.mp4 --http-port 8080
+
+Every source gets its own capture / detection / tracking pipeline, but all of
+them hand their face crops to a single `InferenceScheduler`, which owns the
+only model instance and runs dynamic micro-batches across streams.
+"""
+import argparse
+import collections
+import json
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from emotion_config import add_backend_arguments, add_detector_arguments, detector_options
+from emotion_inference import EmotionBackend, load_backend
+from emotion_metrics import PipelineMetrics, render_prometheus
+from emotion_pipeline import EmotionPipeline
+from emotion_smoothing import EmotionSmoother
+from face_detection import FaceDetector
+from face_tracking import FaceTracker
+
+
+# ------------------------------
+# Shared micro-batching scheduler
+# ------------------------------
+class _Request:
+    __slots__ = ("stream_id", "batch", "future", "submitted_at")
+
+    def __init__(self, stream_id, batch):
+        self.stream_id = stream_id
+        self.batch = batch
+        self.future = Future()
+        self.submitted_at = time.perf_counter()
+
+
+class InferenceScheduler:
+    """
+    Runs face batches from many streams through one backend.
+
+    Requests wait in per-stream queues. A batch is dispatched as soon as
+    `max_batch` faces are pending or the oldest request has waited
+    `max_latency` seconds. Batches are filled round-robin, one request per
+    stream per pass, so a busy camera cannot starve a quiet one.
+    """
+
+    def __init__(self, backend, max_batch=64, max_latency=0.010):
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+
+        self._queues = collections.OrderedDict()
+        self._pending_faces = 0
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+
+        self.batches_run = 0
+        self.faces_run = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def submit(self, stream_id, batch):
+        """
+        Queue a non-empty (N, 64, 64, 1) batch; returns a Future of its (N, 7) probabilities.
+
+        The batch is copied, so callers may reuse their buffer as soon as this
+        returns. Cancelling the Future before dispatch withdraws the request.
+        """
+        request = _Request(stream_id, np.array(batch, copy=True))
+        with self._cond:
+            if self._stop:
+                raise RuntimeError("scheduler stopped")
+            self._queues.setdefault(stream_id, collections.deque()).append(request)
+            self._pending_faces += len(batch)
+            self._cond.notify()
+        return request.future
+
+    def _oldest(self):
+        return min(q[0].submitted_at for q in self._queues.values() if q)
+
+    def _take_batch(self):
+        """Pop requests round-robin across streams until the batch is full."""
+        taken, faces = [], 0
+        while faces < self.max_batch:
+            progressed = False
+            for stream_id in list(self._queues):
+                q = self._queues[stream_id]
+                if not q:
+                    continue
+                if taken and faces + len(q[0].batch) > self.max_batch:
+                    continue
+                request = q.popleft()
+                if not request.future.set_running_or_notify_cancel():
+                    # Abandoned by a caller that timed out
+                    self._pending_faces -= len(request.batch)
+                    progressed = True
+                    continue
+                taken.append(request)
+                faces += len(request.batch)
+                progressed = True
+                if faces >= self.max_batch:
+                    break
+            if not progressed:
+                break
+        # Rotate so the next batch starts with a different stream
+        if taken:
+            self._queues.move_to_end(taken[0].stream_id)
+        self._pending_faces -= faces
+        return taken
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and not self._has_requests():
+                    self._cond.wait()
+                # Wait for a full batch or the latency deadline of the oldest request
+                while not self._stop and self._pending_faces < self.max_batch:
+                    remaining = self._oldest() + self.max_latency - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stop:
+                    break
+                requests = self._take_batch()
+
+            self._dispatch(requests)
+
+        with self._cond:
+            for q in self._queues.values():
+                for request in q:
+                    if request.future.set_running_or_notify_cancel():
+                        request.future.set_exception(RuntimeError("scheduler stopped"))
+                q.clear()
+
+    def _has_requests(self):
+        return any(self._queues.values())
+
+    def _dispatch(self, requests):
+        try:
+            probs = self.backend.predict_batch(np.concatenate([r.batch for r in requests]))
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in requests:
+            size = len(request.batch)
+            request.future.set_result(probs[offset:offset + size])
+            offset += size
+        self.batches_run += 1
+        self.faces_run += offset
+
+
+class ScheduledBackend(EmotionBackend):
+    """Per-stream view of the shared scheduler that looks like an ordinary backend."""
+
+    name = "scheduled"
+
+    def __init__(self, scheduler, stream_id, timeout=5.0, max_faces=32):
+        super().__init__(max_faces)
+        self.scheduler = scheduler
+        self.stream_id = stream_id
+        self.timeout = timeout
+
+    def _run(self, batch):
+        # submit() copies the batch, so the next frame may refill the buffer
+        # even if this request is still queued after a timeout
+        future = self.scheduler.submit(self.stream_id, batch)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+
+# ------------------------------
+# Camera sources
+# ------------------------------
+class CameraSource:
+    """
+    cv2.VideoCapture wrapper for device indices, RTSP/HTTP URLs and video files.
+
+    Files stand in for cameras: they are paced to their native frame rate and
+    can loop forever.
+    """
+
+    def __init__(self, source, loop=True):
+        self.source = int(source) if str(source).isdigit() else source
+        self.loop = loop
+        self.cap = cv2.VideoCapture(self.source)
+        self.is_file = isinstance(self.source, str) and "://" not in self.source
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+        self.frame_interval = 1.0 / fps if fps and fps > 0 else 0.0
+        self._next_frame_at = time.perf_counter()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.frame_interval:
+            delay = self._next_frame_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_frame_at = max(self._next_frame_at + self.frame_interval, time.perf_counter())
+
+        ret, frame = self.cap.read()
+        if not ret and self.is_file and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class CameraStream:
+    """One source's pipeline plus its latest result."""
+
+    def __init__(self, stream_id, source, scheduler, detector_kwargs, detect_every=5,
+                 smoothing=True, loop=True):
+        self.stream_id = stream_id
+        self.source = source
+        self.cap = CameraSource(source, loop=loop)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open source: {source}")
+
+        model = ScheduledBackend(scheduler, stream_id)
+        detect_faces = FaceDetector(**detector_kwargs)
+        tracker = FaceTracker(detect_faces, detect_every=detect_every) if detect_every > 1 else None
+        smoother = EmotionSmoother(model) if smoothing and tracker else None
+        self.metrics = PipelineMetrics()
+        self.pipeline = EmotionPipeline(self.cap, detect_faces, model, tracker=tracker,
+                                        smoother=smoother, metrics=self.metrics)
+
+        self.latest = None
+        self.frames = 0
+        self.started_at = None
+        self.finished = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._collect, name=f"stream-{stream_id}",
+                                        daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.pipeline.start()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.pipeline.stop()
+        self.cap.release()
+
+    def _collect(self):
+        while True:
+            try:
+                packet = self.pipeline.get_result(timeout=0.5)
+            except EOFError:
+                self.finished = True
+                return
+            if packet is None:
+                continue
+            self.metrics.frame_done(len(packet.faces))
+            track_ids = packet.track_ids or [None] * len(packet.faces)
+            faces = [
+                {"track_id": track_id, "box": [int(v) for v in box], "emotion": emotion,
+                 "probs": [round(float(p), 4) for p in probs]}
+                for box, emotion, track_id, probs
+                in zip(packet.faces, packet.emotions, track_ids, packet.probs)
+            ]
+            with self._lock:
+                self.frames += 1
+                self.latest = {"frame": packet.index, "faces": faces}
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+            return {
+                "source": str(self.source),
+                "fps": round(self.frames / elapsed, 2) if elapsed else 0.0,
+                "finished": self.finished,
+                "queues": self.pipeline.queue_depths(),
+                "dropped": self.pipeline.dropped_frames(),
+                "metrics": self.metrics.snapshot(),
+                "latest": self.latest,
+            }
+
+
+# ------------------------------
+# Server
+# ------------------------------
+class EmotionServer:
+    def __init__(self, sources, backend, max_batch=64, max_latency=0.010,
+                 detector_kwargs=None, detect_every=5, smoothing=True, loop=True):
+        self.scheduler = InferenceScheduler(backend, max_batch=max_batch, max_latency=max_latency)
+        self.streams = {
+            str(i): CameraStream(str(i), source, self.scheduler, detector_kwargs or {},
+                                 detect_every=detect_every, smoothing=smoothing, loop=loop)
+            for i, source in enumerate(sources)
+        }
+
+    def start(self):
+        self.scheduler.start()
+        for stream in self.streams.values():
+            stream.start()
+        return self
+
+    def stop(self):
+        # Streams first: their inference stages may be waiting on the scheduler
+        for stream in self.streams.values():
+            stream.stop()
+        self.scheduler.stop()
+
+    def prometheus(self):
+        return render_prometheus([({"stream": stream_id}, s.metrics)
+                                  for stream_id, s in self.streams.items()])
+
+    def snapshot(self):
+        return {
+            "streams": {stream_id: s.snapshot() for stream_id, s in self.streams.items()},
+            "scheduler": {
+                "batches": self.scheduler.batches_run,
+                "faces": self.scheduler.faces_run,
+                "avg_batch": round(self.scheduler.faces_run / self.scheduler.batches_run, 2)
+                if self.scheduler.batches_run else 0.0,
+            },
+        }
+
+
+def serve_http(server, port):
+    """
+    Expose `GET /streams` (all streams) and `GET /streams/<id>` as JSON, and
+    `GET /metrics` as Prometheus text.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = [p for p in self.path.split("/") if p]
+            if parts == ["metrics"]:
+                self._send(server.prometheus().encode(), "text/plain; version=0.0.4")
+                return
+            snapshot = server.snapshot()
+            if parts == ["streams"]:
+                body = snapshot
+            elif len(parts) == 2 and parts[0] == "streams" and parts[1] in snapshot["streams"]:
+                body = snapshot["streams"][parts[1]]
+            else:
+                self.send_error(404)
+                return
+            self._send(json.dumps(body).encode(), "application/json")
+
+        def _send(self, data, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=httpd.serve_forever, name="http", daemon=True).start()
+    return httpd
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve emotion detection for several cameras "
+                                                 "from one model.")
+    parser.add_argument("sources", nargs="+",
+                        help="device indices, RTSP/HTTP URLs or video files (looped)")
+    parser.add_argument("--max-batch", type=int, default=64, help="faces per model call")
+    parser.add_argument("--max-latency-ms", type=float, default=10.0,
+                        help="longest a face may wait for its batch to fill")
+    parser.add_argument("--detect-every", type=int, default=5)
+    parser.add_argument("--no-smoothing", action="store_true")
+    parser.add_argument("--no-loop", action="store_true", help="stop video files at their end")
+    parser.add_argument("--http-port", type=int, default=None, help="serve JSON results on this port")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between status lines")
+    add_backend_arguments(parser)
+    add_detector_arguments(parser)
+    args = parser.parse_args(argv)
+
+    print("Loading model...")
+    backend = load_backend(args.backend, args.model)
+    backend.warmup()
+    print(f"✓ Model loaded successfully! ({args.backend})")
+
+    server = EmotionServer(args.sources, backend, max_batch=args.max_batch,
+                           max_latency=args.max_latency_ms / 1000.0,
+                           detector_kwargs=detector_options(args), detect_every=args.detect_every,
+                           smoothing=not args.no_smoothing, loop=not args.no_loop).start()
+    if args.http_port:
+        serve_http(server, args.http_port)
+        print(f"Serving results on http://0.0.0.0:{args.http_port}/streams")
+
+    try:
+        while not all(s.finished for s in server.streams.values()):
+            time.sleep(args.report_every)
+            snapshot = server.snapshot()
+            line = ", ".join(f"{sid}: {s['fps']} fps" for sid, s in snapshot["streams"].items())
+            print(f"{line} | avg batch {snapshot['scheduler']['avg_batch']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
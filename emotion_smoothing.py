@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+from emotion_inference import EMOTION_LABELS
+from emotion_metrics import timed
+
+# Side of the downscaled crop used to detect "nothing changed"
+SIGNATURE_SIZE = 16
+
+
+def crop_signature(gray, box):
+    """Tiny downscaled copy of a face crop, cheap to compare between frames."""
+    x, y, w, h = box
+    crop = gray[y:y + h, x:x + w]
+    return cv2.resize(crop, (SIGNATURE_SIZE, SIGNATURE_SIZE),
+                      interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class TrackEmotionState:
+    """Smoothed emotion estimate for one face track."""
+
+    def __init__(self):
+        self.probs = None
+        self.signature = None
+        self.frames_since_inference = 0
+
+    @property
+    def label(self):
+        return EMOTION_LABELS[int(np.argmax(self.probs))]
+
+    def update(self, probs, signature, alpha):
+        if self.probs is None:
+            self.probs = np.asarray(probs, dtype=np.float32).copy()
+        else:
+            self.probs = alpha * probs + (1.0 - alpha) * self.probs
+        self.signature = signature
+        self.frames_since_inference = 0
+
+
+# ------------------------------
+# Per-track smoothing and inference skipping
+# ------------------------------
+class EmotionSmoother:
+    """
+    Keeps an exponential moving average of the softmax output per track ID and
+    skips the model for faces whose crop has barely changed since they were
+    last classified.
+
+    A face is re-classified when the mean absolute difference between its
+    current and last-classified 16x16 signature exceeds `change_threshold`
+    (in grey levels), or at least every `max_skip` frames.
+    """
+
+    def __init__(self, batched_model, alpha=0.4, change_threshold=4.0, max_skip=15):
+        self.batched_model = batched_model
+        self.alpha = alpha
+        self.change_threshold = change_threshold
+        self.max_skip = max_skip
+
+        self.states = {}
+        self.inferred = 0
+        self.skipped = 0
+
+    def classify(self, gray, faces, track_ids):
+        """Return (labels, probabilities) for `faces`, running the model only where needed."""
+        # Forget tracks that are gone
+        live = set(track_ids)
+        for track_id in list(self.states):
+            if track_id not in live:
+                del self.states[track_id]
+
+        signatures = [crop_signature(gray, box) for box in faces]
+
+        stale = []
+        for i, track_id in enumerate(track_ids):
+            state = self.states.setdefault(track_id, TrackEmotionState())
+            if (state.probs is None
+                    or state.frames_since_inference >= self.max_skip
+                    or np.abs(signatures[i] - state.signature).mean() > self.change_threshold):
+                stale.append(i)
+            else:
+                state.frames_since_inference += 1
+
+        if stale:
+            with timed(self.batched_model.metrics, "preprocess"):
+                batch = self.batched_model.buffer.fill(gray, [faces[i] for i in stale])
+            for i, probs in zip(stale, self.batched_model.predict_batch(batch)):
+                self.states[track_ids[i]].update(probs, signatures[i], self.alpha)
+
+        self.inferred += len(stale)
+        self.skipped += len(track_ids) - len(stale)
+
+        states = [self.states[track_id] for track_id in track_ids]
+        probs = (np.stack([s.probs for s in states]) if states
+                 else np.empty((0, len(EMOTION_LABELS)), dtype=np.float32))
+        return [s.label for s in states], probs
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+
+def load_face_cascade():
+    return cv2.CascadeClassifier(
+        cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    )
+
+
+# ------------------------------
+# Haar detection on a pyramid level
+# ------------------------------
+class FaceDetector:
+    """
+    Runs the Haar cascade on a downsampled pyramid level of the grayscale frame
+    and maps the boxes back to full-resolution coordinates.
+
+    The frame is halved with `cv2.pyrDown` while it stays at least
+    `detect_width` pixels wide, so a 1920px frame is searched at 480px with
+    the default settings. The model only ever sees 64x64 crops, which are still
+    cut from the original frame. `min_face` / `max_face` are face sizes in
+    full-resolution pixels and are rescaled to the detection level.
+    """
+
+    def __init__(self, cascade=None, detect_width=480, scale_factor=1.3, min_neighbors=5,
+                 min_face=None, max_face=None):
+        self.cascade = cascade if cascade is not None else load_face_cascade()
+        self.detect_width = detect_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face = min_face
+        self.max_face = max_face
+
+    def pyramid_levels(self, width):
+        levels = 0
+        if self.detect_width:
+            while width // 2 >= self.detect_width:
+                width //= 2
+                levels += 1
+        return levels
+
+    def __call__(self, gray):
+        levels = self.pyramid_levels(gray.shape[1])
+        small = gray
+        for _ in range(levels):
+            small = cv2.pyrDown(small)
+        scale = 1 << levels
+
+        kwargs = {}
+        if self.min_face:
+            side = max(1, self.min_face // scale)
+            kwargs["minSize"] = (side, side)
+        if self.max_face:
+            side = max(1, self.max_face // scale)
+            kwargs["maxSize"] = (side, side)
+
+        faces = self.cascade.detectMultiScale(
+            small, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, **kwargs
+        )
+        if len(faces) == 0:
+            return []
+
+        boxes = np.asarray(faces, dtype=np.int32) * scale
+        # Keep mapped boxes inside the full-resolution frame
+        frame_h, frame_w = gray.shape[:2]
+        boxes[:, 2] = np.minimum(boxes[:, 2], frame_w - boxes[:, 0])
+        boxes[:, 3] = np.minimum(boxes[:, 3], frame_h - boxes[:, 1])
+        return [tuple(int(v) for v in box) for box in boxes]
@@ -0,0 +1,141 @@
+import itertools
+
+import cv2
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class Track:
+    """One face followed across frames under a stable ID."""
+
+    def __init__(self, track_id, box, gray):
+        self.id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.confidence = 1.0
+        self.age = 0
+        self.template = None
+        self.set_template(gray)
+
+    def set_template(self, gray):
+        x, y, w, h = self.box
+        self.template = gray[y:y + h, x:x + w].copy()
+
+
+# ------------------------------
+# Detect every K frames, track in between
+# ------------------------------
+class FaceTracker:
+    """
+    Runs the (expensive) face detector only every `detect_every` frames and
+    carries boxes forward in between by template matching each face inside a
+    small search window around its last position.
+
+    A full detection is forced early whenever a track's match score drops
+    below `min_confidence`. Detections are associated with existing tracks by
+    IoU so a face keeps its ID for as long as it stays in view.
+    """
+
+    def __init__(self, detect_faces, detect_every=5, min_confidence=0.6,
+                 search_margin=0.5, match_width=48, iou_threshold=0.3):
+        self.detect_faces = detect_faces
+        self.detect_every = max(1, detect_every)
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.match_width = match_width
+        self.iou_threshold = iou_threshold
+
+        self.tracks = []
+        self.frames_since_detect = None
+        self.detections_run = 0
+        self._ids = itertools.count(1)
+
+    def update(self, gray):
+        """Advance all tracks to `gray` and return the current list of tracks."""
+        need_detect = (
+            self.frames_since_detect is None
+            or self.frames_since_detect + 1 >= self.detect_every
+            or any(t.confidence < self.min_confidence for t in self.tracks)
+        )
+
+        if need_detect:
+            self._detect(gray)
+        else:
+            self.frames_since_detect += 1
+            for track in self.tracks:
+                self._follow(track, gray)
+
+        return self.tracks
+
+    def _detect(self, gray):
+        self.frames_since_detect = 0
+        self.detections_run += 1
+
+        detections = [tuple(int(v) for v in box) for box in self.detect_faces(gray)]
+
+        # Greedy IoU association, best overlaps first
+        pairs = sorted(
+            ((box_iou(t.box, d), ti, di)
+             for ti, t in enumerate(self.tracks)
+             for di, d in enumerate(detections)),
+            reverse=True,
+        )
+        matched_tracks, matched_dets = set(), set()
+        tracks = []
+        for iou, ti, di in pairs:
+            if iou < self.iou_threshold:
+                break
+            if ti in matched_tracks or di in matched_dets:
+                continue
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+            track = self.tracks[ti]
+            track.box = detections[di]
+            track.confidence = 1.0
+            track.age += 1
+            track.set_template(gray)
+            tracks.append(track)
+
+        for di, box in enumerate(detections):
+            if di not in matched_dets:
+                tracks.append(Track(next(self._ids), box, gray))
+
+        self.tracks = tracks
+
+    def _follow(self, track, gray):
+        x, y, w, h = track.box
+        frame_h, frame_w = gray.shape[:2]
+
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+        window = gray[y0:y1, x0:x1]
+
+        template = track.template
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            track.confidence = 0.0
+            return
+
+        # Match on a downscaled copy; large faces do not need full resolution
+        scale = min(1.0, self.match_width / float(w))
+        if scale < 1.0:
+            window = cv2.resize(window, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            template = cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (bx, by) = cv2.minMaxLoc(scores)
+
+        nx = min(max(0, x0 + int(round(bx / scale))), frame_w - w)
+        ny = min(max(0, y0 + int(round(by / scale))), frame_h - h)
+        track.box = (nx, ny, w, h)
+        track.confidence = float(np.nan_to_num(best))
+        track.age += 1
@@ -1,4 +1,33 @@
+import argparse
 import os
+import time
+
+from startup_timer import StartupTimer
+
+timer = StartupTimer()
+
+from emotion_config import add_backend_arguments, add_detector_arguments, detector_options
+
+parser = argparse.ArgumentParser(description="Real-time emotion detection from a webcam.")
+parser.add_argument("--detect-every", type=int, default=5,
+                    help="run the face detector every K frames and track faces in between "
+                         "(1 = detect on every frame)")
+parser.add_argument("--no-smoothing", action="store_true",
+                    help="classify every tracked face on every frame without temporal smoothing")
+parser.add_argument("--startup-report", action="store_true",
+                    help="print import / model / camera / first-prediction timings")
+parser.add_argument("--metrics", action="store_true",
+                    help="draw FPS and per-stage latency percentiles on the frame")
+parser.add_argument("--metrics-dump", default=None,
+                    help="periodically write metrics to this file ('-' for stdout)")
+parser.add_argument("--metrics-format", choices=["json", "prom"], default="json",
+                    help="format of --metrics-dump (JSON or Prometheus text)")
+parser.add_argument("--metrics-interval", type=float, default=10.0,
+                    help="seconds between metric dumps")
+add_backend_arguments(parser)
+add_detector_arguments(parser)
+# Parse before any heavy import so --help and bad arguments return instantly
+args = parser.parse_args()
 
 # Optimize TensorFlow startup
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -8,43 +37,36 @@ import warnings
 warnings.filterwarnings('ignore')
 
 import cv2
-import numpy as np
-from keras.models import load_model
+
+# TensorFlow / Keras are only imported by the model loader thread
+from emotion_inference import load_backend_async
+from emotion_metrics import MetricsDumper, PipelineMetrics
+from emotion_pipeline import EmotionPipeline
+from emotion_smoothing import EmotionSmoother
+from face_detection import FaceDetector, load_face_cascade
+from face_tracking import FaceTracker
+
+timer.mark("imports")
 
 print("Loading model...")
 
 # ------------------------------
 # Load pretrained XCEPTION model
 # ------------------------------
-model_path = "fer2013_mini_XCEPTION.102-0.66.hdf5"
-
-# Check if model file exists
-if not os.path.exists(model_path):
-    print(f"❌ ERROR: Model file not found: {model_path}")
-    print(f"Current directory: {os.getcwd()}")
-    exit(1)
-
-try:
-    emotion_model = load_model(model_path, compile=False)
-    print("✓ Model loaded successfully!")
-except Exception as e:
-    print(f"❌ ERROR loading model: {e}")
-    exit(1)
-
-# Emotion labels (FER2013)
-emotion_labels = ['Angry','Disgust','Fear','Happy','Sad','Surprise','Neutral']
+# Loads and warms up in the background while the cascade and camera initialise
+model_future = load_backend_async(args.backend, args.model, timer=timer)
 
 # ------------------------------
 # Initialize OpenCV Face Detector
 # ------------------------------
-face_cascade = cv2.CascadeClassifier(
-    cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-)
+face_cascade = load_face_cascade()
 
 if face_cascade.empty():
     print("❌ ERROR: Could not load face cascade classifier")
     exit(1)
 
+timer.mark("cascade loaded")
+
 # ------------------------------
 # Start webcam
 # ------------------------------
@@ -54,43 +76,92 @@ if not cap.isOpened():
     print("❌ ERROR: Could not access webcam")
     exit(1)
 
+timer.mark("camera opened")
+
+# One forward pass per frame for all detected faces, on the chosen runtime
+try:
+    batched_model = model_future.result()
+    print(f"✓ Model loaded successfully! ({args.backend})")
+except FileNotFoundError as e:
+    print(f"❌ ERROR: {e}")
+    print(f"Current directory: {os.getcwd()}")
+    exit(1)
+except Exception as e:
+    print(f"❌ ERROR loading model: {e}")
+    exit(1)
+
 print("\nReal-time emotion detection running...")
 print("Press 'q' to quit.\n")
 
+# Detect on a downscaled pyramid level, boxes come back in full resolution
+detect_faces = FaceDetector(face_cascade, **detector_options(args))
+
+# Track faces between detections unless detecting on every frame
+tracker = FaceTracker(detect_faces, detect_every=args.detect_every) if args.detect_every > 1 else None
+
+# Steady per-track labels; unchanged faces are not re-classified
+smoother = None if args.no_smoothing else EmotionSmoother(batched_model)
+
+# Per-stage latency, FPS and faces per frame
+metrics = PipelineMetrics() if args.metrics or args.metrics_dump else None
+dumper = None
+if args.metrics_dump:
+    dumper = MetricsDumper(metrics, args.metrics_dump, fmt=args.metrics_format,
+                           interval=args.metrics_interval).start()
+
+# Capture, detection and inference each run on their own thread
+pipeline = EmotionPipeline(cap, detect_faces, batched_model, tracker=tracker,
+                           smoother=smoother, metrics=metrics).start()
+
 while True:
-    ret, frame = cap.read()
-    if not ret:
+    try:
+        packet = pipeline.get_result(timeout=1.0)
+    except EOFError:
         break
+    if packet is None:
+        if cv2.waitKey(1) & 0xFF == ord("q"):
+            break
+        continue
+
+    if "first prediction" not in timer.marks:
+        print(f"✓ First prediction after {timer.mark('first prediction'):.2f}s")
+        if args.startup_report:
+            print("Startup timings:\n" + timer.report())
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    frame = packet.frame
+    render_start = time.perf_counter()
 
-    # Detect faces
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5)
+    track_ids = packet.track_ids or [None] * len(packet.faces)
 
-    for (x, y, w, h) in faces:
+    for (x, y, w, h), emotion, track_id in zip(packet.faces, packet.emotions, track_ids):
         # Draw face rectangle
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
 
-        # Preprocess face ROI
-        roi_gray = gray[y:y + h, x:x + w]
-        roi_gray = cv2.resize(roi_gray, (64, 64))  # model input size
-        roi_gray = roi_gray.astype("float32") / 255.0
-        roi_gray = np.expand_dims(roi_gray, axis=0)
-        roi_gray = np.expand_dims(roi_gray, axis=-1)
-
-        # Predict emotion
-        prediction = emotion_model.predict(roi_gray, verbose=0)
-        emotion = emotion_labels[np.argmax(prediction)]
-
         # Display emotion label
-        cv2.putText(frame, emotion, (x, y - 10),
+        label = emotion if track_id is None else f"#{track_id} {emotion}"
+        cv2.putText(frame, label, (x, y - 10),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (36, 255, 12), 2)
 
+    # Per-stage queue depth
+    depths = pipeline.queue_depths()
+    cv2.putText(frame, "queues d/i/o: {detect}/{infer}/{display}".format(**depths), (10, 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    if args.metrics:
+        metrics.overlay(frame)
+
     cv2.imshow("Real-Time Emotion Detection", frame)
 
+    if metrics is not None:
+        metrics.record("render", time.perf_counter() - render_start)
+        metrics.frame_done(len(packet.faces))
+
     # Quit
     if cv2.waitKey(1) & 0xFF == ord("q"):
         break
 
+pipeline.stop()
+if dumper is not None:
+    dumper.stop()
 cap.release()
 cv2.destroyAllWindows()
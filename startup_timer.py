@@ -0,0 +1,26 @@
+import threading
+import time
+
+# Interpreter start as seen by this module; close enough for scripts that
+# import it first thing.
+_PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """Collects named, thread-safe milestones measured from process start."""
+
+    def __init__(self, start=None):
+        self.start = _PROCESS_START if start is None else start
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        elapsed = time.perf_counter() - self.start
+        with self._lock:
+            self.marks.setdefault(name, elapsed)
+        return elapsed
+
+    def report(self):
+        with self._lock:
+            marks = sorted(self.marks.items(), key=lambda item: item[1])
+        return "\n".join(f"  {name:<22} {seconds * 1000:8.1f} ms" for name, seconds in marks)
@@ -0,0 +1,53 @@
+import numpy as np
+
+import emotion_batch
+from emotion_inference import EmotionBackend, EMOTION_LABELS
+
+
+class PixelBackend(EmotionBackend):
+    """Deterministic stand-in for a model: scores depend on every pixel of the crop."""
+
+    def _run(self, batch):
+        rows = batch.reshape(len(batch), -1)
+        weights = np.random.default_rng(1).random((rows.shape[1], len(EMOTION_LABELS)))
+        return rows @ weights
+
+
+def _frames(num_frames, size=(240, 320)):
+    rng = np.random.default_rng(0)
+    return [(i, i / 30.0, rng.integers(0, 256, size=size, dtype=np.uint8)) for i in range(num_frames)]
+
+
+def _detector(gray):
+    # Seven boxes per frame at fixed positions
+    return [(20 + 40 * k, 30 + 10 * k, 48, 48) for k in range(7)]
+
+
+def test_chunk_with_more_faces_than_buffer_matches_per_face(monkeypatch):
+    model = PixelBackend(max_faces=32)
+    monkeypatch.setitem(emotion_batch._worker, "model", model)
+    monkeypatch.setitem(emotion_batch._worker, "detector", _detector)
+    chunk = _frames(6)  # 42 faces in one chunk
+
+    results = emotion_batch._process_chunk(chunk)
+
+    assert model.buffer.capacity >= 42
+    reference = PixelBackend(max_faces=32)
+    for (index, _, gray), (result_index, _, faces, probs) in zip(chunk, results):
+        assert result_index == index
+        assert len(probs) == len(faces) == 7
+        for box, p in zip(faces, probs):
+            _, expected = reference.predict_faces(gray, [box])
+            np.testing.assert_allclose(p, expected[0], rtol=1e-5)
+
+
+def test_buffer_growth_keeps_filled_slots():
+    model = PixelBackend(max_faces=2)
+    gray = _frames(1)[0][2]
+    boxes = _detector(gray)[:3]
+    for slot, box in enumerate(boxes[:2]):
+        model.buffer.put(slot, gray, box)
+    model.buffer.ensure_capacity(3)
+    model.buffer.put(2, gray, boxes[2])
+
+    np.testing.assert_array_equal(model.buffer.batch(3), PixelBackend().buffer.fill(gray, boxes))
@@ -0,0 +1,49 @@
+import pytest
+
+from emotion_metrics import FACE_BUCKETS, LATENCY_BUCKETS, Histogram, PipelineMetrics, render_prometheus
+
+
+def test_histogram_buckets_are_upper_bound_inclusive():
+    histogram = Histogram(FACE_BUCKETS)
+    for value in (0, 1, 2, 3, 100):
+        histogram.observe(value)
+    # Buckets le=0, 1, 2, 5, 10, 20, 50 and the overflow bucket
+    assert histogram.counts == [1, 1, 1, 1, 0, 0, 0, 1]
+    assert (histogram.count, histogram.total) == (5, 106)
+    assert histogram.percentiles((50,)) == {"p50": 2.0}
+
+
+def test_snapshot_reports_milliseconds_in_stage_order():
+    metrics = PipelineMetrics()
+    metrics.record("predict", 0.004)
+    metrics.record("detect", 0.002)
+    metrics.record("detect", 0.004)
+    metrics.frame_done(2)
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot["stages_ms"]) == ["detect", "predict"]
+    assert snapshot["stages_ms"]["detect"]["count"] == 2
+    assert snapshot["stages_ms"]["detect"]["mean_ms"] == pytest.approx(3.0)
+    assert snapshot["frames"] == 1
+    assert snapshot["faces_per_frame"]["mean"] == 2.0
+
+
+def test_prometheus_histograms_are_cumulative_and_labelled():
+    metrics = PipelineMetrics()
+    for seconds in (0.0004, 0.003, 0.003, 2.0):
+        metrics.record("detect", seconds)
+    metrics.frame_done(1)
+
+    lines = render_prometheus([({"stream": "0"}, metrics)]).splitlines()
+    detect = [line for line in lines if line.startswith("emotion_stage_latency_seconds")]
+    buckets = [line for line in detect if "_bucket" in line]
+
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[0] == 'emotion_stage_latency_seconds_bucket{stream="0",stage="detect",le="0.0005"} 1'
+    assert buckets[3].endswith('le="0.005"} 3')
+    assert buckets[-2].endswith('le="1.0"} 3')
+    assert buckets[-1] == 'emotion_stage_latency_seconds_bucket{stream="0",stage="detect",le="+Inf"} 4'
+    assert 'emotion_stage_latency_seconds_count{stream="0",stage="detect"} 4' in detect
+    assert 'emotion_faces_per_frame_count{stream="0"} 1' in lines
+    assert "# TYPE emotion_fps gauge" in lines
+    assert 'emotion_fps{stream="0"} 0.000' in lines
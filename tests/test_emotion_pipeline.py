@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from emotion_pipeline import EmotionPipeline
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in that yields `count` frames, slowly enough that none are dropped."""
+
+    def __init__(self, count, interval=0.01):
+        self.count = count
+        self.interval = interval
+        self.read_frames = 0
+
+    def read(self):
+        if self.read_frames >= self.count:
+            return False, None
+        self.read_frames += 1
+        time.sleep(self.interval)
+        return True, np.zeros((48, 64, 3), np.uint8)
+
+
+class FlakyBackend:
+    """Fails on the listed calls (e.g. a scheduler timeout), answers the rest."""
+
+    def __init__(self, fail_calls):
+        self.fail_calls = set(fail_calls)
+        self.calls = 0
+
+    def predict_faces(self, gray, faces):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise TimeoutError("batch not back in time")
+        return ["Happy"] * len(faces), np.ones((len(faces), 7)) / 7
+
+
+def drain(pipeline, timeout=5.0):
+    """Indexes of the packets delivered before EOF; fails if EOF never comes."""
+    indexes = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            packet = pipeline.get_result(timeout=0.1)
+        except EOFError:
+            return indexes
+        if packet is not None:
+            indexes.append(packet.index)
+    pytest.fail("pipeline never reached end of stream")
+
+
+def test_failed_inference_drops_only_that_frame():
+    backend = FlakyBackend(fail_calls={3})
+    pipeline = EmotionPipeline(FakeCapture(10), lambda gray: [(0, 0, 48, 48)], backend).start()
+    indexes = drain(pipeline)
+    pipeline.stop()
+
+    assert indexes == [0, 1, 3, 4, 5, 6, 7, 8, 9]
+    assert pipeline.failed_frames == 1
+
+
+def test_persistent_failures_end_the_stream():
+    backend = FlakyBackend(fail_calls=range(1, 1000))
+    pipeline = EmotionPipeline(FakeCapture(1000, interval=0.001), lambda gray: [(0, 0, 48, 48)],
+                               backend, max_consecutive_errors=5).start()
+    assert drain(pipeline) == []
+    pipeline.stop()
+    assert pipeline.failed_frames == 5
+
+
+def test_failing_detector_still_reaches_end_of_stream():
+    def detect(gray):
+        raise RuntimeError("cascade not loaded")
+
+    pipeline = EmotionPipeline(FakeCapture(3), detect, FlakyBackend(())).start()
+    assert drain(pipeline) == []
+    pipeline.stop()
@@ -0,0 +1,57 @@
+import threading
+
+import numpy as np
+import pytest
+
+from emotion_server import InferenceScheduler, ScheduledBackend
+
+
+class GatedBackend:
+    """Blocks every call until `gate` is set; records the batches it was given."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def predict_batch(self, batch):
+        self.gate.wait(5.0)
+        self.batches.append(batch.copy())
+        return np.repeat(batch.reshape(len(batch), -1)[:, :1], 7, axis=1)
+
+
+def faces(value, count=1):
+    return np.full((count, 64, 64, 1), value, np.float32)
+
+
+def test_submit_copies_the_callers_buffer():
+    backend = GatedBackend()
+    backend.gate.set()
+    scheduler = InferenceScheduler(backend, max_batch=4, max_latency=0.5)
+    buffer = faces(1.0)
+    future = scheduler.submit("a", buffer)
+    buffer[:] = 2.0
+    scheduler.start()
+    try:
+        assert future.result(2.0)[0, 0] == 1.0
+    finally:
+        scheduler.stop()
+
+
+def test_timed_out_request_is_withdrawn():
+    backend = GatedBackend()
+    scheduler = InferenceScheduler(backend, max_batch=1, max_latency=0.0).start()
+    try:
+        # Occupies the scheduler thread until the gate opens
+        busy = scheduler.submit("a", faces(1.0))
+        stream = ScheduledBackend(scheduler, "b", timeout=0.05)
+        with pytest.raises(TimeoutError):
+            stream.predict_batch(faces(2.0))
+
+        backend.gate.set()
+        busy.result(2.0)
+        assert scheduler.submit("a", faces(3.0)).result(2.0)[0, 0] == 3.0
+    finally:
+        scheduler.stop()
+
+    assert [b[0, 0, 0, 0] for b in backend.batches] == [1.0, 3.0]
+    assert scheduler._pending_faces == 0
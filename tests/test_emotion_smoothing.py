@@ -0,0 +1,80 @@
+import numpy as np
+
+from emotion_inference import EmotionBackend
+from emotion_smoothing import EmotionSmoother
+
+HAPPY = np.eye(7, dtype=np.float32)[3]
+SAD = np.eye(7, dtype=np.float32)[4]
+
+
+class ScriptedBackend(EmotionBackend):
+    """Answers every face of the n-th call with the n-th scripted distribution."""
+
+    def __init__(self, *answers):
+        super().__init__(max_faces=8)
+        self.answers = list(answers)
+        self.faces_seen = []
+
+    def _run(self, batch):
+        self.faces_seen.append(len(batch))
+        return np.tile(self.answers.pop(0), (len(batch), 1))
+
+
+def frame(value=100):
+    gray = np.full((120, 160), value, np.uint8)
+    gray[20:60, 20:60] = np.arange(40, dtype=np.uint8)[None, :] * 4
+    return gray
+
+
+FACE = [(20, 20, 40, 40)]
+
+
+def test_unchanged_face_reuses_its_last_result():
+    model = ScriptedBackend(HAPPY)
+    smoother = EmotionSmoother(model)
+
+    labels, first = smoother.classify(frame(), FACE, [1])
+    labels_again, second = smoother.classify(frame(), FACE, [1])
+
+    assert labels == labels_again == ["Happy"]
+    np.testing.assert_array_equal(first, second)
+    assert model.faces_seen == [1]
+    assert (smoother.inferred, smoother.skipped) == (1, 1)
+
+
+def test_changed_face_is_reclassified_and_smoothed():
+    model = ScriptedBackend(HAPPY, SAD)
+    smoother = EmotionSmoother(model, alpha=0.4)
+
+    smoother.classify(frame(), FACE, [1])
+    gray = frame()
+    gray[20:60, 20:60] = 255 - gray[20:60, 20:60]
+    labels, probs = smoother.classify(gray, FACE, [1])
+
+    assert model.faces_seen == [1, 1]
+    np.testing.assert_allclose(probs[0], 0.4 * SAD + 0.6 * HAPPY)
+    assert labels == ["Happy"]
+
+
+def test_max_skip_forces_inference():
+    model = ScriptedBackend(HAPPY, SAD)
+    smoother = EmotionSmoother(model, max_skip=2)
+
+    for _ in range(3):
+        smoother.classify(frame(), FACE, [1])
+    assert model.faces_seen == [1]
+    smoother.classify(frame(), FACE, [1])
+    assert model.faces_seen == [1, 1]
+
+
+def test_new_and_departed_tracks():
+    model = ScriptedBackend(HAPPY, SAD)
+    smoother = EmotionSmoother(model)
+
+    smoother.classify(frame(), FACE, [1])
+    # Same crop under a new ID is a new face: no history to reuse
+    labels, probs = smoother.classify(frame(), FACE, [2])
+    assert labels == ["Sad"] and list(smoother.states) == [2]
+    labels, probs = smoother.classify(frame(), [], [])
+    assert labels == [] and probs.shape == (0, 7)
+    assert smoother.states == {}
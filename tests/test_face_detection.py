@@ -0,0 +1,50 @@
+import numpy as np
+
+from face_detection import FaceDetector
+
+
+class FakeCascade:
+    """Records what detectMultiScale was asked and returns fixed boxes."""
+
+    def __init__(self, faces):
+        self.faces = faces
+        self.shape = None
+        self.kwargs = None
+
+    def detectMultiScale(self, image, **kwargs):
+        self.shape = image.shape
+        self.kwargs = kwargs
+        return np.array(self.faces, dtype=np.int32).reshape(-1, 4)
+
+
+def test_boxes_are_mapped_back_to_full_resolution():
+    cascade = FakeCascade([(10, 20, 30, 30)])
+    detector = FaceDetector(cascade, detect_width=480, min_face=80, max_face=400)
+
+    faces = detector(np.zeros((1080, 1920), np.uint8))
+
+    # 1920 -> 960 -> 480: two pyramid levels, boxes scaled by 4
+    assert cascade.shape == (270, 480)
+    assert faces == [(40, 80, 120, 120)]
+    assert cascade.kwargs["minSize"] == (20, 20)
+    assert cascade.kwargs["maxSize"] == (100, 100)
+
+
+def test_mapped_boxes_are_clipped_to_the_frame():
+    # One pyramid level: the box maps to (480, 280, 40, 40), which overhangs
+    # the 501x301 frame and is clipped to it
+    detector = FaceDetector(FakeCascade([(240, 140, 20, 20)]), detect_width=240)
+    assert detector(np.zeros((301, 501), np.uint8)) == [(480, 280, 21, 21)]
+
+
+def test_small_frames_and_disabled_downscaling_use_full_resolution():
+    cascade = FakeCascade([(5, 5, 10, 10)])
+    assert FaceDetector(cascade, detect_width=480)(np.zeros((240, 320), np.uint8)) == [(5, 5, 10, 10)]
+    assert cascade.shape == (240, 320)
+
+    FaceDetector(cascade, detect_width=0)(np.zeros((1080, 1920), np.uint8))
+    assert cascade.shape == (1080, 1920)
+
+
+def test_no_faces():
+    assert FaceDetector(FakeCascade([]))(np.zeros((480, 640), np.uint8)) == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from face_tracking import FaceTracker, box_iou
+
+
+class ScriptedDetector:
+    """Returns the next scripted list of boxes on each call."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, gray):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def frame_with_face(x, y, size=40, shape=(240, 320)):
+    """Flat frame with one textured square whose top-left corner is at (x, y)."""
+    gray = np.full(shape, 90, np.uint8)
+    gray[y:y + size, x:x + size] = np.random.default_rng(0).integers(0, 256, (size, size))
+    return gray
+
+
+def test_box_iou():
+    assert box_iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert box_iou((0, 0, 10, 10), (20, 20, 10, 10)) == 0.0
+    assert box_iou((0, 0, 10, 10), (5, 0, 10, 10)) == pytest.approx(50 / 150)
+
+
+def test_tracks_follow_between_detections_and_keep_their_id():
+    detector = ScriptedDetector([(100, 80, 40, 40)], [(106, 84, 40, 40)])
+    tracker = FaceTracker(detector, detect_every=3)
+
+    [track] = tracker.update(frame_with_face(100, 80))
+    first_id = track.id
+    # Followed by template matching, no detector call
+    assert [t.box for t in tracker.update(frame_with_face(103, 82))] == [(103, 82, 40, 40)]
+    assert [t.box for t in tracker.update(frame_with_face(106, 84))] == [(106, 84, 40, 40)]
+    assert detector.calls == 1
+
+    # Third frame since the last detection: the detector runs and IoU keeps the ID
+    [track] = tracker.update(frame_with_face(106, 84))
+    assert detector.calls == 2
+    assert (track.id, track.box, track.confidence) == (first_id, (106, 84, 40, 40), 1.0)
+
+
+def test_unmatched_tracks_expire_and_new_faces_get_new_ids():
+    detector = ScriptedDetector([(100, 80, 40, 40)], [(10, 10, 40, 40)])
+    tracker = FaceTracker(detector, detect_every=1)
+
+    [old] = tracker.update(frame_with_face(100, 80))
+    [new] = tracker.update(frame_with_face(10, 10))
+    assert new.id != old.id
+    assert tracker.tracks == [new]
+
+
+def test_lost_match_forces_an_early_detection():
+    detector = ScriptedDetector([(100, 80, 40, 40)], [])
+    tracker = FaceTracker(detector, detect_every=10, min_confidence=0.6)
+
+    tracker.update(frame_with_face(100, 80))
+    # The face vanished: template matching finds only flat background
+    [track] = tracker.update(np.full((240, 320), 90, np.uint8))
+    assert track.confidence < 0.6
+    assert tracker.update(np.full((240, 320), 90, np.uint8)) == []
+    assert detector.calls == 2